@@ -0,0 +1,48 @@
+"""Differential fuzzing of the RTL against the golden model across a process pool.
+
+    python analysis/fuzz_sweep.py [FixedPE|MMA|MMAUnit ...] [--seeds 0:1000] [--workers N]
+
+Prints each failing seed's shrunk reproducer and exits non-zero if there were any. Replay one with
+`fuzz.check(fuzz.generate(target, seed))`."""
+
+import sys
+import time
+
+import numpy as np
+
+import fuzz
+
+
+def arg(name: str, default: str) -> str:
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def main() -> None:
+    targets = [t for t in sys.argv[1:] if t in fuzz.TARGETS] or list(fuzz.TARGETS)
+    lo, hi = (int(x) for x in arg("--seeds", "0:200").split(":"))
+    workers = int(arg("--workers", "0")) or None
+
+    failed = False
+    for target in targets:
+        start = time.perf_counter()
+        failures = fuzz.run(target, range(lo, hi), workers)
+        print(
+            f"{target:<10}{hi - lo:>6} seeds{len(failures):>6} failing{time.perf_counter() - start:>9.1f} s", flush=True
+        )
+        for failure in failures:
+            failed = True
+            case = failure.case
+            print(f"\n  seed {failure.seed}: shrunk to a{case.a.shape} b{case.b.shape}", flush=True)
+            with np.printoptions(formatter={"int": lambda x: f"{x:#06x}"}):
+                print(f"    a = {case.a.tolist() if case.a.size > 64 else case.a}", flush=True)
+                print(f"    b = {case.b.tolist() if case.b.size > 64 else case.b}", flush=True)
+            if case.target == "MMAUnit":
+                print(f"    kchunk={case.kchunk} banks={case.banks}", flush=True)
+            for error in failure.errors[:8]:
+                print(f"    {error}", flush=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import json
 import re
+import shutil
 import subprocess
 import sys
 import tempfile
@@ -11,8 +12,12 @@ from amaranth.back import rtlil
 from amaranth.lib import wiring
 from amaranth.lib.wiring import In, Out
 
+import tool_cache
+from adder import Adder
 from fixed_pe import FixedPE
 from mma import MMA
+from mma_stream import Geometry, MMAUnit
+from systolic_mma import SystolicMMA
 
 DEVICE = "um5g-85k"
 PACKAGE = "CABGA381"  # LFE5UM5G-85F-8BG381C on the ECP5-5G EVN board
@@ -69,47 +74,100 @@ def make_pnr_top(dut_cls: Callable[[], wiring.Component]) -> wiring.Component:
 class Block(NamedTuple):
     name: str
     build: Callable[[], wiring.Component]
+    slow: bool = False
 
 
 BLOCKS = [
     Block("MMA", lambda: make_pnr_top(MMA)),
     Block("FixedPE", lambda: make_pnr_top(FixedPE)),
+    Block("FixedPE_2stage", lambda: make_pnr_top(lambda: FixedPE(pipeline_stages=2))),
+    Block("FixedPE_3stage", lambda: make_pnr_top(lambda: FixedPE(pipeline_stages=3))),
+    Block("FixedPE_csa", lambda: make_pnr_top(lambda: FixedPE(carry_save=True))),
+    Block("FixedPE_dot2", lambda: make_pnr_top(lambda: FixedPE(lanes=2))),
+    Block("FixedPE_dot4", lambda: make_pnr_top(lambda: FixedPE(lanes=4))),
+    Block("MMA_8x8", lambda: make_pnr_top(lambda: MMA(8, 8, 8)), slow=True),
+    Block("SystolicMMA", lambda: make_pnr_top(SystolicMMA)),
+    Block("SystolicMMA_8x8", lambda: make_pnr_top(lambda: SystolicMMA(8, 8, 8))),
+    Block("MMAUnit", lambda: make_pnr_top(MMAUnit), slow=True),
+    Block("MMAUnit_8x8", lambda: make_pnr_top(lambda: MMAUnit(Geometry(8, 8, 8))), slow=True),
 ]
 
+ADDER_SWEEP = [
+    Adder(),
+    Adder("carry_select", 4),
+    Adder("carry_select", 6),
+    Adder("carry_select", 8),
+    Adder("kogge_stone"),
+    Adder("brent_kung"),
+    Adder("sklansky"),
+]
+
+
+def adder_blocks() -> list[Block]:
+    """FixedPE (plain and carry-save) and MMA once per adder architecture in ADDER_SWEEP."""
+    blocks = []
+    for adder in ADDER_SWEEP:
+        blocks += [
+            Block(f"FixedPE_{adder.name}", lambda adder=adder: make_pnr_top(lambda: FixedPE(adder=adder))),
+            Block(
+                f"FixedPE_csa_{adder.name}",
+                lambda adder=adder: make_pnr_top(lambda: FixedPE(carry_save=True, adder=adder)),
+            ),
+            Block(f"MMA_{adder.name}", lambda adder=adder: make_pnr_top(lambda: MMA(adder=adder))),
+        ]
+    return blocks
+
 
-def synth_json(block: Block, out_json: Path) -> None:
+def synth_json(block: Block, out_json: Path, use_cache: bool = True, cache_root: Path = tool_cache.CACHE_ROOT) -> bool:
+    """Write the synth_ecp5 netlist for `block` to `out_json`; returns whether it came from tool_cache."""
     il = rtlil.convert(block.build(), name=block.name)
-    script = f"read_rtlil <<RTLIL\n{il}\nRTLIL\nsynth_ecp5 -top {block.name} -json {out_json}"
+    passes = f"synth_ecp5 -top {block.name}"
+    # keyed on the full RTLIL: src attributes reach the netlist and the critical-path file refs below
+    entry_key = tool_cache.key(il, tool_cache.tool_version("yosys", "-V"), passes)
+    entry = tool_cache.lookup("synth_ecp5", entry_key, cache_root) if use_cache else None
+    if entry is not None:
+        shutil.copyfile(entry / "netlist.json", out_json)
+        return True
+    script = f"read_rtlil <<RTLIL\n{il}\nRTLIL\n{passes} -json {out_json}"
     result = subprocess.run(["yosys", "-q", "-"], input=script, capture_output=True, text=True)
     assert result.returncode == 0, result.stderr
-
-
-def pnr(json_in: Path, report_out: Path) -> str:
+    tool_cache.store("synth_ecp5", entry_key, {"netlist.json": out_json}, cache_root)
+    return False
+
+
+def pnr(
+    json_in: Path, report_out: Path, use_cache: bool = True, cache_root: Path = tool_cache.CACHE_ROOT
+) -> tuple[str, bool]:
+    """Place and route `json_in`, writing nextpnr's report to `report_out`. Returns (log, from tool_cache)."""
+    flags = [
+        f"--{DEVICE}",
+        "--package",
+        PACKAGE,
+        "--speed",
+        SPEED,
+        "--freq",
+        str(TARGET_MHZ),
+        "--textcfg",
+        "/dev/null",
+        "--seed",
+        "1",
+        "--timing-allow-fail",
+    ]
+    entry_key = tool_cache.key(
+        tool_cache.file_digest(json_in), tool_cache.tool_version("nextpnr-ecp5", "--version"), " ".join(flags)
+    )
+    entry = tool_cache.lookup("nextpnr_ecp5", entry_key, cache_root) if use_cache else None
+    if entry is not None:
+        shutil.copyfile(entry / "report.json", report_out)
+        return (entry / "nextpnr.log").read_text(), True
     result = subprocess.run(
-        [
-            "nextpnr-ecp5",
-            "--json",
-            str(json_in),
-            f"--{DEVICE}",
-            "--package",
-            PACKAGE,
-            "--speed",
-            SPEED,
-            "--freq",
-            str(TARGET_MHZ),
-            "--report",
-            str(report_out),
-            "--textcfg",
-            "/dev/null",
-            "--seed",
-            "1",
-            "--timing-allow-fail",
-        ],
+        ["nextpnr-ecp5", "--json", str(json_in), "--report", str(report_out), *flags],
         capture_output=True,
         text=True,
     )
     assert result.returncode == 0, result.stderr
-    return result.stderr
+    tool_cache.store("nextpnr_ecp5", entry_key, {"nextpnr.log": result.stderr, "report.json": report_out}, cache_root)
+    return result.stderr, False
 
 
 def parse_fmax(log: str) -> float | None:
@@ -154,29 +212,43 @@ FMAX_FLOORS_MHZ = {"MMA": 55.0, "FixedPE": 75.0}
 
 
 def main() -> None:
-    print(f"{'block':<12}{'fmax MHz':>10}" + "".join(f"{c:>14}" for c in INTERESTING_CELLS), flush=True)
-    print("-" * (22 + 14 * len(INTERESTING_CELLS)), flush=True)
+    include_slow = "--all" in sys.argv
+    use_cache = "--no-cache" not in sys.argv
+    sweep = "--adders" in sys.argv  # sweep the adder architectures instead of the default blocks
+    print(f"{'block':<24}{'fmax MHz':>10}" + "".join(f"{c:>14}" for c in INTERESTING_CELLS), flush=True)
+    print("-" * (34 + 14 * len(INTERESTING_CELLS)), flush=True)
     critical_paths: list[tuple[str, float, list[tuple[str, int]]]] = []
     measured: dict[str, float | None] = {}
     with tempfile.TemporaryDirectory() as tmp_str:
         tmp = Path(tmp_str)
-        for block in BLOCKS:
+        for block in adder_blocks() if sweep else BLOCKS:
+            if block.slow and not include_slow:
+                continue
             json_in = tmp / f"{block.name}.json"
             report = tmp / f"{block.name}.report.json"
-            synth_json(block, json_in)
-            log = pnr(json_in, report)
+            synth_cached = synth_json(block, json_in, use_cache)
+            log, pnr_cached = pnr(json_in, report, use_cache)
             util = parse_utilization(report)
             fmax = parse_fmax(log)
             measured[block.name] = fmax
             path_ns, files = parse_critical_path(log)
             cells = "".join(f"{util.get(c, 0):>14}" for c in INTERESTING_CELLS)
-            print(f"{block.name:<12}{(f'{fmax:.1f}' if fmax else '-'):>10}{cells}", flush=True)
+            cached = "  (cached)" if synth_cached and pnr_cached else ""
+            print(f"{block.name:<24}{(f'{fmax:.1f}' if fmax else '-'):>10}{cells}{cached}", flush=True)
             critical_paths.append((block.name, path_ns, files))
 
     print("\nCritical paths (top source files per block):", flush=True)
     for name, path_ns, files in critical_paths:
         top = ", ".join(f"{f} (x{n})" for f, n in files[:4]) or "(no project files found in path)"
-        print(f"  {name:<10} {path_ns:>6.2f} ns  {top}", flush=True)
+        print(f"  {name:<22} {path_ns:>6.2f} ns  {top}", flush=True)
+
+    if sweep:
+        print("\nFastest adder per design:", flush=True)
+        for design in ("FixedPE", "FixedPE_csa", "MMA"):
+            runs = {adder.name: measured.get(f"{design}_{adder.name}") for adder in ADDER_SWEEP}
+            best = max(runs, key=lambda name: runs[name] or 0.0)
+            print(f"  {design:<12} {best} ({runs[best]} MHz)", flush=True)
+        return
 
     regressions = []
     for name, floor in FMAX_FLOORS_MHZ.items():
@@ -0,0 +1,144 @@
+"""Simulation throughput per block: elaboration time, simulated cycles per wall-second and output tiles per
+wall-second for FixedPE, MMA and MMAUnit (at several kblocks), with and without VCD tracing. Rates count only
+the seconds spent stepping the simulator, not elaboration.
+
+    python analysis/sim_bench.py [--json build/sim_bench.json] [--cxxrtl]
+
+--cxxrtl adds MMAUnit rows on the compiled CXXRTL backend (its first build takes minutes; later runs hit the
+cache). Exits non-zero when a block's throughput drops below SIM_FLOORS_CYCLES_PER_S; the test workflow runs
+it on every PR, as it does window_sweep."""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import numpy as np
+from amaranth.sim import Simulator
+
+from batch_sim import simulate_fixed_pe, simulate_mma, simulate_mma_unit
+from bfloat16 import bits_from_float
+from fixed_pe import FixedPE
+from gemm import batch_schedule, run_cxxrtl
+from mma import MMA
+from mma_stream import MMAUnit, N
+
+KBLOCKS = (1, 4, 16)
+
+
+class Case(NamedTuple):
+    name: str
+    elaborate: Callable[[], object]  # the fixed per-run cost: elaborate (and for CXXRTL, load) the design
+    # (rng, vcd path or None) -> (simulated cycles, output tiles, wall seconds stepping)
+    run: Callable[[np.random.Generator, str | None], tuple[int, float, float]]
+    vcd: bool = True  # also measure with tracing
+
+
+def operands(rng: np.random.Generator, shape: tuple[int, ...]) -> np.ndarray:
+    return bits_from_float(rng.standard_normal(shape))
+
+
+def fixed_pe(rng, vcd):
+    a, b = operands(rng, (1000, 8)), operands(rng, (1000, 8))
+    result = simulate_fixed_pe(a, b, vcd)
+    return result.cycles, len(a) / (N * N), result.sim_s  # one tile is N*N PE results
+
+
+def mma(rng, vcd):
+    a, b = operands(rng, (100, N, N)), operands(rng, (100, N, N))
+    result = simulate_mma(a, b, vcd)
+    return result.cycles, len(a), result.sim_s
+
+
+def mma_unit(kblocks: int, ops: int):
+    def run(rng, vcd):
+        a, b = operands(rng, (ops, N, N * kblocks)), operands(rng, (ops, N * kblocks, N))
+        result = simulate_mma_unit(a, b, vcd)[0]
+        return result.cycles, ops, result.sim_s
+
+    return run
+
+
+def mma_unit_cxxrtl(kblocks: int, ops: int):
+    def run(rng, vcd):
+        a, b = operands(rng, (ops, N, N * kblocks)), operands(rng, (ops, N * kblocks, N))
+        result = run_cxxrtl(batch_schedule(a, b))
+        return result.cycles, ops, result.sim_s
+
+    return run
+
+
+CASES = [
+    Case("FixedPE", lambda: Simulator(FixedPE()), fixed_pe),
+    Case("MMA", lambda: Simulator(MMA()), mma),
+    *(Case(f"MMAUnit kb={kb}", lambda: Simulator(MMAUnit()), mma_unit(kb, 800 // (N * kb + 7))) for kb in KBLOCKS),
+]
+
+
+def cxxrtl_unit():
+    from cxxrtl_sim import CxxrtlSim
+
+    return CxxrtlSim(MMAUnit())
+
+
+CXXRTL_CASES = [
+    Case(f"MMAUnit kb={kb} cxxrtl", cxxrtl_unit, mma_unit_cxxrtl(kb, 4000 // (N * kb + 7)), vcd=False) for kb in KBLOCKS
+]
+
+# well under what a laptop manages, so only a real slowdown (not noise) trips them
+SIM_FLOORS_CYCLES_PER_S = {"FixedPE": 800.0, "MMA": 80.0, "MMAUnit kb=4": 80.0}
+
+
+def measure(case: Case, vcd: str | None) -> dict[str, float]:
+    """Rates are over sim_s, the stepping alone; wall_s is the whole `run` including its own elaboration,
+    and elaborate_s is that fixed cost measured separately."""
+    start = time.perf_counter()
+    case.elaborate()
+    elab_s = time.perf_counter() - start
+    start = time.perf_counter()
+    cycles, tiles, sim_s = case.run(np.random.default_rng(0), vcd)
+    wall_s = time.perf_counter() - start
+    return {
+        "elaborate_s": elab_s,
+        "cycles": cycles,
+        "sim_s": sim_s,
+        "wall_s": wall_s,
+        "cycles_per_s": cycles / sim_s,
+        "tiles_per_s": tiles / sim_s,
+    }
+
+
+def main() -> None:
+    out = Path(sys.argv[sys.argv.index("--json") + 1]) if "--json" in sys.argv else Path("build/sim_bench.json")
+    cases = CASES + (CXXRTL_CASES if "--cxxrtl" in sys.argv else [])
+    print(f"{'block':<24}{'vcd':>5}{'elab s':>9}{'cycles':>9}{'cycles/s':>12}{'tiles/s':>11}", flush=True)
+    print("-" * 70, flush=True)
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for case in cases:
+            for traced in (False, True) if case.vcd else (False,):
+                row = measure(case, str(Path(tmp) / "bench.vcd") if traced else None)
+                results[f"{case.name}{' vcd' if traced else ''}"] = row
+                print(
+                    f"{case.name:<24}{('yes' if traced else 'no'):>5}{row['elaborate_s']:>9.2f}{row['cycles']:>9}"
+                    f"{row['cycles_per_s']:>12.1f}{row['tiles_per_s']:>11.2f}",
+                    flush=True,
+                )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"results": results, "floors_cycles_per_s": SIM_FLOORS_CYCLES_PER_S}, indent=2))
+    print(f"\nwrote {out}", flush=True)
+
+    regressions = []
+    for name, floor in SIM_FLOORS_CYCLES_PER_S.items():
+        rate = results.get(name, {}).get("cycles_per_s")
+        if rate is None or rate < floor:
+            regressions.append(f"{name}: {rate} cycles/s < floor {floor} cycles/s")
+    if regressions:
+        print("\nFAIL: simulation throughput regression vs floor:", *regressions, sep="\n  ", flush=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
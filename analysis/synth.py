@@ -1,18 +1,25 @@
 import re
 import subprocess
 import sys
+import tempfile
+from pathlib import Path
 from typing import Callable, NamedTuple
 
 from amaranth.back import rtlil
 from amaranth.lib import wiring
 
+import tool_cache
 from carry_select_adder import CarrySelectAdder, CarrySelectSubtractor
+from epilogue import Epilogue
 from fixed_pe import FixedMAC, FixedPE
 from mantissa_multiplier import MantissaMultiplier
-from mma import MMA
+from mma import MMA, N
+from mma_stream import Geometry, MMAUnit
 from normalizer import Normalizer
-from parallel_prefix import KoggeStone
+from parallel_prefix import KoggeStone, LeadingZeroCounter
 from rounder import Rounder
+from shared_drain import drain_cycles
+from systolic_mma import SystolicMMA
 
 
 def run_yosys(script: str) -> str:
@@ -34,19 +41,77 @@ BLOCKS = [
     Block("CarrySelectSubtractor", lambda: CarrySelectSubtractor(26, 6), True),
     Block("MantissaMultiplier", MantissaMultiplier, True),
     Block("Normalizer", lambda: Normalizer(26), True),
+    Block("LeadingZeroCounter", lambda: LeadingZeroCounter(48), True),
     Block("Rounder", lambda: Rounder(7), True),
     Block("MMA", MMA, False),
+    Block("MMA_shared", lambda: MMA(drain_engines=N), False),
+    Block("MMA_8x8", lambda: MMA(8, 8, 8), False, slow=True),
+    Block("MMA_16x16", lambda: MMA(16, 16, 16), False, slow=True),
+    Block("SystolicMMA", SystolicMMA, False),
+    Block("SystolicMMA_8x8", lambda: SystolicMMA(8, 8, 8), False, slow=True),
+    Block("MMAUnit", MMAUnit, False, slow=True),
+    Block("MMAUnit_8x8", lambda: MMAUnit(Geometry(8, 8, 8)), False, slow=True),
+    Block("MMAUnit_bfile", lambda: MMAUnit(Geometry(b_file=True)), False, slow=True),
+    Block("MMAUnit_multi", lambda: MMAUnit(Geometry(max_outputs=4)), False, slow=True),
+    Block("MMAUnit_epilogue", lambda: MMAUnit(Geometry(epilogue=True)), False, slow=True),
+    Block("MMAUnit_zero_skip", lambda: MMAUnit(Geometry(zero_skip=True)), False, slow=True),
+    Block("MMAUnit_sparse", lambda: MMAUnit(Geometry(sparse_a=True)), False, slow=True),
     Block("FixedMAC", FixedMAC, True),
     Block("FixedPE", FixedPE, False),
+    Block("FixedPE_csa", lambda: FixedPE(carry_save=True), False),
+    Block("FixedPE_dot2", lambda: FixedPE(lanes=2), False),
+    Block("FixedPE_dot4", lambda: FixedPE(lanes=4), False),
+    Block("MMA_dot2", lambda: MMA(lanes=2), False),
+    Block("Epilogue", Epilogue, False),
 ]
 
 
-def synthesize(block: Block) -> str:
+class DrainPoint(NamedTuple):
+    rows: int
+    cols: int
+    engines: int  # MMA drain_engines; 0 is a drain per PE
+
+    @property
+    def name(self) -> str:
+        return f"MMA_{self.rows}x{self.cols}" + (f"_shared{self.engines}" if self.engines else "")
+
+
+# per-PE drains vs drain_engines=cols (a row per cycle), and the larger shared arrays the freed LUTs buy
+DRAIN_SWEEP = [
+    DrainPoint(4, 4, 0),
+    DrainPoint(4, 4, 4),
+    DrainPoint(5, 5, 5),
+    DrainPoint(6, 6, 6),
+    DrainPoint(8, 8, 0),
+    DrainPoint(8, 8, 8),
+]
+
+
+def drain_block(point: DrainPoint) -> Block:
+    return Block(point.name, lambda: MMA(point.rows, point.cols, point.cols, drain_engines=point.engines), False)
+
+
+def synthesize(
+    block: Block, use_cache: bool = True, ecp5: bool = False, cache_root: Path = tool_cache.CACHE_ROOT
+) -> tuple[str, bool]:
+    """Yosys output (stat and ltp: for sequential blocks, the deepest path between registers and ports) and
+    whether it came from tool_cache. With `ecp5`, the stat is of the synth_ecp5 netlist (LUT4 / TRELLIS_FF /
+    CCU2C cells) instead. The cache entry also keeps the mapped netlist as netlist.json."""
     il = rtlil.convert(block.build(), name=block.name)
-    script = f"read_rtlil <<rtlil\n{il}\nrtlil\nsynth -top {block.name} -flatten\nstat"
-    if block.combinational:
-        script += "\nabc -lut 6\nltp"
-    return run_yosys(script)
+    passes = f"synth -top {block.name} -flatten\nstat"
+    if ecp5:
+        passes = f"synth_ecp5 -top {block.name}\nstat"
+    else:
+        passes += "\nabc -lut 6\nltp" + ("" if block.combinational else " -noff")
+    entry_key = tool_cache.key(tool_cache.design_text(il), tool_cache.tool_version("yosys", "-V"), passes)
+    entry = tool_cache.lookup("synth", entry_key, cache_root) if use_cache else None
+    if entry is not None:
+        return (entry / "yosys.log").read_text(), True
+    with tempfile.TemporaryDirectory() as tmp:
+        netlist = Path(tmp) / "netlist.json"
+        output = run_yosys(f"read_rtlil <<rtlil\n{il}\nrtlil\n{passes}\nwrite_json {netlist}")
+        tool_cache.store("synth", entry_key, {"yosys.log": output, "netlist.json": netlist}, cache_root)
+    return output, False
 
 
 def cell_count(yosys_output: str) -> int:
@@ -60,16 +125,50 @@ def lut_depth(yosys_output: str) -> int | None:
     return int(match.group(1)) if match else None
 
 
+def lut4_count(yosys_output: str) -> int:
+    match = re.search(r"^\s*(?:LUT4\s+(\d+)|(\d+)\s+LUT4)\s*$", yosys_output, re.MULTILINE)
+    assert match, "synth_ecp5 produced no LUT4 count"
+    return int(match.group(1) or match.group(2))
+
+
+def drain_report(use_cache: bool) -> None:
+    """ECP5 LUT4s per MMA with per-PE vs shared drains: LUTs saved against the same array with per-PE drains,
+    and peak MACs/cycle per 1k LUT4. `*` marks arrays that fit the 4x4 per-PE budget."""
+    print(f"{'design':<20}{'LUT4':>8}{'saved':>8}{'drain cyc':>11}{'MACs/cyc':>10}{'per kLUT':>10}", flush=True)
+    print("-" * 67, flush=True)
+    luts: dict[tuple[int, int], int] = {}
+    budget = None
+    for point in DRAIN_SWEEP:
+        output, cached = synthesize(drain_block(point), use_cache, ecp5=True)
+        count = lut4_count(output)
+        budget = count if budget is None else budget
+        if not point.engines:
+            luts[(point.rows, point.cols)] = count
+        per_pe = luts.get((point.rows, point.cols))
+        saved = f"{per_pe - count}" if point.engines and per_pe is not None else "—"
+        macs = point.rows * point.cols
+        row = (
+            f"{point.name:<20}{count:>8}{saved:>8}{drain_cycles(macs, point.engines):>11}{macs:>10}"
+            f"{1000 * macs / count:>10.2f}"
+        )
+        print(row + (" *" if count <= budget else "") + ("  (cached)" if cached else ""), flush=True)
+
+
 def main() -> None:
     include_slow = "--all" in sys.argv
+    use_cache = "--no-cache" not in sys.argv
+    if "--drain" in sys.argv:
+        drain_report(use_cache)
+        return
     print(f"{'block':<26}{'cells':>8}{'depth (LUT6)':>14}", flush=True)
     print("-" * 48, flush=True)
     for block in BLOCKS:
         if block.slow and not include_slow:
             continue
-        output = synthesize(block)
+        output, cached = synthesize(block, use_cache)
         depth = lut_depth(output)
-        print(f"{block.name:<26}{cell_count(output):>8}{(str(depth) if depth is not None else '—'):>14}", flush=True)
+        row = f"{block.name:<26}{cell_count(output):>8}{(str(depth) if depth is not None else '—'):>14}"
+        print(row + ("  (cached)" if cached else ""), flush=True)
 
 
 if __name__ == "__main__":
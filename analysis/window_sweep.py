@@ -4,7 +4,7 @@ from typing import Callable, NamedTuple
 
 import numpy as np
 
-from bfloat16 import BF16
+from bfloat16 import bits_from_float, bits_to_float
 
 K = 4
 WINDOW_MAX_EXP = 13
@@ -18,7 +18,7 @@ class Workload(NamedTuple):
 
 
 def bf16_quantize(x: np.ndarray) -> np.ndarray:
-    return np.array([BF16.from_float(float(v)).to_float() for v in x.ravel()], dtype=np.float64).reshape(x.shape)
+    return bits_to_float(bits_from_float(x), np.float64)
 
 
 def normal_pair(rng: np.random.Generator, n: int, a_scale: float, b_scale: float) -> tuple[np.ndarray, np.ndarray]:
@@ -3,8 +3,10 @@ from amaranth.build import Platform
 from amaranth.lib import data, wiring
 from amaranth.lib.wiring import In, Out
 
+from adder import Adder, add, add_signed
 from bfloat16 import BFloat16
 from normalizer import Normalizer
+from parallel_prefix import LeadingZeroCounter
 from rounder import Rounder
 
 BF16_BIAS = 127
@@ -17,14 +19,14 @@ def decomposed_layout(width: int) -> data.StructLayout:
 
 
 def decompose(m: Module, value: Signal):
-    """Drain stage 1: sign, |value|, and the index of its leading one."""
+    """Drain stage 1: sign, |value|, and the index of its leading one (log-depth LeadingZeroCounter)."""
     out = Signal(decomposed_layout(len(value)))
     negative = value < 0
     m.d.comb += out.sign.eq(negative)
     m.d.comb += out.magnitude.eq(Mux(negative, -value, value))
-    for i in range(len(value)):
-        with m.If(out.magnitude[i]):
-            m.d.comb += out.leading_one.eq(i)
+    m.submodules.lzc = lzc = LeadingZeroCounter(len(value))
+    m.d.comb += lzc.value.eq(out.magnitude)
+    m.d.comb += out.leading_one.eq(lzc.leading_one)
     return out
 
 
@@ -58,58 +60,186 @@ def round_to_bf16(m: Module, d: data.View, lsb_exp: int):
     return result
 
 
-class Accumulator(wiring.Component):
+class DrainEngine(wiring.Component):
+    """Pipelined drain of one raw accumulator value to bf16: decompose, a register, normalize+round.
+    `result` follows `value` one cycle later."""
+
     def __init__(self, width: int = 64, lsb_exp: int = 0):
-        assert width >= BF16_MANTISSA_BITS + 3  # implicit 1 + mantissa + guard + round
         self.width = width
         self.lsb_exp = lsb_exp
+        super().__init__({"value": In(signed(width)), "result": Out(BFloat16)})
 
-        super().__init__(
-            {
-                "addend": In(signed(width)),
-                "addend_dropped": In(1),  # this addend was an out-of-window product forced to 0
-                "acc_sel": In(range(ACC_BANKS)),  # bank targeted by load/enable and read by value/result/flags
-                "load": In(1),
-                "enable": In(1),
-                "value": Out(signed(width)),
-                "result": Out(BFloat16),
-                "result_valid": Out(1),
-                "any_dropped": Out(1),  # sticky: some addend in this accumulation was dropped
-                "any_overflow": Out(1),  # sticky: the accumulator wrapped past signed range
-            }
-        )
+    def elaborate(self, platform: Platform | None) -> Module:
+        m = Module()
+        # drain_latch splits the drain across a register so the normalize+round runs the cycle
+        # after acc settles, keeping it off the per-cycle MAC critical path (Fmax).
+        drain_latch = Signal(decomposed_layout(self.width))
+        m.d.sync += drain_latch.eq(decompose(m, self.value))
+        m.d.comb += self.result.eq(round_to_bf16(m, drain_latch, self.lsb_exp))
+        return m
+
+
+class Accumulator(wiring.Component):
+    def __init__(
+        self,
+        width: int = 64,
+        lsb_exp: int = 0,
+        split_drain: bool = False,
+        carry_save: bool = False,
+        adder: Adder = Adder(),
+        drain: bool = True,
+    ):
+        """With `split_drain`, value/result/flags read the `drain_sel` bank instead of `acc_sel`, so one bank
+        can drain while another accumulates. `adder` builds the accumulate add (the carry-save resolve adds
+        in carry-save mode).
+
+        With `carry_save`, each bank holds a sum and a carry vector and the per-cycle update is a 3:2
+        compressor with no carry chain. Banks resolve through a two-cycle segmented add (the low half and its
+        registered carry, then the high half), so no register-to-register path holds a full-width carry
+        chain: the drained value (and so value/result/result_valid) follows two cycles behind the plain
+        accumulator, and the flags, checked from the sign of every step's resolved bank, one cycle behind.
+
+        Without `drain`, there is no DrainEngine and no result/result_valid: the raw `value` goes to a shared
+        drain (see shared_drain.SharedDrain)."""
+        assert width >= BF16_MANTISSA_BITS + 3  # implicit 1 + mantissa + guard + round
+        self.width = width
+        self.lsb_exp = lsb_exp
+        self.split_drain = split_drain
+        self.carry_save = carry_save
+        self.adder = adder
+        self.drain = drain
+
+        members = {
+            "addend": In(signed(width)),
+            "addend_dropped": In(1),  # this addend was an out-of-window product forced to 0
+            "addend_overflow": In(1),  # this addend (a dot-product group sum) already left the signed range
+            "acc_sel": In(range(ACC_BANKS)),  # bank targeted by load/enable and read by value/result/flags
+            "load": In(1),
+            "enable": In(1),
+            "value": Out(signed(width)),
+            "any_dropped": Out(1),  # sticky: some addend in this accumulation was dropped
+            "any_overflow": Out(1),  # sticky: the accumulator wrapped past signed range
+        }
+        if drain:
+            members["result"] = Out(BFloat16)
+            members["result_valid"] = Out(1)
+        if split_drain:
+            members["drain_sel"] = In(range(ACC_BANKS))  # bank read by value/result/flags
+        super().__init__(members)
 
     def elaborate(self, platform: Platform | None) -> Module:
         m = Module()
 
-        acc_bank = Array(Signal(signed(self.width), name=f"acc{n}") for n in range(ACC_BANKS))
         dropped_bank = Array(Signal(name=f"dropped{n}") for n in range(ACC_BANKS))
+        wrapped_bank = Array(Signal(name=f"wrapped{n}") for n in range(ACC_BANKS))
         overflow_bank = Array(Signal(name=f"overflow{n}") for n in range(ACC_BANKS))
+        drain_sel = self.drain_sel if self.split_drain else self.acc_sel
+
+        with m.If(self.load):
+            m.d.sync += dropped_bank[self.acc_sel].eq(self.addend_dropped)
+            m.d.sync += wrapped_bank[self.acc_sel].eq(self.addend_overflow)
+        with m.Elif(self.enable):
+            m.d.sync += dropped_bank[self.acc_sel].eq(dropped_bank[self.acc_sel] | self.addend_dropped)
+            m.d.sync += wrapped_bank[self.acc_sel].eq(wrapped_bank[self.acc_sel] | self.addend_overflow)
+
+        dropped, wrapped, idle = dropped_bank[drain_sel], wrapped_bank[drain_sel], ~(self.load | self.enable)
+        if self.carry_save:
+            drained, overflowed = self.carry_save_banks(m, overflow_bank, drain_sel)
+            # flags trail by one cycle and the drained value by two, all alike
+            dropped_r, wrapped_r, idle_r, idle_rr = Signal(), Signal(), Signal(), Signal()
+            m.d.sync += [dropped_r.eq(dropped), wrapped_r.eq(wrapped), idle_r.eq(idle), idle_rr.eq(idle_r)]
+            dropped, wrapped, idle = dropped_r, wrapped_r, idle_rr
+        else:
+            drained, overflowed = self.carry_propagate_banks(m, overflow_bank, drain_sel)
+        m.d.comb += self.value.eq(drained)
+        m.d.comb += self.any_dropped.eq(dropped)
+        m.d.comb += self.any_overflow.eq(overflowed | wrapped)
+
+        if self.drain:
+            m.submodules.drain = drain = DrainEngine(self.width, self.lsb_exp)
+            m.d.comb += drain.value.eq(drained)
+            m.d.comb += self.result.eq(drain.result)
+            m.d.sync += self.result_valid.eq(idle)
+
+        return m
+
+    def carry_propagate_banks(self, m: Module, overflow_bank: Array, drain_sel: Value) -> tuple[Signal, Value]:
+        acc_bank = Array(Signal(signed(self.width), name=f"acc{n}") for n in range(ACC_BANKS))
 
         acc = Signal(signed(self.width))
         m.d.comb += acc.eq(acc_bank[self.acc_sel])
-        acc_next = Signal(signed(self.width + 1))
-        m.d.comb += acc_next.eq(acc + self.addend)
+        acc_next = add_signed(m, acc, self.addend, self.adder, "acc_next")
         overflow = Signal()
         m.d.comb += overflow.eq(acc_next[self.width] != acc_next[self.width - 1])
 
         with m.If(self.load):
             m.d.sync += acc_bank[self.acc_sel].eq(self.addend)
-            m.d.sync += dropped_bank[self.acc_sel].eq(self.addend_dropped)
             m.d.sync += overflow_bank[self.acc_sel].eq(0)
         with m.Elif(self.enable):
             m.d.sync += acc_bank[self.acc_sel].eq(acc_next[: self.width])
-            m.d.sync += dropped_bank[self.acc_sel].eq(dropped_bank[self.acc_sel] | self.addend_dropped)
             m.d.sync += overflow_bank[self.acc_sel].eq(overflow_bank[self.acc_sel] | overflow)
-        m.d.comb += self.value.eq(acc)
-        m.d.comb += self.any_dropped.eq(dropped_bank[self.acc_sel])
-        m.d.comb += self.any_overflow.eq(overflow_bank[self.acc_sel])
 
-        # drain_latch splits the drain across a register so the normalize+round runs the cycle
-        # after acc settles, keeping it off the per-cycle MAC critical path (Fmax).
-        drain_latch = Signal(decomposed_layout(self.width))
-        m.d.sync += drain_latch.eq(decompose(m, acc))
-        m.d.comb += self.result.eq(round_to_bf16(m, drain_latch, self.lsb_exp))
-        m.d.sync += self.result_valid.eq(~(self.load | self.enable))
-
-        return m
+        drained = Signal(signed(self.width))
+        m.d.comb += drained.eq(acc_bank[drain_sel] if self.split_drain else acc)
+        return drained, overflow_bank[drain_sel]
+
+    def carry_save_banks(self, m: Module, overflow_bank: Array, drain_sel: Value) -> tuple[Signal, Value]:
+        width, half = self.width, self.width // 2
+        sum_bank = Array(Signal(width, name=f"sum{n}") for n in range(ACC_BANKS))
+        carry_bank = Array(Signal(width, name=f"carry{n}") for n in range(ACC_BANKS))
+        sign_bank = Array(Signal(name=f"sign{n}") for n in range(ACC_BANKS))  # sign of the resolved bank
+
+        def resolve_low(sel: Value, name: str) -> data.View:
+            """Segmented resolve of bank `sel`, first cycle: the low half's sum and carry out, registered with
+            the high halves."""
+            layout = {"low": half, "carry": 1, "sum_high": width - half, "carry_high": width - half}
+            stage = Signal(data.StructLayout(layout), name=name)
+            low = add(m, sum_bank[sel][:half], carry_bank[sel][:half], self.adder, f"{name}_add")
+            m.d.sync += stage.low.eq(low[:half])
+            m.d.sync += stage.carry.eq(low[half])
+            m.d.sync += stage.sum_high.eq(sum_bank[sel][half:])
+            m.d.sync += stage.carry_high.eq(carry_bank[sel][half:])
+            return stage
+
+        def resolve_high(stage: data.View, name: str) -> Value:
+            """Second cycle: the high half, its carry in riding below both operands."""
+            high = add(
+                m, Cat(stage.carry, stage.sum_high), Cat(stage.carry, stage.carry_high), self.adder, f"{name}_add"
+            )
+            return Cat(stage.low, high[1 : width - half + 1])
+
+        s, c, addend = sum_bank[self.acc_sel], carry_bank[self.acc_sel], self.addend.as_unsigned()
+        with m.If(self.load):
+            m.d.sync += s.eq(addend)
+            m.d.sync += c.eq(0)
+        with m.Elif(self.enable):
+            m.d.sync += s.eq(s ^ c ^ addend)
+            m.d.sync += c.eq(((s & c) | (s & addend) | (c & addend)) << 1)
+
+        # every step's bank resolves over the two cycles after its update, in step order, so the check of a
+        # step finds the bank's previous sign already in sign_bank and compares it with the new one
+        step_layout = data.StructLayout({"valid": 1, "load": 1, "bank": range(ACC_BANKS), "addend_sign": 1})
+        step, check = Signal(step_layout), Signal(step_layout)
+        m.d.sync += step.valid.eq(self.load | self.enable)
+        m.d.sync += step.load.eq(self.load)
+        m.d.sync += step.bank.eq(self.acc_sel)
+        m.d.sync += step.addend_sign.eq(self.addend[width - 1])
+        m.d.sync += check.eq(step)
+        check_sign = Signal()
+        m.d.comb += check_sign.eq(resolve_high(resolve_low(step.bank, "check_low"), "check_high")[width - 1])
+        prev_sign = sign_bank[check.bank]
+        overflow = Signal()
+        m.d.comb += overflow.eq(
+            check.valid & ~check.load & (prev_sign == check.addend_sign) & (check_sign != prev_sign)
+        )
+        with m.If(check.valid):
+            m.d.sync += sign_bank[check.bank].eq(check_sign)
+            m.d.sync += overflow_bank[check.bank].eq(~check.load & (overflow_bank[check.bank] | overflow))
+
+        # the drained bank resolves over two cycles too; the flags trail the update by one, like the check
+        drained = Signal(signed(width))
+        m.d.sync += drained.eq(resolve_high(resolve_low(drain_sel, "drain_low"), "drain_high"))
+        flag_sel = Signal.like(drain_sel)
+        m.d.sync += flag_sel.eq(drain_sel)
+        checked = check.valid & (check.bank == flag_sel)
+        return drained, Mux(checked & check.load, 0, overflow_bank[flag_sel]) | (checked & overflow)
@@ -0,0 +1,71 @@
+"""Selectable architecture for the wide adds on the accumulate path, so the same design can be mapped onto
+the synthesis tool's carry chain or onto one of the repo's explicit carry networks."""
+
+from typing import NamedTuple
+
+from amaranth import *
+
+from carry_select_adder import CarrySelectAdder
+from parallel_prefix import BrentKungAdder, KoggeStoneAdder, SklanskyAdder
+
+KINDS = ("native", "carry_select", "kogge_stone", "brent_kung", "sklansky")
+
+
+class Adder(NamedTuple):
+    kind: str = "native"  # native leaves `+` to the tool (the ECP5 CCU2C carry chain)
+    block_size: int = 6  # carry_select only
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}{self.block_size}" if self.kind == "carry_select" else self.kind
+
+
+def add(m: Module, a: Value, b: Value, adder: Adder, name: str) -> Signal:
+    """Unsigned a + b (equal widths) with its carry out on top."""
+    assert adder.kind in KINDS, adder.kind
+    width = len(a)
+    total = Signal(width + 1, name=name)
+    if adder.kind == "native":
+        m.d.comb += total.eq(a + b)
+        return total
+    if adder.kind == "carry_select":
+        unit = CarrySelectAdder(width, adder.block_size)
+    else:
+        unit = {"kogge_stone": KoggeStoneAdder, "brent_kung": BrentKungAdder, "sklansky": SklanskyAdder}[adder.kind](
+            width
+        )
+    m.submodules[name] = unit
+    m.d.comb += unit.a.eq(a)
+    m.d.comb += unit.b.eq(b)
+    m.d.comb += unit.carry_in.eq(0)
+    m.d.comb += total.eq(Cat(unit.sum, unit.carry_out))
+    return total
+
+
+def add_signed(m: Module, a: Value, b: Value, adder: Adder, name: str) -> Signal:
+    """Signed a + b (equal widths), one bit wider so the caller can see it leave the signed range."""
+    total = add(m, Cat(a, a[-1]), Cat(b, b[-1]), adder, name)
+    out = Signal(signed(len(a) + 1), name=f"{name}_signed")
+    m.d.comb += out.eq(total[: len(a) + 1])
+    return out
+
+
+def add_many(m: Module, terms: list[Value], adder: Adder, name: str) -> Signal:
+    """Signed sum of `terms` (equal widths), wide enough to be exact: a tree of 3:2 compressors down to two
+    terms, then one `adder` add."""
+    width = len(terms[0]) + (len(terms) - 1).bit_length()
+    rows = [Cat(t, t[-1].replicate(width - len(t))) for t in terms]
+    level = 0
+    while len(rows) > 2:
+        s, c, x = rows[0], rows[1], rows[2]
+        total, carry = Signal(width, name=f"{name}_s{level}"), Signal(width, name=f"{name}_c{level}")
+        m.d.comb += total.eq(s ^ c ^ x)
+        m.d.comb += carry.eq(((s & c) | (s & x) | (c & x)) << 1)
+        rows = [*rows[3:], total, carry]
+        level += 1
+    out = Signal(signed(width), name=name)
+    if len(rows) == 1:
+        m.d.comb += out.eq(rows[0])
+    else:
+        m.d.comb += out.eq(add(m, rows[0], rows[1], adder, f"{name}_add")[:width])
+    return out
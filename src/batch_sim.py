@@ -0,0 +1,175 @@
+"""Batch simulation harness: elaborate FixedPE / MMA / MMAUnit once and stream a whole batch of operand sets
+back-to-back through a single amaranth.sim Simulator, then diff against the golden model."""
+
+import time
+from typing import NamedTuple
+
+import numpy as np
+from amaranth.hdl import Period
+from amaranth.sim import Simulator
+
+import golden
+from adder import Adder
+from fixed_pe import FixedPE, lane_operands
+from gemm import batch_schedule, run_sim
+from mma import MMA
+from mma_stream import N
+from systolic_mma import SystolicMMA
+
+
+class BatchResult(NamedTuple):
+    bits: np.ndarray  # bf16 result bits, one entry (FixedPE) or tile (MMA, MMAUnit) per vector
+    dropped: np.ndarray  # bool per vector: the DUT's any_dropped
+    overflow: np.ndarray  # bool per vector: the DUT's any_overflow
+    cycles: int  # simulated clock cycles for the whole batch
+    sim_s: float = 0.0  # wall seconds stepping the simulation, excluding elaboration
+
+
+def run(dut, bench, vcd: str | None = None) -> float:
+    """Simulate `bench` against `dut`; returns the wall seconds of the stepping alone."""
+    sim = Simulator(dut)
+    sim.add_clock(Period(us=1))
+    sim.add_testbench(bench)
+    if vcd:
+        with sim.write_vcd(vcd):
+            start = time.perf_counter()
+            sim.run()
+    else:
+        start = time.perf_counter()
+        sim.run()
+    return time.perf_counter() - start
+
+
+def simulate_fixed_pe(
+    a: np.ndarray,
+    b: np.ndarray,
+    vcd: str | None = None,
+    carry_save: bool = False,
+    adder: Adder = Adder(),
+    pipeline_stages: int = 1,
+    lanes: int = 1,
+) -> BatchResult:
+    """a, b: (B, K) bf16 bits. Each vector loads on its first pair and accumulates the rest; vectors stream
+    with no gap, reading flags two cycles and the drained result three cycles after a vector's last pair
+    (plus the PE's extra pipeline stages, and the carry-save PE's one and two cycles of lag), before the next
+    vector's load lands over them. With `lanes`, the PE takes that many pairs per cycle (K a multiple of
+    lanes)."""
+    batch, k = a.shape
+    k //= lanes
+    dut = FixedPE(carry_save=carry_save, adder=adder, pipeline_stages=pipeline_stages, lanes=lanes)
+    ports = lane_operands(dut)
+    bits = np.zeros(batch, dtype=np.uint16)
+    dropped = np.zeros(batch, dtype=bool)
+    overflow = np.zeros(batch, dtype=bool)
+    a_flat, b_flat = a.reshape(-1, lanes).tolist(), b.reshape(-1, lanes).tolist()
+    total = batch * k
+    flags_at, result_at = 1 + pipeline_stages + carry_save, 2 + pipeline_stages + 2 * carry_save
+
+    async def bench(ctx):
+        for t in range(total + result_at):
+            if t < total:
+                for (a_port, b_port), a_bits, b_bits in zip(ports, a_flat[t], b_flat[t]):
+                    ctx.set(a_port.as_value(), a_bits)
+                    ctx.set(b_port.as_value(), b_bits)
+                ctx.set(dut.load, t % k == 0)
+                ctx.set(dut.enable, t % k != 0)
+            else:
+                ctx.set(dut.load, 0)
+                ctx.set(dut.enable, 0)
+            if flags_at <= t < total + flags_at and (t - flags_at) % k == k - 1:
+                dropped[(t - flags_at) // k] = ctx.get(dut.any_dropped)
+                overflow[(t - flags_at) // k] = ctx.get(dut.any_overflow)
+            if t >= result_at and (t - result_at) % k == k - 1:
+                bits[(t - result_at) // k] = ctx.get(dut.result.as_value())
+            await ctx.tick()
+
+    sim_s = run(dut, bench, vcd)
+    return BatchResult(bits, dropped, overflow, total + result_at, sim_s)
+
+
+def simulate_mma(
+    a: np.ndarray,
+    b: np.ndarray,
+    vcd: str | None = None,
+    systolic: bool = False,
+    pipeline_stages: int = 1,
+    drain_engines: int = 0,
+    lanes: int = 1,
+) -> BatchResult:
+    """a: (B, rows, depth), b: (B, depth, cols) bf16 bits (N x N x N by default), one start/done handshake per
+    vector on an MMA (or SystolicMMA) of that shape."""
+    batch, rows, depth = a.shape
+    cols = b.shape[2]
+    if systolic:
+        dut = SystolicMMA(rows, cols, depth)
+    else:
+        dut = MMA(rows, cols, depth, pipeline_stages=pipeline_stages, drain_engines=drain_engines, lanes=lanes)
+    bits = np.zeros((batch, rows, cols), dtype=np.uint16)
+    dropped = np.zeros(batch, dtype=bool)
+    overflow = np.zeros(batch, dtype=bool)
+    cycles = 0
+
+    async def bench(ctx):
+        nonlocal cycles
+        for v in range(batch):
+            for idx, a_bits in enumerate(a[v].reshape(-1).tolist()):
+                ctx.set(dut.a_matrix[idx].as_value(), a_bits)
+            for idx, b_bits in enumerate(b[v].reshape(-1).tolist()):
+                ctx.set(dut.b_matrix[idx].as_value(), b_bits)
+            ctx.set(dut.start, 1)
+            await ctx.tick()
+            ctx.set(dut.start, 0)
+            cycles += 1
+            while not ctx.get(dut.done):
+                await ctx.tick()
+                cycles += 1
+            bits[v] = np.array([ctx.get(d.as_value()) for d in dut.d_matrix]).reshape(rows, cols)
+            dropped[v] = ctx.get(dut.any_dropped)
+            overflow[v] = ctx.get(dut.any_overflow)
+            await ctx.tick()  # back to IDLE
+            cycles += 1
+
+    sim_s = run(dut, bench, vcd)
+    return BatchResult(bits, dropped, overflow, cycles, sim_s)
+
+
+def simulate_mma_unit(a, b, vcd: str | None = None) -> tuple[BatchResult, list[int]]:
+    """a: B x (N, K) and b: B x (K, N) bf16 bits (K a multiple of N, up to MAX_KBLOCKS k-blocks, may vary per
+    vector), one non-accumulating evicting op each through one MMAUnit. Also returns each op's cycle count."""
+    schedule = batch_schedule(a, b)
+    trace: list[tuple] = []
+    result = run_sim(schedule, trace=trace, vcd=vcd)
+
+    flags = [sample[-1] for sample in trace if sample[-1] is not None]
+    done_at = [cycle for cycle, sample in enumerate(trace) if sample[-1] is not None]
+    op_cycles = np.diff([-1, *done_at]).tolist()  # done -> IDLE -> start is one trace gap per op
+    bits = result.d_bits.reshape(len(schedule.steps), N, N)
+    dropped = np.array([f[0] for f in flags], dtype=bool)
+    overflow = np.array([f[1] for f in flags], dtype=bool)
+    return BatchResult(bits, dropped, overflow, result.cycles, result.sim_s), op_cycles
+
+
+def mismatches(got: BatchResult, a, b, lanes: int = 1) -> list[int]:
+    """Indices of vectors whose result bits or flags differ from the golden model (MMA/MMAUnit flags are the
+    OR over the tile's PEs). `lanes` is the DUT's PE lanes. A stacked batch goes through golden in one call;
+    lists of differently shaped vectors (MMAUnit with mixed K) in one call per shape."""
+    if isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
+        groups = [(np.arange(len(a)), a, b)]
+    else:
+        by_shape: dict[tuple, list[int]] = {}
+        for v, (a_v, b_v) in enumerate(zip(a, b)):
+            by_shape.setdefault((np.shape(a_v), np.shape(b_v)), []).append(v)
+        groups = [
+            (np.array(idx), np.stack([a[v] for v in idx]), np.stack([b[v] for v in idx])) for idx in by_shape.values()
+        ]
+    bad = np.zeros(len(got.bits), dtype=bool)
+    for idx, a_s, b_s in groups:
+        if a_s.ndim == 2:  # FixedPE: one dot product per vector
+            a_s, b_s = a_s[:, None, :], b_s[:, :, None]
+        bits, dropped, overflow = golden.matmul(a_s, b_s, lanes)
+        bad[idx] = (
+            (got.bits[idx].reshape(len(idx), -1) != bits.reshape(len(idx), -1)).any(axis=1)
+            | (got.dropped[idx] != dropped.reshape(len(idx), -1).any(axis=1))
+            | (got.overflow[idx] != overflow.reshape(len(idx), -1).any(axis=1))
+        )
+    return np.flatnonzero(bad).tolist()
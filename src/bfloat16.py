@@ -1,5 +1,6 @@
 import struct
 
+import numpy as np
 from amaranth import *
 from amaranth.lib import data
 
@@ -47,3 +48,40 @@ class BF16:
     def pack(cls, sign: int, exp: int, mant: int):
         bits = (sign << 15) | (exp << 7) | mant
         return cls(bits)
+
+
+# Array codec: the same bit layout as BF16, applied to whole ndarrays through uint32 views of float32.
+
+
+def bits_from_float(x) -> np.ndarray:
+    """Truncate to bf16 bits (uint16), like BF16.from_float."""
+    fp32_bits = np.asarray(x, dtype=np.float32).view(np.uint32)
+    return (fp32_bits >> 16).astype(np.uint16)
+
+
+def bits_from_float_rtne(x) -> np.ndarray:
+    """Round to bf16 bits (uint16) to-nearest-even, matching the Rounder hardware. Inf/NaN keep their
+    class: infinities truncate, NaNs stay quiet NaNs."""
+    fp32_bits = np.asarray(x, dtype=np.float32).view(np.uint32)
+    high = fp32_bits >> 16
+    rounded = (fp32_bits + np.uint32(0x7FFF) + (high & 1)) >> 16
+    special = (fp32_bits & 0x7F800000) == 0x7F800000
+    nan = special & ((fp32_bits & 0x007FFFFF) != 0)
+    out = np.where(special, high | np.where(nan, np.uint32(0x40), np.uint32(0)), rounded)
+    return out.astype(np.uint16)
+
+
+def bits_to_float(bits, dtype=np.float32) -> np.ndarray:
+    """Widen bf16 bits to float32 (exact), then to `dtype`."""
+    fp32_bits = np.asarray(bits, dtype=np.uint16).astype(np.uint32) << 16
+    return fp32_bits.view(np.float32).astype(dtype, copy=False)
+
+
+def unpack_bits(bits) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    bits = np.asarray(bits, dtype=np.uint16)
+    return (bits >> 15) & 0x1, (bits >> 7) & 0xFF, bits & 0x7F
+
+
+def pack_bits(sign, exp, mant) -> np.ndarray:
+    sign, exp, mant = (np.asarray(v, dtype=np.uint16) for v in (sign, exp, mant))
+    return (sign << 15) | (exp << 7) | mant
@@ -0,0 +1,191 @@
+"""Compiled CXXRTL simulation backend. The design is converted to RTLIL, turned into C++ by Yosys
+`write_cxxrtl`, compiled into a shared library with the system C++ compiler together with the CXXRTL C API,
+and driven through ctypes. Libraries live in tool_cache, keyed on the RTLIL, the Yosys and compiler versions
+and the flags, so an unchanged design pays the compile once.
+
+`CxxrtlSim` exposes the DUT's top-level ports as attributes plus `tick()`, the same surface as MMAUnitModel,
+so host loops written against one drive the other."""
+
+import ctypes
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+from amaranth.back import rtlil
+from amaranth.lib import wiring
+
+import tool_cache
+from tool_cache import CACHE_ROOT, design_text, tool_version
+
+try:
+    # Amaranth has no public API to locate its (builtin or system) Yosys; this is the private one its own
+    # back-ends use. On a version that moved it, available() is False and yosys() raises this error.
+    from amaranth._toolchain.yosys import YosysError, find_yosys
+
+    TOOLCHAIN_IMPORT_ERROR = None
+except ImportError as error:
+    TOOLCHAIN_IMPORT_ERROR = error
+
+CXX = os.environ.get("CXX", "c++")
+CXXFLAGS = ["-std=c++14", "-O1", "-shared", "-fPIC"]
+TOP = "top"
+LIBRARY = "design.so"
+
+
+class CxxrtlBuildError(RuntimeError):
+    """The C++ compiler rejected the design Yosys' write_cxxrtl produced; `stderr` holds its diagnostics."""
+
+    def __init__(self, returncode: int, stderr: str):
+        super().__init__(f"{CXX} exited with {returncode} building the CXXRTL library:\n{stderr}")
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class CxxrtlObject(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("width", ctypes.c_size_t),
+        ("lsb_at", ctypes.c_size_t),
+        ("depth", ctypes.c_size_t),
+        ("zero_at", ctypes.c_size_t),
+        ("curr", ctypes.POINTER(ctypes.c_uint32)),
+        ("next", ctypes.POINTER(ctypes.c_uint32)),
+        ("outline", ctypes.c_void_p),
+        ("attrs", ctypes.c_void_p),
+    ]
+
+
+def yosys():
+    if TOOLCHAIN_IMPORT_ERROR is not None:
+        raise ImportError(
+            "cxxrtl_sim needs amaranth._toolchain.yosys (find_yosys, YosysError), private Amaranth API that this "
+            "Amaranth version does not provide; update yosys() and available() for it"
+        ) from TOOLCHAIN_IMPORT_ERROR
+    return find_yosys(lambda version: version >= (0, 40))
+
+
+def available() -> bool:
+    """Whether a Yosys with write_cxxrtl and a C++ compiler are both present."""
+    if TOOLCHAIN_IMPORT_ERROR is not None:
+        return False
+    try:
+        yosys()
+    except YosysError:
+        return False
+    return shutil.which(CXX) is not None
+
+
+def runtime_include() -> Path:
+    return Path(yosys().data_dir()) / "include" / "backends" / "cxxrtl" / "runtime"
+
+
+def build(dut: wiring.Component, cache_root: Path = CACHE_ROOT) -> Path:
+    """Return the path of the compiled shared library for `dut`, building it on a cache miss."""
+    il = rtlil.convert(dut, name=TOP)
+    entry_key = tool_cache.key(
+        design_text(il), str(yosys().version()), tool_version(CXX, "--version"), " ".join(CXXFLAGS)
+    )
+    entry = tool_cache.lookup("cxxrtl", entry_key, cache_root)
+    if entry is None:
+        cc = yosys().run(["-q", "-"], f"read_rtlil <<rtlil\n{il}\nrtlil\nwrite_cxxrtl\n", ignore_warnings=True)
+        include = runtime_include()
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "design.cc"
+            source.write_text(cc)
+            lib = Path(tmp) / LIBRARY
+            result = subprocess.run(
+                [CXX, *CXXFLAGS, f"-I{include}", str(source), str(include / "cxxrtl" / "capi" / "cxxrtl_capi.cc")]
+                + ["-o", str(lib)],
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode != 0:
+                raise CxxrtlBuildError(result.returncode, result.stderr)
+            entry = tool_cache.store("cxxrtl", entry_key, {LIBRARY: lib}, cache_root)
+    return entry / LIBRARY
+
+
+def port_names(dut: wiring.Component) -> list[str]:
+    """Top-level port names as RTLIL spells them: array members flatten to `name__index`."""
+    names = []
+    for path, member in dut.signature.members.flatten():
+        if member.is_port:
+            names.append("__".join(str(part) for part in path))
+    return names
+
+
+class CxxrtlSim:
+    def __init__(self, dut: wiring.Component, cache_root: Path = CACHE_ROOT):
+        lib = ctypes.CDLL(str(build(dut, cache_root)))
+        lib.cxxrtl_design_create.restype = ctypes.c_void_p
+        lib.cxxrtl_create.restype = ctypes.c_void_p
+        lib.cxxrtl_create.argtypes = [ctypes.c_void_p]
+        lib.cxxrtl_get_parts.restype = ctypes.POINTER(CxxrtlObject)
+        lib.cxxrtl_get_parts.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.POINTER(ctypes.c_size_t)]
+        for fn in ("cxxrtl_step", "cxxrtl_reset", "cxxrtl_destroy"):
+            getattr(lib, fn).argtypes = [ctypes.c_void_p]
+        handle = lib.cxxrtl_create(lib.cxxrtl_design_create())
+
+        ports = {}
+        for name in [*port_names(dut), "clk", "rst"]:
+            parts = ctypes.c_size_t(0)
+            obj = lib.cxxrtl_get_parts(handle, name.encode(), ctypes.byref(parts))
+            if obj:
+                ports[name] = obj.contents
+        state = {"lib": lib, "handle": handle, "ports": ports, "dirty": True, "cycle": 0, "callbacks": []}
+        object.__setattr__(self, "_state", state)
+        lib.cxxrtl_reset(handle)
+
+    @property
+    def cycle(self) -> int:
+        return self._state["cycle"]
+
+    def get(self, name: str) -> int:
+        state = self._state
+        if state["dirty"]:
+            state["lib"].cxxrtl_step(state["handle"])
+            state["dirty"] = False
+        obj = state["ports"][name]
+        value = 0
+        for chunk in range((obj.width + 31) // 32):
+            value |= obj.curr[chunk] << (32 * chunk)
+        return value
+
+    def set(self, name: str, value: int) -> None:
+        obj = self._state["ports"][name]
+        value = int(value) & ((1 << obj.width) - 1)
+        for chunk in range((obj.width + 31) // 32):
+            obj.next[chunk] = (value >> (32 * chunk)) & 0xFFFFFFFF
+        self._state["dirty"] = True
+
+    def __getattr__(self, name: str) -> int:
+        if name in self._state["ports"]:
+            return self.get(name)
+        raise AttributeError(name)
+
+    def __setattr__(self, name: str, value: int) -> None:
+        self.set(name, value)
+
+    def on_cycle(self, callback: Callable[["CxxrtlSim"], None]) -> None:
+        """Call `callback(sim)` with inputs settled just before every rising edge (e.g. to serve memory)."""
+        self._state["callbacks"].append(callback)
+
+    def tick(self) -> None:
+        state = self._state
+        for callback in state["callbacks"]:
+            callback(self)
+        self.set("clk", 1)
+        state["lib"].cxxrtl_step(state["handle"])
+        self.set("clk", 0)
+        state["lib"].cxxrtl_step(state["handle"])
+        state["dirty"] = False
+        state["cycle"] += 1
+
+    def __del__(self):
+        state = self.__dict__.get("_state")
+        if state:
+            state["lib"].cxxrtl_destroy(state["handle"])
@@ -0,0 +1,145 @@
+"""NumPy-backed model of the D-SRAM MMAUnit reads through rd_addr_a / rd_addr_b and writes through wr_addr /
+wr_data: one tile of bf16 bits per slot, laid out as the unit's Geometry packs it, with bulk tile staging from float or bit arrays, a configurable read
+latency, per-port access counters and bank-conflict accounting.
+
+`serve(unit)` is the per-cycle hook for anything with MMAUnit's ports as attributes (MMAUnitModel, SimPorts,
+CxxrtlSim): it drives rd_data from the address presented `read_latency` cycles earlier and commits a write
+on wr_en. A port counts a read (and a bank access) in the cycles the unit strobes rd_en_a / rd_en_b, the
+cycles it latches a fresh tile; any other cycle the output just holds. MMAUnit latches the tile one cycle
+after presenting its address and holds that address across the whole k-block, so it tolerates a read
+latency of up to one cycle (a registered-output block RAM)."""
+
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+
+from bfloat16 import bits_from_float, bits_to_float
+from mma_model import tile_to_word, word_to_tile
+from mma_stream import Geometry
+from sparse import compress, expand
+
+PORTS = ("a", "b")
+
+
+class Traffic(NamedTuple):
+    reads: dict[str, int]  # tile reads per port
+    writes: int  # tiles written through wr_en
+    staged: int  # tiles the host wrote directly (load_* / stage)
+    conflicts: int  # accesses beyond ports_per_bank to one bank in one cycle
+    tile_bits: int = Geometry().tile_bits  # port width
+    a_bits: int | None = None  # bits of an A read, when less than tile_bits (2:4-compressed A)
+
+    @property
+    def read_bytes(self) -> int:
+        a_bits = self.tile_bits if self.a_bits is None else self.a_bits
+        return (self.reads["a"] * a_bits + self.reads["b"] * self.tile_bits) // 8
+
+    @property
+    def write_bytes(self) -> int:
+        return self.writes * self.tile_bits // 8
+
+
+class DSRAM:
+    def __init__(self, geometry: Geometry = Geometry(), read_latency: int = 0, banks: int = 1, ports_per_bank: int = 2):
+        """`banks` interleave slots by address (slot % banks); each bank serves `ports_per_bank` accesses per
+        cycle (2 for a true dual-port block RAM) and any beyond that count as conflicts. `data` holds each slot
+        as its flat, zero-padded word of geometry.elems bf16 values."""
+        assert read_latency >= 0 and banks >= 1 and ports_per_bank >= 1
+        self.geometry = geometry
+        self.data = np.zeros((geometry.slots, geometry.elems), dtype=np.uint16)
+        self.read_latency = read_latency
+        self.banks = banks
+        self.ports_per_bank = ports_per_bank
+        self.reads = dict.fromkeys(PORTS, 0)
+        self.writes = 0
+        self.staged = 0
+        self.conflicts = 0
+        self._in_flight = {port: deque([0] * read_latency) for port in PORTS}
+
+    @property
+    def slots(self) -> int:
+        return len(self.data)
+
+    # host side: bulk staging, no port accounting beyond `staged`
+
+    def words(self, tiles: np.ndarray) -> np.ndarray:
+        """(T, ...) tiles of any of the geometry's shapes -> (T, elems) slot contents."""
+        words = np.zeros((len(tiles), self.geometry.elems), dtype=np.uint16)
+        for word, tile in zip(words, tiles):
+            flat = np.asarray(tile, dtype=np.uint16).reshape(-1)
+            word[: len(flat)] = flat
+        return words
+
+    def stage(self, loads: dict[int, np.ndarray]) -> None:
+        """Write {slot: tile bits} in one scatter."""
+        if loads:
+            self.data[list(loads)] = self.words(list(loads.values()))
+            self.staged += len(loads)
+
+    def load_tiles(self, slot: int, tiles: np.ndarray) -> None:
+        """Write T tiles to T consecutive slots starting at `slot` (wrapping, like rd_addr does)."""
+        self.data[(slot + np.arange(len(tiles))) % self.slots] = self.words(tiles)
+        self.staged += len(tiles)
+
+    def load_a(self, slot: int, a: np.ndarray) -> None:
+        """Stage a (rows, depth*kblocks) float A operand as kblocks consecutive tiles, k-block by k-block
+        (compressed with geometry.sparse_a)."""
+        rows, depth = self.geometry.a_shape
+        tiles = bits_from_float(np.asarray(a)).reshape(rows, -1, depth).swapaxes(0, 1)
+        self.load_tiles(slot, compress(tiles) if self.geometry.sparse_a else tiles)
+
+    def load_b(self, slot: int, b: np.ndarray) -> None:
+        """Stage a (depth*kblocks, cols) float B operand as kblocks consecutive tiles."""
+        self.load_tiles(slot, bits_from_float(np.asarray(b)).reshape(-1, *self.geometry.b_shape))
+
+    def tile(self, slot: int) -> np.ndarray:
+        """The C tile in `slot`."""
+        rows, cols = self.geometry.c_shape
+        return self.data[slot % self.slots, : rows * cols].reshape(rows, cols).copy()
+
+    def tile_float(self, slot: int) -> np.ndarray:
+        return bits_to_float(self.tile(slot), np.float64)
+
+    # port side: counted accesses
+
+    def read_tiles(self, port: str, slot: int, count: int, shape: tuple[int, int] | None = None) -> np.ndarray:
+        """Transaction-level read of `count` consecutive tiles through `port`, one access each: A (expanded
+        with geometry.sparse_a) or B tiles (by port), or of `shape`."""
+        self.reads[port] += count
+        if shape is None and port == "a" and self.geometry.sparse_a:
+            words = self.data[(slot + np.arange(count)) % self.slots]
+            return expand(words[:, : self.geometry.a_bits // 16], self.geometry.a_shape)
+        if shape is None:
+            shape = self.geometry.a_shape if port == "a" else self.geometry.b_shape
+        words = self.data[(slot + np.arange(count)) % self.slots]
+        return words[:, : shape[0] * shape[1]].reshape(count, *shape)
+
+    def write_tile(self, slot: int, tile: np.ndarray) -> None:
+        self.writes += 1
+        self.data[slot % self.slots] = self.words(tile[None])[0]
+
+    def serve(self, unit) -> None:
+        """One cycle of MMAUnit's memory ports: call with the cycle's inputs settled, before the clock edge."""
+        bank_use = [0] * self.banks
+        for port in PORTS:
+            addr = getattr(unit, f"rd_addr_{port}")
+            if getattr(unit, f"rd_en_{port}"):
+                self.reads[port] += 1
+                bank_use[addr % self.banks] += 1
+            word = tile_to_word(self.data[addr % self.slots])
+            if self.read_latency:
+                self._in_flight[port].append(word)
+                word = self._in_flight[port].popleft()
+            setattr(unit, f"rd_data_{port}", word)
+        if unit.wr_en:
+            addr = unit.wr_addr
+            bank_use[addr % self.banks] += 1
+            self.writes += 1
+            self.data[addr % self.slots] = word_to_tile(unit.wr_data, (self.geometry.elems,))
+        self.conflicts += sum(max(0, use - self.ports_per_bank) for use in bank_use)
+
+    def traffic(self) -> Traffic:
+        geometry = self.geometry
+        a_bits = geometry.a_bits if geometry.a_bits < geometry.tile_bits else None
+        return Traffic(dict(self.reads), self.writes, self.staged, self.conflicts, geometry.tile_bits, a_bits)
@@ -0,0 +1,154 @@
+"""Fused evict epilogue: act(scale * acc + c) on an extended fixed-point grid, then the single round_to_bf16.
+golden.epilogue is its bit-exact mirror."""
+
+import math
+
+from amaranth import *
+from amaranth.build import Platform
+from amaranth.lib import enum, wiring
+from amaranth.lib.wiring import In, Out
+
+from accumulator import decompose, decomposed_layout, round_to_bf16
+from bfloat16 import BFloat16
+from fixed_pe import LSB_EXP, WIDTH
+
+EPI_WIDTH = 56  # signed grid bits at LSB_EXP (|y| < 2**23); scaled values and sums saturate to +-EPI_MAX
+EPI_MAX = (1 << (EPI_WIDTH - 1)) - 1
+EPILOGUE_LATENCY = 2  # cycles from value / c to result
+ONE = 0x3F80  # bf16 1.0: the scale with scale_en low
+BF16_GRID = 134  # 127 bias + 7 mantissa bits: a bf16 is (1.m << 7) * 2**(exponent - BF16_GRID)
+CLAMP_MAX = 6
+PWL_RANGE = 4  # GELU / SiLU are piecewise linear on [-PWL_RANGE, PWL_RANGE), 0 below and x above
+PWL_SEGMENTS = 16
+PWL_FRAC = 12  # fractional bits of a segment's slope
+SEG_SHIFT = -LSB_EXP + (2 * PWL_RANGE).bit_length() - PWL_SEGMENTS.bit_length()  # grid bits per segment
+
+
+class Activation(enum.Enum, shape=3):
+    NONE = 0
+    RELU = 1
+    CLAMP = 2  # ReLU6: clamp to [0, CLAMP_MAX]
+    GELU = 3
+    SILU = 4
+
+
+def pwl_table(act: Activation) -> list[tuple[int, int]]:
+    """(slope, intercept) per segment of GELU or SiLU: the chord through the function at the segment's ends,
+    slope with PWL_FRAC fractional bits and intercept on the grid (exact at the left end up to grid rounding)."""
+
+    def f(x: float) -> float:
+        if act == Activation.GELU:
+            return 0.5 * x * (1 + math.erf(x / math.sqrt(2)))
+        return x / (1 + math.exp(-x))
+
+    step = 2 * PWL_RANGE / PWL_SEGMENTS
+    table = []
+    for n in range(PWL_SEGMENTS):
+        x0 = -PWL_RANGE + n * step
+        slope = round((f(x0 + step) - f(x0)) / step * (1 << PWL_FRAC))
+        intercept = round(f(x0) * 2.0**-LSB_EXP) - ((slope * round(x0 * 2.0**-LSB_EXP)) >> PWL_FRAC)
+        table.append((slope, intercept))
+    return table
+
+
+def to_grid(m: Module, value: Value, shift: Value, name: str) -> Signal:
+    """value * 2**shift on the EPI_WIDTH grid: flooring right shifts, saturating left shifts."""
+    out = Signal(signed(EPI_WIDTH), name=name)
+    left = Signal(signed(len(value) + EPI_WIDTH), name=f"{name}_left")
+    m.d.comb += left.eq(value << Mux(shift > EPI_WIDTH, EPI_WIDTH, shift[:7]))
+    with m.If(shift < 0):
+        m.d.comb += out.eq(value >> Mux(-shift > len(value), len(value), (-shift)[:7]))
+    with m.Elif(left > EPI_MAX):
+        m.d.comb += out.eq(EPI_MAX)
+    with m.Elif(left < -EPI_MAX):
+        m.d.comb += out.eq(-EPI_MAX)
+    with m.Else():
+        m.d.comb += out.eq(left)
+    return out
+
+
+def signed_mantissa(m: Module, x: BFloat16, enable: Value, name: str) -> Signal:
+    """+-1.m << 7 of a bf16, 0 for a zero (or subnormal) exponent or with `enable` low."""
+    out = Signal(signed(9), name=name)
+    magnitude = Mux(enable & (x.exponent != 0), Cat(x.mantissa, C(1, 1)), 0)
+    m.d.comb += out.eq(Mux(x.sign, -magnitude, magnitude))
+    return out
+
+
+class Epilogue(wiring.Component):
+    """Drain engine with the evict epilogue in front of its round: result = bf16(act(scale * value + c)).
+
+    `value` is a raw accumulator (WIDTH bits at LSB_EXP). Stage 1 multiplies it by the bf16 `scale` (1.0 with
+    scale_en low; a power of two is a zero mantissa) and aligns the bf16 `c` (0 with add_c low), both onto
+    the EPI_WIDTH grid. Stage 2 adds them, applies `act` and decomposes into the drain latch, and the
+    result rounds out of it. A fresh set of inputs each cycle gives its result EPILOGUE_LATENCY cycles later."""
+
+    def __init__(self, width: int = WIDTH):
+        self.width = width
+        super().__init__(
+            {
+                "value": In(signed(width)),
+                "c": In(BFloat16),
+                "add_c": In(1),
+                "scale": In(BFloat16),
+                "scale_en": In(1),
+                "act": In(Activation),
+                "result": Out(BFloat16),
+            }
+        )
+
+    def elaborate(self, platform: Platform | None) -> Module:
+        m = Module()
+
+        scale = Signal(BFloat16)
+        m.d.comb += scale.as_value().eq(Mux(self.scale_en, self.scale.as_value(), ONE))
+        scale_mant = signed_mantissa(m, scale, 1, "scale_mant")
+        c_mant = signed_mantissa(m, self.c, self.add_c, "c_mant")
+        product = Signal(signed(self.width + 9))
+        m.d.comb += product.eq(self.value * scale_mant)
+        scaled = to_grid(m, product, scale.exponent - BF16_GRID, "scaled")
+        addend = to_grid(m, c_mant, self.c.exponent - BF16_GRID - LSB_EXP, "addend")
+
+        scaled_r = Signal(signed(EPI_WIDTH))
+        addend_r = Signal(signed(EPI_WIDTH))
+        act_r = Signal(Activation)
+        m.d.sync += scaled_r.eq(scaled)
+        m.d.sync += addend_r.eq(addend)
+        m.d.sync += act_r.eq(self.act)
+
+        total = Signal(signed(EPI_WIDTH + 1))
+        m.d.comb += total.eq(scaled_r + addend_r)
+        y = Signal(signed(EPI_WIDTH))
+        m.d.comb += y.eq(Mux(total > EPI_MAX, EPI_MAX, Mux(total < -EPI_MAX, -EPI_MAX, total)))
+
+        low, high = -PWL_RANGE << -LSB_EXP, PWL_RANGE << -LSB_EXP
+        segment = Signal(range(PWL_SEGMENTS))
+        m.d.comb += segment.eq((y >> SEG_SHIFT) + PWL_SEGMENTS // 2)
+        tables = {act: pwl_table(act) for act in (Activation.GELU, Activation.SILU)}
+        slope_bits = max(abs(s) for t in tables.values() for s, _ in t).bit_length() + 1
+        intercept_bits = max(abs(i) for t in tables.values() for _, i in t).bit_length() + 1
+        slope, intercept = Signal(signed(slope_bits)), Signal(signed(intercept_bits))
+        for act, table in tables.items():
+            with m.If(act_r == act):
+                m.d.comb += slope.eq(Array(C(s, signed(slope_bits)) for s, _ in table)[segment])
+                m.d.comb += intercept.eq(Array(C(i, signed(intercept_bits)) for _, i in table)[segment])
+        x = y[: SEG_SHIFT + PWL_SEGMENTS.bit_length()].as_signed()  # y in range
+        pwl = Signal(signed(EPI_WIDTH))
+        m.d.comb += pwl.eq(((x * slope) >> PWL_FRAC) + intercept)
+
+        z = Signal(signed(EPI_WIDTH))
+        with m.Switch(act_r):
+            with m.Case(Activation.RELU):
+                m.d.comb += z.eq(Mux(y < 0, 0, y))
+            with m.Case(Activation.CLAMP):
+                clamp = CLAMP_MAX << -LSB_EXP
+                m.d.comb += z.eq(Mux(y < 0, 0, Mux(y > clamp, clamp, y)))
+            with m.Case(Activation.GELU, Activation.SILU):
+                m.d.comb += z.eq(Mux(y < low, 0, Mux(y >= high, y, pwl)))
+            with m.Default():
+                m.d.comb += z.eq(y)
+
+        drain_latch = Signal(decomposed_layout(EPI_WIDTH))
+        m.d.sync += drain_latch.eq(decompose(m, z))
+        m.d.comb += self.result.eq(round_to_bf16(m, drain_latch, LSB_EXP))
+        return m
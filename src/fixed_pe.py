@@ -4,8 +4,8 @@ from amaranth.lib import wiring
 from amaranth.lib.wiring import In, Out
 
 from accumulator import Accumulator
+from adder import Adder, add, add_many
 from bfloat16 import BFloat16
-from carry_select_adder import CarrySelectAdder
 from mantissa_multiplier import MantissaMultiplier
 
 BIAS = 127
@@ -16,24 +16,40 @@ GRID_ALIGN = 2 * BIAS + PRODUCT_FRAC_BITS + LSB_EXP
 MAX_SHIFT = WIDTH - 17  # WIDTH-16 for product width, -1 for the sign bit
 
 
-def aligned_addend(m: Module, a, b):
+def aligned_addend(m: Module, a, b, stages: int = 1):
     """Return (addend, dropped): a*b as a signed fixed-point addend on the LSB_EXP-weighted grid,
-    and a flag that the (non-zero) product fell outside the alignment window and was forced to 0."""
+    and a flag that the (non-zero) product fell outside the alignment window and was forced to 0.
+
+    With `stages` 2 or 3, registers cut it after the multiply and (3) after the shift, so addend and
+    dropped come out stages - 1 cycles after a and b."""
+    assert 1 <= stages <= 3
+
+    def cut(value: Value, name: str) -> Value:
+        reg = Signal.like(value, name=name)
+        m.d.sync += reg.eq(value)
+        return reg
+
     m.submodules.mult = mult = MantissaMultiplier()
     m.d.comb += mult.a_mant.eq(a.mantissa)
     m.d.comb += mult.b_mant.eq(b.mantissa)
 
-    sign = a.sign ^ b.sign
+    sign = Signal()
+    m.d.comb += sign.eq(a.sign ^ b.sign)
     # TODO: no Inf/NaN handling. The exponent==255 is treated as a finite number, so
     # Inf/NaN operands produce garbage rather than propagating. Subnormals (exponent==0,
     # mantissa!=0) flush to zero here.
-    zero = (a.exponent == 0) | (b.exponent == 0)
+    zero = Signal()
+    m.d.comb += zero.eq((a.exponent == 0) | (b.exponent == 0))
+    product, a_exp, b_exp = mult.product, a.exponent, b.exponent
+    if stages >= 2:
+        product, a_exp, b_exp = cut(product, "product_r"), cut(a_exp, "a_exp_r"), cut(b_exp, "b_exp_r")
+        sign, zero = cut(sign, "sign_r"), cut(zero, "zero_r")
 
     shift = Signal(signed(12))
-    m.d.comb += shift.eq(a.exponent + b.exponent - GRID_ALIGN)
+    m.d.comb += shift.eq(a_exp + b_exp - GRID_ALIGN)
 
     prod = Signal(WIDTH)
-    m.d.comb += prod.eq(Mux(zero, 0, mult.product))
+    m.d.comb += prod.eq(Mux(zero, 0, product))
 
     in_window = Signal()
     m.d.comb += in_window.eq((shift >= 0) & (shift <= MAX_SHIFT))
@@ -43,14 +59,21 @@ def aligned_addend(m: Module, a, b):
     magnitude = Signal(WIDTH)
     m.d.comb += magnitude.eq(Mux(in_window, (prod << shamt)[:WIDTH], 0))
 
-    addend = Signal(signed(WIDTH))
-    m.d.comb += addend.eq(Mux(sign, -magnitude, magnitude))
-
     dropped = Signal()
     m.d.comb += dropped.eq(~in_window & ~zero)
+    if stages >= 3:
+        magnitude, sign, dropped = cut(magnitude, "magnitude_r"), cut(sign, "sign_r2"), cut(dropped, "dropped_r")
+
+    addend = Signal(signed(WIDTH))
+    m.d.comb += addend.eq(Mux(sign, -magnitude, magnitude))
     return addend, dropped
 
 
+def lane_operands(pe: "FixedPE") -> list[tuple]:
+    """The PE's (a, b) port pairs, one per lane."""
+    return [(pe.a, pe.b)] if pe.lanes == 1 else list(zip(pe.a, pe.b))
+
+
 class FixedMAC(wiring.Component):
     """Combinational MAC: acc_out = acc_in + align(a*b). Per-cycle depth proxy for the grid PE."""
 
@@ -59,55 +82,135 @@ class FixedMAC(wiring.Component):
     acc_in: In(signed(WIDTH))
     acc_out: Out(signed(WIDTH))
 
+    def __init__(self, adder: Adder = Adder("carry_select", 6)):
+        self.adder = adder
+        super().__init__()
+
     def elaborate(self, platform: Platform | None) -> Module:
         m = Module()
         addend, _ = aligned_addend(m, self.a, self.b)
-        m.submodules.add = add = CarrySelectAdder(WIDTH, 6)
-        m.d.comb += add.a.eq(self.acc_in.as_unsigned())
-        m.d.comb += add.b.eq(addend.as_unsigned())
-        m.d.comb += add.carry_in.eq(0)
-        m.d.comb += self.acc_out.eq(add.sum.as_signed())
+        acc_out = add(m, self.acc_in.as_unsigned(), addend.as_unsigned(), self.adder, "add")
+        m.d.comb += self.acc_out.eq(acc_out[:WIDTH])
         return m
 
 
 class FixedPE(wiring.Component):
     """Registered PE: pipelined multiply+align, accumulate, drain to bf16. The addend and its
     control register one cycle ahead of the add, so the per-cycle loop is just `acc + addend` and the
-    operands accumulate one cycle behind their presentation (consumers flush a trailing cycle)."""
-
-    a: In(BFloat16)
-    b: In(BFloat16)
-    acc_sel: In(2)
-    load: In(1)
-    enable: In(1)
-    result: Out(BFloat16)
-    result_valid: Out(1)
-    any_dropped: Out(1)
-    any_overflow: Out(1)
+    operands accumulate one cycle behind their presentation (consumers flush a trailing cycle).
+    `pipeline_stages` 2 or 3 splits the multiply+align across more registers (multiply | exponent+shift |
+    negate) and delays load/enable/acc_sel to match, so everything lands pipeline_stages - 1 cycles later.
+
+    With `split_drain`, result and flags follow `drain_sel` (unregistered) instead of acc_sel, so a bank
+    can drain while the next op accumulates into another. With `carry_save`, the accumulator keeps its banks
+    in carry-save form and resolves them through a two-cycle segmented add (same results and flags, the flags
+    one cycle and result/result_valid/value two cycles later).
+    `adder` picks the accumulator's adder architecture. Without `drain`, the PE has no drain of its own and
+    exposes the drained bank's raw `value` instead of result/result_valid, for a SharedDrain.
+
+    With `lanes` 2 or 4 (a dot-2 / dot-4 PE), `a` and `b` are arrays of that many pairs, one k each. Their
+    addends sum in a 3:2 compressor tree in the align stage and enter the accumulator as one addend per cycle;
+    a group sum that leaves the signed range sets any_overflow (golden.mac(lanes=...))."""
+
+    def __init__(
+        self,
+        split_drain: bool = False,
+        carry_save: bool = False,
+        adder: Adder = Adder(),
+        pipeline_stages: int = 1,
+        drain: bool = True,
+        lanes: int = 1,
+    ):
+        assert 1 <= pipeline_stages <= 3
+        assert lanes in (1, 2, 4)
+        self.lanes = lanes
+        self.split_drain = split_drain
+        self.drain = drain
+        self.pipeline_stages = pipeline_stages
+        self.carry_save = carry_save
+        self.adder = adder
+        operand = In(BFloat16) if lanes == 1 else In(BFloat16).array(lanes)
+        members = {
+            "a": operand,
+            "b": operand,
+            "acc_sel": In(2),
+            "load": In(1),
+            "enable": In(1),
+            "any_dropped": Out(1),
+            "any_overflow": Out(1),
+        }
+        if drain:
+            members["result"] = Out(BFloat16)
+            members["result_valid"] = Out(1)
+        else:
+            members["value"] = Out(signed(WIDTH))
+        if split_drain:
+            members["drain_sel"] = In(2)
+        super().__init__(members)
 
     def elaborate(self, platform: Platform | None) -> Module:
         m = Module()
-        addend, dropped = aligned_addend(m, self.a, self.b)
+        addend_overflow = C(0)
+        if self.lanes == 1:
+            addend, dropped = aligned_addend(m, self.a, self.b, self.pipeline_stages)
+        else:
+            addends, droppeds = [], []
+            for lane, (a, b) in enumerate(lane_operands(self)):
+                m.submodules[f"lane{lane}"] = lane_m = Module()
+                lane_addend, lane_dropped = aligned_addend(lane_m, a, b, self.pipeline_stages)
+                addends.append(lane_addend)
+                droppeds.append(lane_dropped)
+            group = add_many(m, addends, self.adder, "group")
+            addend, dropped = group[:WIDTH].as_signed(), Cat(droppeds).any()
+            top = group[WIDTH - 1 :]  # the sum fits WIDTH bits when these are all copies of its sign
+            addend_overflow = top.any() & ~top.all()
+
+        acc_sel, load, enable = self.acc_sel, self.load, self.enable
+        for n in range(self.pipeline_stages - 1):
+            acc_sel_d, load_d, enable_d = (
+                Signal(2, name=f"acc_sel_d{n}"),
+                Signal(name=f"load_d{n}"),
+                Signal(name=f"enable_d{n}"),
+            )
+            m.d.sync += acc_sel_d.eq(acc_sel)
+            m.d.sync += load_d.eq(load)
+            m.d.sync += enable_d.eq(enable)
+            acc_sel, load, enable = acc_sel_d, load_d, enable_d
 
         addend_r = Signal(signed(WIDTH))
         dropped_r = Signal()
+        addend_overflow_r = Signal()
         acc_sel_r = Signal(2)
         load_r = Signal()
         enable_r = Signal()
         m.d.sync += addend_r.eq(addend)
         m.d.sync += dropped_r.eq(dropped)
-        m.d.sync += acc_sel_r.eq(self.acc_sel)
-        m.d.sync += load_r.eq(self.load)
-        m.d.sync += enable_r.eq(self.enable)
-
-        m.submodules.acc = acc = Accumulator(width=WIDTH, lsb_exp=LSB_EXP)
+        m.d.sync += addend_overflow_r.eq(addend_overflow)
+        m.d.sync += acc_sel_r.eq(acc_sel)
+        m.d.sync += load_r.eq(load)
+        m.d.sync += enable_r.eq(enable)
+
+        m.submodules.acc = acc = Accumulator(
+            width=WIDTH,
+            lsb_exp=LSB_EXP,
+            split_drain=self.split_drain,
+            carry_save=self.carry_save,
+            adder=self.adder,
+            drain=self.drain,
+        )
+        if self.split_drain:
+            m.d.comb += acc.drain_sel.eq(self.drain_sel)
         m.d.comb += acc.addend.eq(addend_r)
         m.d.comb += acc.addend_dropped.eq(dropped_r)
+        m.d.comb += acc.addend_overflow.eq(addend_overflow_r)
         m.d.comb += acc.acc_sel.eq(acc_sel_r)
         m.d.comb += acc.load.eq(load_r)
         m.d.comb += acc.enable.eq(enable_r)
-        m.d.comb += self.result.eq(acc.result)
-        m.d.comb += self.result_valid.eq(acc.result_valid)
+        if self.drain:
+            m.d.comb += self.result.eq(acc.result)
+            m.d.comb += self.result_valid.eq(acc.result_valid)
+        else:
+            m.d.comb += self.value.eq(acc.value)
         m.d.comb += self.any_dropped.eq(acc.any_dropped)
         m.d.comb += self.any_overflow.eq(acc.any_overflow)
         return m
@@ -0,0 +1,206 @@
+"""Differential fuzzing of FixedPE / MMA / MMAUnit against the golden model. A seed deterministically picks an
+operand distribution (exponent corners around the alignment window, subnormals, round_to_bf16 ties, plain
+normals) and a case; `run` spreads seeds over a process pool, and failing cases are shrunk to a minimal
+reproducer before being reported."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+import golden
+from accumulator import ACC_BANKS
+from bfloat16 import bits_to_float, pack_bits
+from epilogue import ONE
+from fixed_pe import GRID_ALIGN, MAX_SHIFT
+from mma_stream import N
+
+TARGETS = ("FixedPE", "MMA", "MMAUnit")
+
+
+class Case(NamedTuple):
+    """FixedPE: a, b (B, K). MMA: a, b (B, N, N). MMAUnit: a (M, K), b (K, N), planned with `kchunk` k-blocks
+    per op across `banks` acc_d banks, so K > kchunk * N chains accumulate ops per bank."""
+
+    target: str
+    a: np.ndarray
+    b: np.ndarray
+    kchunk: int = 0
+    banks: int = ACC_BANKS
+
+
+class Failure(NamedTuple):
+    seed: int
+    case: Case  # shrunk
+    errors: list[str]
+
+
+# (array, axis) groups that shrink together: dropping index i along one drops it along all
+SHRINK_AXES = {
+    "FixedPE": [[(0, 0), (1, 0)], [(0, 1), (1, 1)]],
+    "MMA": [[(0, 0), (1, 0)]],
+    "MMAUnit": [[(0, 0)], [(0, 1), (1, 0)], [(1, 1)]],
+}
+
+
+def random_bits(rng: np.random.Generator, shape, exp_lo: int = 100, exp_hi: int = 150) -> np.ndarray:
+    sign = rng.integers(0, 2, shape)
+    return pack_bits(sign, rng.integers(exp_lo, exp_hi + 1, shape), rng.integers(0, 128, shape))
+
+
+def window_corners(rng: np.random.Generator, a_shape, b_shape) -> tuple[np.ndarray, np.ndarray]:
+    """Products straddling the ends of the alignment window: shift = a_exp + b_exp - GRID_ALIGN lands on or
+    next to 0 and MAX_SHIFT."""
+    a_exp = int(rng.integers(90, 160))
+    edge = int(rng.choice([0, MAX_SHIFT]))
+    a = random_bits(rng, a_shape, a_exp - 1, a_exp + 1)
+    b = random_bits(rng, b_shape, GRID_ALIGN + edge - a_exp - 1, GRID_ALIGN + edge - a_exp + 1)
+    return a, b
+
+
+def subnormals(rng: np.random.Generator, a_shape, b_shape) -> tuple[np.ndarray, np.ndarray]:
+    """Normals with a fraction of subnormals (exp 0, mantissa != 0) and zeros mixed in on both sides."""
+    a, b = random_bits(rng, a_shape), random_bits(rng, b_shape)
+    for x in (a, b):
+        mask = rng.random(x.shape) < 0.3
+        x[mask] = pack_bits(rng.integers(0, 2, x.shape), 0, rng.integers(0, 128, x.shape))[mask]
+    return a, b
+
+
+def ties(rng: np.random.Generator, a_shape, b_shape) -> tuple[np.ndarray, np.ndarray]:
+    """Each dot product is v + half an ulp of v, optionally nudged by a much smaller term, so round_to_bf16
+    sees an exact tie or just either side of one. b is all ones; a's first k carries v, the next two the
+    half ulp and the nudge."""
+    a = np.zeros(a_shape, dtype=np.uint16)
+    b = np.full(b_shape, ONE, dtype=np.uint16)
+    k = a_shape[-1]
+    rows = a[..., 0].shape
+    v_exp = rng.integers(127, 135, rows)
+    a[..., 0] = pack_bits(0, v_exp, rng.integers(0, 128, rows))
+    if k > 1:
+        a[..., 1] = pack_bits(rng.integers(0, 2, rows), v_exp - 8, 0)
+    if k > 2:
+        nudge = rng.random(rows) < 0.5
+        a[..., 2] = np.where(nudge, pack_bits(rng.integers(0, 2, rows), v_exp - 8 - rng.integers(1, 7, rows), 0), 0)
+    return a, b
+
+
+def normals(rng: np.random.Generator, a_shape, b_shape) -> tuple[np.ndarray, np.ndarray]:
+    return random_bits(rng, a_shape), random_bits(rng, b_shape)
+
+
+DISTRIBUTIONS: list[Callable] = [window_corners, subnormals, ties, normals]
+
+
+def generate(target: str, seed: int) -> Case:
+    rng = np.random.default_rng([seed, TARGETS.index(target)])
+    dist = DISTRIBUTIONS[seed % len(DISTRIBUTIONS)]
+    if target == "FixedPE":
+        batch, k = int(rng.integers(1, 40)), int(rng.integers(1, 9))
+        return Case(target, *dist(rng, (batch, k), (batch, k)))
+    if target == "MMA":
+        batch = int(rng.integers(1, 6))
+        return Case(target, *dist(rng, (batch, N, N), (batch, N, N)))
+    m, k, n = (int(x) for x in rng.integers(1, [2 * N + 1, 6 * N + 1, 3 * N + 1]))
+    return Case(target, *dist(rng, (m, k), (k, n)), int(rng.integers(1, 4)), int(rng.integers(1, ACC_BANKS + 1)))
+
+
+def simulate(case: Case) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Run `case` on its RTL. Returns (result bits, dropped, overflow) with flags per vector (per GEMM for
+    MMAUnit)."""
+    from batch_sim import simulate_fixed_pe, simulate_mma
+    from gemm import plan, run_sim
+
+    if case.target == "FixedPE":
+        result = simulate_fixed_pe(case.a, case.b)
+    elif case.target == "MMA":
+        result = simulate_mma(case.a, case.b)
+    else:
+        gemm = run_sim(plan(bits_to_float(case.a), bits_to_float(case.b), case.banks, case.kchunk))
+        return gemm.d_bits, np.array([gemm.any_dropped]), np.array([gemm.any_overflow])
+    return result.bits, result.dropped, result.overflow
+
+
+def reference(case: Case) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The golden model's answer for `case`, in simulate's layout."""
+    if case.target == "FixedPE":
+        bits, dropped, overflow = golden.matmul(case.a[:, None, :], case.b[:, :, None])
+        return bits.reshape(-1), dropped.reshape(-1), overflow.reshape(-1)
+    if case.target == "MMA":
+        bits, dropped, overflow = golden.matmul(case.a, case.b)
+        return bits, dropped.any(axis=(1, 2)), overflow.any(axis=(1, 2))
+    bits, dropped, overflow = golden.matmul(case.a, case.b)
+    return bits, np.array([dropped.any()]), np.array([overflow.any()])
+
+
+def check(case: Case, reference: Callable[[Case], tuple] = reference) -> list[str]:
+    """Diff the RTL against `reference`; returns one message per mismatching output, empty when they agree."""
+    got, want = simulate(case), reference(case)
+    errors = []
+    for name, g, w in zip(("bits", "dropped", "overflow"), got, want):
+        for idx in zip(*np.nonzero(np.asarray(g) != np.asarray(w))):
+            errors.append(f"{name}{list(map(int, idx))}: rtl {int(g[idx]):#x} != reference {int(w[idx]):#x}")
+    return errors
+
+
+def shrink(case: Case, fails: Callable[[Case], bool], budget: int = 300) -> Case:
+    """Greedy delta-debugging: drop slices along SHRINK_AXES (halves first, then single indices), then
+    simplify surviving operands (to zero, then to a bare power of two, then positive), keeping each step
+    only if `fails` still holds. Stops at a fixed point or after `budget` evaluations."""
+    tries = 0
+
+    def attempt(candidate: Case) -> bool:
+        nonlocal tries
+        tries += 1
+        return tries <= budget and fails(candidate)
+
+    changed = True
+    while changed and tries < budget:
+        changed = False
+        for group in SHRINK_AXES[case.target]:
+            size = (case.a, case.b)[group[0][0]].shape[group[0][1]]
+            width = size // 2
+            while width >= 1:
+                for lo in range(0, size, width):
+                    keep = np.r_[0:lo, lo + width : size]
+                    trial = [case.a, case.b]
+                    for array, axis in group:
+                        trial[array] = np.take(trial[array], keep, axis=axis)
+                    candidate = case._replace(a=trial[0], b=trial[1])
+                    if attempt(candidate):
+                        case, size, changed = candidate, len(keep), True
+                        width = min(width, size // 2)
+                        break
+                else:
+                    width //= 2
+        for which in ("a", "b"):
+            for idx in np.ndindex(getattr(case, which).shape):
+                value = int(getattr(case, which)[idx])
+                for simpler in (0, value & 0xFF80, value & 0x7F80):
+                    if simpler == value:
+                        continue
+                    array = getattr(case, which).copy()
+                    array[idx] = simpler
+                    candidate = case._replace(**{which: array})
+                    if attempt(candidate):
+                        case, changed = candidate, True
+                        break
+    return case
+
+
+def fuzz_one(target: str, seed: int, reference: Callable[[Case], tuple] = reference) -> Failure | None:
+    case = generate(target, seed)
+    errors = check(case, reference)
+    if not errors:
+        return None
+    case = shrink(case, lambda c: bool(check(c, reference)))
+    return Failure(seed, case, check(case, reference))
+
+
+def run(target: str, seeds, workers: int | None = None) -> list[Failure]:
+    """Fuzz `seeds` on `target` across `workers` processes (default: one per core)."""
+    seeds = list(seeds)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        results = pool.map(fuzz_one, [target] * len(seeds), seeds, chunksize=max(1, len(seeds) // 64))
+        return [failure for failure in results if failure is not None]
@@ -0,0 +1,434 @@
+"""Host-side GEMM lowering: split an M x K x N bf16 matmul into tiles of the unit's Geometry (4x4 by default),
+lay them out in its D-SRAM slots, and emit the MMAUnit op stream that computes it. A schedule runs either on the RTL (`run_sim`) or on
+MMAUnitModel (`run_model`), or on the RTL compiled through CXXRTL (`run_cxxrtl`) for long op streams; all
+report cycles and achieved MACs/cycle, and `cross_check` diffs RTL and model cycle by cycle. `Host` is the one
+op-issue loop all three share; with `pipelined` it keeps the next op queued so MMAUnit(pipelined=True)
+overlaps each evict with the following op's MAC."""
+
+import time
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+
+from accumulator import ACC_BANKS
+from bfloat16 import bits_from_float, bits_to_float
+from dsram import DSRAM, Traffic
+from epilogue import Activation
+from mma_model import PIPELINE_FILL, MMAUnitModel, Op
+from mma_stream import TAIL_CYCLES, Geometry, N
+from sparse import compress
+
+PEAK_MACS_PER_CYCLE = N * N  # of the default geometry; Geometry.macs_per_cycle in general
+
+
+class Step(NamedTuple):
+    loads: dict[int, np.ndarray]  # slot -> A, B (or C) tile bits the host stages before issuing op
+    op: Op
+    store: tuple[int, int] | None  # output tile (row, col) the host reads back from op.slot_c (and further
+    # outputs of a multi-output op: (row, col + n) from op.slot_c + n)
+
+
+class Schedule(NamedTuple):
+    steps: list[Step]
+    shape: tuple[int, int, int]  # unpadded (M, K, N)
+    geometry: Geometry = Geometry()  # of the unit the schedule targets
+
+
+class GemmResult(NamedTuple):
+    d_bits: np.ndarray  # (M, N) bf16 bits
+    cycles: int
+    any_dropped: bool
+    any_overflow: bool
+    macs: int
+    traffic: Traffic | None = None  # D-SRAM accesses over the run
+    sim_s: float = 0.0  # run_sim / run_cxxrtl: wall seconds stepping the RTL, excluding elaboration and build
+
+    @property
+    def d(self) -> np.ndarray:
+        return bits_to_float(self.d_bits)
+
+    @property
+    def macs_per_cycle(self) -> float:
+        return self.macs / self.cycles
+
+    @property
+    def dsram_bytes_per_cycle(self) -> tuple[float, float]:
+        """(read, write) D-SRAM port bandwidth."""
+        assert self.traffic is not None
+        return self.traffic.read_bytes / self.cycles, self.traffic.write_bytes / self.cycles
+
+
+def to_tiles(x_bits: np.ndarray, tile: tuple[int, int] = (N, N)) -> np.ndarray:
+    """(R, C) bits -> (R/tr, C/tc, tr, tc) tiles, zero-padding R and C up to multiples of the tile shape."""
+    tr, tc = tile
+    rows, cols = -(-x_bits.shape[0] // tr) * tr, -(-x_bits.shape[1] // tc) * tc
+    padded = np.zeros((rows, cols), dtype=np.uint16)
+    padded[: x_bits.shape[0], : x_bits.shape[1]] = x_bits
+    return padded.reshape(rows // tr, tr, cols // tc, tc).swapaxes(1, 2)
+
+
+def plan(
+    A: np.ndarray,
+    B: np.ndarray,
+    banks: int = ACC_BANKS,
+    kchunk: int | None = None,
+    geometry: Geometry = Geometry(),
+    weight_stationary: bool = False,
+    multi_output: bool = False,
+    c: np.ndarray | None = None,
+    scale: float | None = None,
+    act: Activation = Activation.NONE,
+) -> Schedule:
+    """Lower D = A @ B. Each tile-row of D is processed `banks` output tiles at a time, one per acc_d bank,
+    sharing the staged A k-chunk; K longer than `kchunk` k-blocks chains through accumulate and the last
+    chunk evicts. D-SRAM holds one A chunk, one B chunk per bank and one C slot per bank.
+
+    With `weight_stationary` (a Geometry with b_file), the loops swap: each B k-chunk is fetched once into
+    the unit's b_file and the following ops stream A tiles of successive tile-rows against it (reuse_b), one
+    per bank, each evicting to its bank's C slot. D-SRAM then holds one A chunk per bank and one B chunk.
+
+    With `multi_output` (a Geometry with max_outputs >= banks), each group of output tiles is one op: its
+    outputs read the staged A chunk once per k-block, with the group's B chunks back to back from one base.
+
+    `c`, `scale` and `act` (a Geometry with epilogue) make it D = act(scale * A @ B + c) in the evicting ops'
+    epilogue, each C tile staged into the slot its output evicts to (add_c needs the sequential unit).
+
+    With a Geometry with sparse_a, A must be 2:4 sparse along K (sparse.prune makes it so): its tiles are
+    staged compressed."""
+    assert A.ndim == 2 and B.ndim == 2 and A.shape[1] == B.shape[0]
+    assert 1 <= banks <= ACC_BANKS
+    assert geometry.b_file or not weight_stationary
+    assert not multi_output or (banks <= geometry.max_outputs and not weight_stationary)
+    assert geometry.epilogue or (c is None and scale is None and act == Activation.NONE)
+    max_kblocks, slots = geometry.max_kblocks, geometry.slots
+    if kchunk is None:
+        kchunk = min(max_kblocks, (slots - banks) // (banks + 1))
+    assert 1 <= kchunk <= max_kblocks and kchunk * (banks + 1) + banks <= slots
+
+    a_tiles = to_tiles(bits_from_float(A), geometry.a_shape)
+    if geometry.sparse_a:
+        a_tiles = compress(a_tiles)
+    b_tiles = to_tiles(bits_from_float(B), geometry.b_shape)
+    row_tiles, k_tiles = a_tiles.shape[:2]
+    col_tiles = b_tiles.shape[1]
+    c_slot = [kchunk * (1 + banks) + bank for bank in range(banks)]
+    c_tiles = None if c is None else to_tiles(bits_from_float(c), geometry.c_shape)
+    fused = {"add_c": c is not None, "scale_en": scale is not None, "act": act}
+    if scale is not None:
+        fused["scale"] = int(bits_from_float(scale))
+
+    steps = []
+    resident: dict[int, tuple] = {}  # slot -> key of the tile it holds, to skip redundant staging
+
+    def stage(loads: dict[int, np.ndarray], slot: int, key: tuple, tile: np.ndarray) -> None:
+        if resident.get(slot) != key:
+            loads[slot] = tile
+            resident[slot] = key
+
+    def epilogue(loads: dict[int, np.ndarray], op: Op, i: int, j: int) -> Op:
+        """The evicting `op` of output tile (i, j) with the epilogue fields, its C tile(s) staged."""
+        for n in range(max(op.outputs, 1)):
+            if c_tiles is not None:
+                stage(loads, op.slot_c + n, ("c", i, j + n), c_tiles[i, j + n])
+        return op._replace(**fused)
+
+    if weight_stationary:
+        a_base = [kchunk * bank for bank in range(banks)]
+        b_base = kchunk * banks
+        # one k-chunk: every tile-row reuses the weights; longer K: banks tile-rows accumulate in step
+        rows_per_group = row_tiles if k_tiles <= kchunk else banks
+        for j in range(col_tiles):
+            for i0 in range(0, row_tiles, rows_per_group):
+                group = range(i0, min(i0 + rows_per_group, row_tiles))
+                for k0 in range(0, k_tiles, kchunk):
+                    kblocks = min(kchunk, k_tiles - k0)
+                    last = k0 + kblocks == k_tiles
+                    for n, i in enumerate(group):
+                        bank = n % banks
+                        loads: dict[int, np.ndarray] = {}
+                        for kb in range(kblocks):
+                            stage(loads, a_base[bank] + kb, ("a", i, k0 + kb), a_tiles[i, k0 + kb])
+                            if n == 0:
+                                stage(loads, b_base + kb, ("b", k0 + kb, j), b_tiles[k0 + kb, j])
+                        op = Op(a_base[bank], b_base, c_slot[bank], kblocks, k0 != 0, last, bank, n > 0)
+                        if last:
+                            op = epilogue(loads, op, i, j)
+                        steps.append(Step(loads, op, (i, j) if last else None))
+        return Schedule(steps, (A.shape[0], A.shape[1], B.shape[1]), geometry)
+
+    a_base = 0
+    b_base = [kchunk * (1 + bank) for bank in range(banks)]
+    for i in range(row_tiles):
+        for j0 in range(0, col_tiles, banks):
+            group = range(j0, min(j0 + banks, col_tiles))
+            for k0 in range(0, k_tiles, kchunk):
+                kblocks = min(kchunk, k_tiles - k0)
+                last = k0 + kblocks == k_tiles
+                if multi_output:
+                    loads = {}
+                    for kb in range(kblocks):
+                        stage(loads, a_base + kb, ("a", i, k0 + kb), a_tiles[i, k0 + kb])
+                        for n, j in enumerate(group):
+                            stage(loads, b_base[0] + n * kblocks + kb, ("b", k0 + kb, j), b_tiles[k0 + kb, j])
+                    op = Op(a_base, b_base[0], c_slot[0], kblocks, k0 != 0, last, 0, outputs=len(group))
+                    if last:
+                        op = epilogue(loads, op, i, j0)
+                    steps.append(Step(loads, op, (i, j0) if last else None))
+                    continue
+                for bank, j in enumerate(group):
+                    loads = {}
+                    for kb in range(kblocks):
+                        stage(loads, a_base + kb, ("a", i, k0 + kb), a_tiles[i, k0 + kb])
+                        stage(loads, b_base[bank] + kb, ("b", k0 + kb, j), b_tiles[k0 + kb, j])
+                    op = Op(a_base, b_base[bank], c_slot[bank], kblocks, k0 != 0, last, bank)
+                    if last:
+                        op = epilogue(loads, op, i, j)
+                    steps.append(Step(loads, op, (i, j) if last else None))
+    return Schedule(steps, (A.shape[0], A.shape[1], B.shape[1]), geometry)
+
+
+def batch_schedule(a, b, geometry: Geometry = Geometry()) -> Schedule:
+    """One non-accumulating, evicting op per vector: a[v] @ b[v] for a: B x (rows, K) and b: B x (K, cols) bf16
+    bits, K up to max_kblocks k-blocks (it may vary per vector). Slots are laid out as `plan` lays out one bank
+    with a k-chunk of the longest K; vector v's output is tile (v, 0), and the shape's K is the longest."""
+    a_tiles = [to_tiles(np.asarray(a_v), geometry.a_shape)[0] for a_v in a]
+    if geometry.sparse_a:
+        a_tiles = [compress(tiles) for tiles in a_tiles]
+    b_tiles = [to_tiles(np.asarray(b_v), geometry.b_shape)[:, 0] for b_v in b]
+    kchunk = max(len(tiles) for tiles in a_tiles)
+    assert kchunk <= geometry.max_kblocks and 2 * kchunk + 1 <= geometry.slots
+    steps = []
+    for v, (a_v, b_v) in enumerate(zip(a_tiles, b_tiles)):
+        kblocks = len(a_v)
+        loads = {kb: a_v[kb] for kb in range(kblocks)} | {kchunk + kb: b_v[kb] for kb in range(kblocks)}
+        steps.append(Step(loads, Op(0, kchunk, 2 * kchunk, kblocks, False, True, 0), (v, 0)))
+    tr, tc = geometry.c_shape
+    return Schedule(steps, (len(steps) * tr, kchunk * geometry.depth, tc), geometry)
+
+
+def assemble(schedule: Schedule, tiles: dict[tuple[int, int], np.ndarray]) -> np.ndarray:
+    m, _, n = schedule.shape
+    tr, tc = schedule.geometry.c_shape
+    out = np.zeros((-(-m // tr) * tr, -(-n // tc) * tc), dtype=np.uint16)
+    for (i, j), tile in tiles.items():
+        out[i * tr : (i + 1) * tr, j * tc : (j + 1) * tc] = tile
+    return out[:m, :n]
+
+
+def run_model(
+    schedule: Schedule, trace: list | None = None, dsram: DSRAM | None = None, pipelined: bool = False
+) -> GemmResult:
+    """Execute on MMAUnitModel. Without `trace` every op is one `run_op` transaction; with it the model is
+    stepped cycle by cycle under the same Host as run_sim, appending one port_sample per cycle."""
+    assert not (pipelined and any(step.op.add_c for step in schedule.steps)), "add_c needs the sequential unit"
+    model = MMAUnitModel(schedule.geometry, pipelined)
+    dsram = DSRAM(schedule.geometry) if dsram is None else dsram
+    host = Host(model, dsram, trace)
+    if trace is None:
+        for step in schedule.steps:
+            dsram.stage(step.loads)
+            model.run_op(step.op, dsram)
+            host.retire(step)
+        if pipelined and schedule.steps:
+            model.cycle += PIPELINE_FILL - TAIL_CYCLES + schedule.geometry.tail_cycles
+    else:
+        for _ in host.run(schedule, pipelined):
+            model.tick()
+    m, k, n = schedule.shape
+    return GemmResult(
+        assemble(schedule, host.tiles), model.cycle, host.dropped, host.overflow, m * k * n, dsram.traffic()
+    )
+
+
+def set_op(unit, op: Op, max_kblocks: int = Geometry().max_kblocks, pipelined: bool = False) -> None:
+    """Drive `op` onto the unit's ports. A pipelined unit (and MMAQueue) has no add_c port: its epilogue has no
+    C read."""
+    unit.slot_a, unit.slot_b, unit.slot_c = op.slot_a, op.slot_b, op.slot_c
+    unit.kblocks = op.kblocks % max_kblocks
+    unit.accumulate, unit.evict, unit.acc_d = int(op.accumulate), int(op.evict), op.acc_d
+    unit.reuse_b = int(op.reuse_b)
+    unit.outputs = op.outputs
+    unit.scale_en, unit.scale, unit.act = int(op.scale_en), op.scale, Activation(op.act).value
+    if pipelined:
+        assert not op.add_c, "add_c needs the sequential unit"
+    else:
+        unit.add_c = int(op.add_c)
+
+
+def port_sample(unit) -> tuple:
+    """The outputs cross_check compares each cycle; flags only at done, where MMAUnit's contract reads them."""
+    flags = (unit.any_dropped, unit.any_overflow) if unit.done else None
+    ports = (unit.ready, unit.rd_addr_a, unit.rd_addr_b, unit.rd_en_a, unit.rd_en_b, unit.wr_en, unit.wr_addr)
+    ports += (unit.wr_data, unit.done)
+    return (*ports, unit.skipped, flags)
+
+
+class Host:
+    """The host side of MMAUnit's op protocol over `unit`'s ports (the model, SimPorts or CxxrtlSim): stages each
+    step's tiles into `dsram`, issues its op, serves the D-SRAM every cycle and reads back stores and flags at
+    done. `run` is a generator that yields once per cycle; the caller advances the clock on each yield."""
+
+    def __init__(self, unit, dsram: DSRAM, trace: list | None = None):
+        self.unit = unit
+        self.dsram = dsram
+        self.trace = trace
+        self.tiles: dict[tuple[int, int], np.ndarray] = {}
+        self.dropped = False
+        self.overflow = False
+
+    def retire(self, step: Step) -> None:
+        if step.op.evict:
+            self.dropped |= bool(self.unit.any_dropped)
+            self.overflow |= bool(self.unit.any_overflow)
+        if step.store is not None:
+            row, col = step.store
+            for n in range(max(step.op.outputs, 1)):
+                self.tiles[(row, col + n)] = self.dsram.tile(step.op.slot_c + n)
+
+    def cycle(self) -> None:
+        self.dsram.serve(self.unit)
+        if self.trace is not None:
+            self.trace.append(port_sample(self.unit))
+
+    def run(self, schedule: Schedule, pipelined: bool = False, max_cycles_per_op: int = 500):
+        assert not (pipelined and any(step.op.add_c for step in schedule.steps)), "add_c needs the sequential unit"
+        if pipelined:
+            yield from self._run_pipelined(schedule, max_cycles_per_op)
+            return
+        unit = self.unit
+        for step in schedule.steps:
+            self.dsram.stage(step.loads)
+            set_op(unit, step.op, schedule.geometry.max_kblocks)
+            unit.start = 1
+            for _ in range(max_cycles_per_op):
+                self.cycle()
+                if unit.done:
+                    break
+                yield
+            assert unit.done, f"op {step.op} never completed"
+            self.retire(step)
+            unit.start = 0
+            yield  # back through IDLE
+
+    def _run_pipelined(self, schedule: Schedule, max_cycles_per_op: int):
+        """Keep the next op on the ports with start high; it is accepted (and its tiles staged, the unit being
+        done reading the previous op's) on a cycle with ready. Ops retire in order, one per done pulse."""
+        unit = self.unit
+        pending = iter(schedule.steps)
+        step = next(pending, None)
+        in_flight: deque[Step] = deque()
+        idle = 0
+        while True:
+            unit.start = int(step is not None)
+            if step is not None:
+                set_op(unit, step.op, schedule.geometry.max_kblocks, pipelined=True)
+                if unit.ready:
+                    self.dsram.stage(step.loads)
+                    in_flight.append(step)
+                    step, idle = next(pending, None), 0
+            self.cycle()
+            if unit.done:
+                self.retire(in_flight.popleft())
+                idle = 0
+            if step is None and not in_flight:
+                return
+            idle += 1
+            assert idle < max_cycles_per_op, f"ops {list(in_flight)} never completed"
+            yield
+
+
+class SimPorts:
+    """Attribute view of a DUT's ports inside a testbench, so set_op / port_sample serve RTL and model alike."""
+
+    def __init__(self, ctx, dut):
+        object.__setattr__(self, "_ctx", ctx)
+        object.__setattr__(self, "_dut", dut)
+
+    def __getattr__(self, name):
+        return self._ctx.get(getattr(self._dut, name))
+
+    def __setattr__(self, name, value):
+        self._ctx.set(getattr(self._dut, name), value)
+
+
+def run_sim(
+    schedule: Schedule,
+    trace: list | None = None,
+    vcd: str | None = None,
+    max_cycles_per_op: int = 500,
+    dsram: DSRAM | None = None,
+    pipelined: bool = False,
+) -> GemmResult:
+    """Execute on the MMAUnit RTL under amaranth.sim; the host stages tiles between ops in zero cycles.
+    With `trace`, appends one port_sample per cycle."""
+    from amaranth.hdl import Period
+    from amaranth.sim import Simulator
+
+    from mma_stream import MMAUnit
+
+    dut = MMAUnit(schedule.geometry, pipelined)
+    dsram = DSRAM(schedule.geometry) if dsram is None else dsram
+    cycles = 0
+    host = None
+
+    async def bench(ctx):
+        nonlocal cycles, host
+        host = Host(SimPorts(ctx, dut), dsram, trace)
+        for _ in host.run(schedule, pipelined, max_cycles_per_op):
+            await ctx.tick()
+            cycles += 1
+
+    sim = Simulator(dut)
+    sim.add_clock(Period(us=1))
+    sim.add_testbench(bench)
+    if vcd:
+        with sim.write_vcd(vcd):
+            start = time.perf_counter()
+            sim.run()
+    else:
+        start = time.perf_counter()
+        sim.run()
+    sim_s = time.perf_counter() - start
+    m, k, n = schedule.shape
+    return GemmResult(
+        assemble(schedule, host.tiles), cycles, host.dropped, host.overflow, m * k * n, dsram.traffic(), sim_s
+    )
+
+
+def run_cxxrtl(
+    schedule: Schedule,
+    trace: list | None = None,
+    max_cycles_per_op: int = 500,
+    dsram: DSRAM | None = None,
+    pipelined: bool = False,
+) -> GemmResult:
+    """Execute on the MMAUnit RTL compiled by cxxrtl_sim, under the same Host and cycle count as run_sim.
+    With `trace`, appends one port_sample per cycle."""
+    from cxxrtl_sim import CxxrtlSim
+    from mma_stream import MMAUnit
+
+    unit = CxxrtlSim(MMAUnit(schedule.geometry, pipelined))
+    dsram = DSRAM(schedule.geometry) if dsram is None else dsram
+    host = Host(unit, dsram, trace)
+    start = time.perf_counter()
+    for _ in host.run(schedule, pipelined, max_cycles_per_op):
+        unit.tick()
+    sim_s = time.perf_counter() - start
+    m, k, n = schedule.shape
+    return GemmResult(
+        assemble(schedule, host.tiles), unit.cycle, host.dropped, host.overflow, m * k * n, dsram.traffic(), sim_s
+    )
+
+
+def cross_check(schedule: Schedule, pipelined: bool = False) -> int:
+    """Run `schedule` on the RTL and on the cycle-stepped model and assert their port traces agree cycle for
+    cycle. Returns the number of cycles compared."""
+    rtl: list[tuple] = []
+    model: list[tuple] = []
+    run_sim(schedule, trace=rtl, pipelined=pipelined)
+    run_model(schedule, trace=model, pipelined=pipelined)
+    for cycle, (want, got) in enumerate(zip(rtl, model)):
+        assert want == got, f"cycle {cycle}: rtl {want} != model {got}"
+    assert len(rtl) == len(model), f"rtl ran {len(rtl)} cycles, model {len(model)}"
+    return len(rtl)
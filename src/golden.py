@@ -0,0 +1,137 @@
+"""Bit-exact NumPy model of the FixedPE datapath: aligned_addend, the wrapping WIDTH-bit accumulator with
+its sticky flags, the round_to_bf16 drain and MMAUnit's evict epilogue. Every function is batched over leading axes, so thousands
+of MMA / MMAUnit tiles evaluate in a few array ops."""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from accumulator import BF16_BIAS, BF16_MANTISSA_BITS
+from bfloat16 import pack_bits, unpack_bits
+from epilogue import (
+    BF16_GRID,
+    CLAMP_MAX,
+    EPI_MAX,
+    EPI_WIDTH,
+    ONE,
+    PWL_FRAC,
+    PWL_RANGE,
+    SEG_SHIFT,
+    Activation,
+    pwl_table,
+)
+from fixed_pe import GRID_ALIGN, LSB_EXP, MAX_SHIFT, WIDTH
+
+
+class AccState(NamedTuple):
+    """One accumulator bank per output element: wrapped value and the two sticky flags."""
+
+    value: np.ndarray  # int64, signed WIDTH-bit range
+    dropped: np.ndarray  # bool
+    overflow: np.ndarray  # bool
+
+
+def aligned_addend(a, b) -> tuple[np.ndarray, np.ndarray]:
+    """Mirror of fixed_pe.aligned_addend over bf16 bit arrays a, b (broadcast together).
+    Returns (addend int64, dropped bool)."""
+    a_sign, a_exp, a_mant = (v.astype(np.int64) for v in unpack_bits(a))
+    b_sign, b_exp, b_mant = (v.astype(np.int64) for v in unpack_bits(b))
+    zero = (a_exp == 0) | (b_exp == 0)
+    shift = a_exp + b_exp - GRID_ALIGN
+    in_window = (shift >= 0) & (shift <= MAX_SHIFT)
+    product = (a_mant | 0x80) * (b_mant | 0x80)
+    magnitude = np.where(in_window & ~zero, product << np.where(in_window, shift, 0), 0)
+    addend = np.where((a_sign ^ b_sign) == 1, -magnitude, magnitude)
+    return addend, ~in_window & ~zero
+
+
+def wrap(value, width: int = WIDTH) -> np.ndarray:
+    """Reduce to the signed `width`-bit range the way the accumulator register truncates."""
+    half = np.int64(1) << (width - 1)
+    return ((np.asarray(value, dtype=np.int64) + half) & ((half << 1) - 1)) - half
+
+
+def mac(a, b, state: AccState | None = None, lanes: int = 1) -> AccState:
+    """Run a (..., M, K) x (..., K, N) bf16-bit matmul through one accumulator bank per output.
+    With `state=None` the first k loads (resetting the flags); otherwise every k accumulates onto `state`,
+    as an MMAUnit op with accumulate=1 does. With `lanes` (a dot-2 / dot-4 FixedPE), each run of `lanes`
+    k sums into one addend first: overflow is then checked per group sum and at group boundaries."""
+    addend, dropped = aligned_addend(np.asarray(a)[..., :, :, None], np.asarray(b)[..., None, :, :])
+    addend = addend.reshape(*addend.shape[:-2], -1, lanes, addend.shape[-1]).sum(axis=-2)
+    # Before the first overflow the wrapped register equals the exact prefix sum, and after it the flag is
+    # sticky, so exact int64 prefix sums give both the flag and (mod 2**WIDTH) the final register.
+    prefix = np.cumsum(addend, axis=-2)
+    if state is not None:
+        prefix = prefix + np.asarray(state.value)[..., None, :]
+    half = 1 << (WIDTH - 1)
+    out_of_range = ((prefix < -half) | (prefix >= half) | (addend < -half) | (addend >= half)).any(axis=-2)
+    dropped = dropped.any(axis=-2)
+    if state is None:
+        return AccState(wrap(prefix[..., -1, :]), dropped, out_of_range)
+    return AccState(wrap(prefix[..., -1, :]), dropped | state.dropped, out_of_range | state.overflow)
+
+
+def round_to_bf16(value, width: int = WIDTH, lsb_exp: int = LSB_EXP) -> np.ndarray:
+    """Mirror of accumulator.decompose + round_to_bf16: signed fixed-point -> bf16 bits, RTNE."""
+    value = np.asarray(value, dtype=np.int64)
+    sign = (value < 0).astype(np.int64)
+    magnitude = np.abs(value)
+    leading_one = np.where(magnitude == 0, 0, np.frexp(magnitude.astype(np.float64))[1] - 1)
+    leading_one -= (magnitude >> leading_one) == 0  # past 53 bits the float conversion can round up a power
+    normalized = (magnitude << (width - 1 - leading_one)) & ((np.int64(1) << width) - 1)
+
+    mantissa_lo = width - 1 - BF16_MANTISSA_BITS
+    mantissa = (normalized >> mantissa_lo) & ((1 << BF16_MANTISSA_BITS) - 1)
+    guard = (normalized >> (mantissa_lo - 1)) & 1
+    round_bit = (normalized >> (mantissa_lo - 2)) & 1
+    sticky = (normalized & ((np.int64(1) << (mantissa_lo - 2)) - 1)) != 0
+    rounded = mantissa + (guard & (round_bit | sticky | (mantissa & 1)))
+    overflow = rounded >> BF16_MANTISSA_BITS
+
+    exponent = (lsb_exp + leading_one + BF16_BIAS + overflow) & 0xFF
+    bits = pack_bits(sign, exponent, rounded & ((1 << BF16_MANTISSA_BITS) - 1))
+    return np.where(magnitude == 0, np.uint16(0), bits)
+
+
+def matmul(a, b, lanes: int = 1) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """One load-then-drain pass, as MMA and a non-accumulating MMAUnit op compute it.
+    Returns (d bits, dropped, overflow), the flags per output element."""
+    state = mac(a, b, lanes=lanes)
+    return round_to_bf16(state.value), state.dropped, state.overflow
+
+
+def to_grid(value, shift) -> np.ndarray:
+    """Mirror of epilogue.to_grid: value * 2**shift, flooring right shifts and saturating left ones to +-EPI_MAX."""
+    value, shift = np.broadcast_arrays(np.asarray(value, dtype=np.int64), np.asarray(shift, dtype=np.int64))
+    limit = EPI_MAX >> np.clip(shift, 0, 63)
+    left = np.clip(value, -limit, limit) << np.clip(shift, 0, 62)
+    left = np.where(value > limit, EPI_MAX, np.where(value < -limit, -EPI_MAX, left))
+    return np.where(shift < 0, value >> np.clip(-shift, 0, 63), left)
+
+
+def signed_mantissa(bits) -> tuple[np.ndarray, np.ndarray]:
+    """(+-1.m << 7, exponent) of bf16 bits, the mantissa 0 for a zero exponent."""
+    sign, exponent, mantissa = (v.astype(np.int64) for v in unpack_bits(np.asarray(bits, dtype=np.uint16)))
+    magnitude = np.where(exponent == 0, 0, mantissa | 0x80)
+    return np.where(sign == 1, -magnitude, magnitude), exponent
+
+
+def epilogue(value, c=0, scale: int = ONE, act: Activation = Activation.NONE) -> np.ndarray:
+    """Mirror of epilogue.Epilogue: bf16 bits of act(scale * value + c) for raw accumulator values, bf16 bits
+    `c` (0 without add_c) and one bf16 `scale` (ONE without scale_en)."""
+    scale_mant, scale_exp = signed_mantissa(scale)
+    c_mant, c_exp = signed_mantissa(c)
+    scaled = to_grid(np.asarray(value, dtype=np.int64) * scale_mant, scale_exp - BF16_GRID)
+    y = np.clip(scaled + to_grid(c_mant, c_exp - BF16_GRID - LSB_EXP), -EPI_MAX, EPI_MAX)
+    act = Activation(act)
+    if act == Activation.RELU:
+        y = np.maximum(y, 0)
+    elif act == Activation.CLAMP:
+        y = np.clip(y, 0, CLAMP_MAX << -LSB_EXP)
+    elif act in (Activation.GELU, Activation.SILU):
+        low, high = -PWL_RANGE << -LSB_EXP, PWL_RANGE << -LSB_EXP
+        slope, intercept = (np.array(column, dtype=np.int64) for column in zip(*pwl_table(act)))
+        segment = np.clip((y - low) >> SEG_SHIFT, 0, len(slope) - 1)
+        pwl = ((np.clip(y, low, high) * slope[segment]) >> PWL_FRAC) + intercept[segment]
+        y = np.where(y < low, 0, np.where(y >= high, y, pwl))
+    return round_to_bf16(y, EPI_WIDTH)
@@ -3,8 +3,10 @@ from amaranth.build import Platform
 from amaranth.lib import enum, wiring
 from amaranth.lib.wiring import In, Out
 
+from adder import Adder
 from bfloat16 import BFloat16
-from fixed_pe import FixedPE
+from fixed_pe import LSB_EXP, WIDTH, FixedPE, lane_operands
+from shared_drain import SharedDrain, drain_cycles
 
 N = 4
 
@@ -12,20 +14,43 @@ N = 4
 class State(enum.Enum, shape=3):
     IDLE = 0
     MAC = 1
-    FLUSH = 2  # let the last pipelined product reach acc before draining
-    DRAIN = 3  # hold acc one cycle so the pipelined drain settles before DONE reads result
+    FLUSH = 2  # let the last pipelined product reach acc before draining (one cycle per PE pipeline stage)
+    DRAIN = 3  # hold acc while the pipelined drain settles before DONE reads result (drain_cycles)
     DONE = 4
 
 
 class MMA(wiring.Component):
-    def __init__(self):
+    def __init__(
+        self,
+        rows: int = N,
+        cols: int = N,
+        depth: int = N,
+        adder: Adder = Adder(),
+        pipeline_stages: int = 1,
+        drain_engines: int = 0,
+        lanes: int = 1,
+    ):
+        """D (rows x cols) = A (rows x depth) @ B (depth x cols) on a rows x cols PE array, one k per cycle;
+        matrices are flattened row-major. `adder` and `pipeline_stages` configure the FixedPEs.
+
+        With `drain_engines`, the PEs have no drains of their own and that many SharedDrain engines round the
+        array into a result buffer (drain_engines=cols: a row per cycle), so DRAIN lasts
+        drain_cycles(rows * cols, drain_engines) cycles instead of one.
+
+        With `lanes` 2 or 4, the PEs are dot-2 / dot-4 and MAC takes depth / lanes cycles."""
+        assert depth % lanes == 0
+        self.rows, self.cols, self.depth = rows, cols, depth
+        self.adder = adder
+        self.pipeline_stages = pipeline_stages
+        self.drain_engines = drain_engines
+        self.lanes = lanes
         super().__init__(
             {
-                "a_matrix": In(BFloat16).array(N * N),
-                "b_matrix": In(BFloat16).array(N * N),
+                "a_matrix": In(BFloat16).array(rows * depth),
+                "b_matrix": In(BFloat16).array(depth * cols),
                 "start": In(1),
                 "done": Out(1),
-                "d_matrix": Out(BFloat16).array(N * N),
+                "d_matrix": Out(BFloat16).array(rows * cols),
                 "any_dropped": Out(1),
                 "any_overflow": Out(1),
             }
@@ -33,26 +58,40 @@ class MMA(wiring.Component):
 
     def elaborate(self, platform: Platform | None) -> Module:
         m = Module()
-
-        pe = Array(Array(FixedPE() for _ in range(N)) for _ in range(N))
-        for i in range(N):
-            for j in range(N):
+        rows, cols, depth = self.rows, self.cols, self.depth
+        lanes, steps = self.lanes, depth // self.lanes
+
+        shared = self.drain_engines > 0
+        drain_for = drain_cycles(rows * cols, self.drain_engines)
+
+        pe = Array(
+            Array(
+                FixedPE(adder=self.adder, pipeline_stages=self.pipeline_stages, drain=not shared, lanes=lanes)
+                for _ in range(cols)
+            )
+            for _ in range(rows)
+        )
+        for i in range(rows):
+            for j in range(cols):
                 m.submodules[f"pe_{i}_{j}"] = pe[i][j]
 
         state = Signal(State)
-        k = Signal(range(N))
+        # k-step (lanes k each) in MAC; FLUSH and DRAIN cycles after it
+        k = Signal(range(max(steps, self.pipeline_stages, drain_for)))
 
         with m.Switch(k):
-            for k_val in range(N):
+            for k_val in range(steps):
                 with m.Case(k_val):
-                    for i in range(N):
-                        for j in range(N):
-                            m.d.comb += pe[i][j].a.eq(self.a_matrix[i * N + k_val])
-                            m.d.comb += pe[i][j].b.eq(self.b_matrix[k_val * N + j])
+                    for i in range(rows):
+                        for j in range(cols):
+                            for lane, (a, b) in enumerate(lane_operands(pe[i][j])):
+                                kk = k_val * lanes + lane
+                                m.d.comb += a.eq(self.a_matrix[i * depth + kk])
+                                m.d.comb += b.eq(self.b_matrix[kk * cols + j])
 
         def set_all(load, enable):
-            for i in range(N):
-                for j in range(N):
+            for i in range(rows):
+                for j in range(cols):
                     m.d.comb += pe[i][j].load.eq(load)
                     m.d.comb += pe[i][j].enable.eq(enable)
 
@@ -69,20 +108,26 @@ class MMA(wiring.Component):
                 seed_first_product = k == 0
                 accumulate_subsequent = k != 0
                 set_all(load=seed_first_product, enable=accumulate_subsequent)
-                with m.If(k == N - 1):
+                with m.If(k == steps - 1):
                     m.d.sync += state.eq(State.FLUSH)
+                    m.d.sync += k.eq(0)
                 with m.Else():
                     m.d.sync += k.eq(k + 1)
 
             with m.Case(State.FLUSH):
                 m.d.comb += self.done.eq(0)
                 set_all(load=0, enable=0)
-                m.d.sync += state.eq(State.DRAIN)
+                m.d.sync += k.eq(k + 1)
+                with m.If(k == self.pipeline_stages - 1):
+                    m.d.sync += state.eq(State.DRAIN)
+                    m.d.sync += k.eq(0)
 
             with m.Case(State.DRAIN):
                 m.d.comb += self.done.eq(0)
                 set_all(load=0, enable=0)
-                m.d.sync += state.eq(State.DONE)
+                m.d.sync += k.eq(k + 1)
+                with m.If(k == drain_for - 1):
+                    m.d.sync += state.eq(State.DONE)
 
             with m.Case(State.DONE):
                 m.d.comb += self.done.eq(1)
@@ -90,11 +135,20 @@ class MMA(wiring.Component):
                 with m.If(~self.start):
                     m.d.sync += state.eq(State.IDLE)
 
-        for i in range(N):
-            for j in range(N):
-                m.d.comb += self.d_matrix[i * N + j].eq(pe[i][j].result)
-
-        m.d.comb += self.any_dropped.eq(Cat(pe[i][j].any_dropped for i in range(N) for j in range(N)).any())
-        m.d.comb += self.any_overflow.eq(Cat(pe[i][j].any_overflow for i in range(N) for j in range(N)).any())
+        if shared:
+            m.submodules.drain = drain = SharedDrain(rows * cols, self.drain_engines, WIDTH, LSB_EXP)
+            m.d.comb += drain.run.eq(state == State.DRAIN)
+            for i in range(rows):
+                for j in range(cols):
+                    m.d.comb += drain.values[i * cols + j].eq(pe[i][j].value)
+                    m.d.comb += self.d_matrix[i * cols + j].eq(drain.results[i * cols + j])
+        else:
+            for i in range(rows):
+                for j in range(cols):
+                    m.d.comb += self.d_matrix[i * cols + j].eq(pe[i][j].result)
+
+        pes = [pe[i][j] for i in range(rows) for j in range(cols)]
+        m.d.comb += self.any_dropped.eq(Cat(p.any_dropped for p in pes).any())
+        m.d.comb += self.any_overflow.eq(Cat(p.any_overflow for p in pes).any())
 
         return m
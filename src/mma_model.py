@@ -0,0 +1,549 @@
+"""Cycle-accurate software model of MMAUnit. `MMAUnitModel` exposes the same ports as attributes and steps the
+IDLE/FETCH0/LATCH0/MAC/FLUSH/DRAIN/EVICT/DONE machine one `tick()` at a time, reproducing rd_addr, wr_en/
+wr_addr/wr_data and done cycle for cycle. Arithmetic is deferred to one golden-model call per op, so flags and
+bank contents are exact from FLUSH onward (where MMAUnit's contract reads them), not mid-MAC. `run_op` skips
+the per-cycle stepping entirely for whole-op simulation. `pipelined` mirrors MMAUnit(pipelined=True): op fields
+captured on accept, the next op's first tile prefetched in the last k-block, and a `tail_cycles` evict tail.
+With Geometry.zero_skip, MAC follows each latched tile's live steps and the fetch skips empty tiles, so an op's
+cycle count depends on its operands (`zero_skip_cycles`)."""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from accumulator import ACC_BANKS
+from epilogue import ONE, Activation
+from golden import AccState, epilogue, mac, round_to_bf16
+from mma_stream import Geometry, N, State
+from sparse import expand
+
+
+class Op(NamedTuple):
+    """One MMAUnit op, field for field as driven on its ports (kblocks is 1..max_kblocks here)."""
+
+    slot_a: int
+    slot_b: int
+    slot_c: int
+    kblocks: int
+    accumulate: bool
+    evict: bool
+    acc_d: int
+    reuse_b: bool = False  # B from the unit's b_file (Geometry.b_file) instead of D-SRAM
+    outputs: int = 1  # C tiles against the same A (up to Geometry.max_outputs); 0 also means one
+    add_c: bool = False  # epilogue fields (Geometry.epilogue): add the C tile at slot_c (sequential only),
+    scale_en: bool = False  # multiply by the bf16 `scale`,
+    scale: int = ONE
+    act: Activation = Activation.NONE  # and apply an activation, before the round
+
+
+class Retired(NamedTuple):
+    """Pipelined: one output in the evict tail, with the flags ORed over its op's outputs so far."""
+
+    op: Op
+    output: int
+    bank: AccState
+    dropped: bool
+    overflow: bool
+
+
+PIPELINE_FILL = 5  # pipelined: accept, FETCH0, LATCH0 before the first MAC; the tail after the last, up to done
+
+
+def op_cycles(op: Op, pipelined: bool = False, geometry: Geometry = Geometry(), mac_cycles: int | None = None) -> int:
+    """Cycles from `start` seen in IDLE to the next op's `start` seen in IDLE: FETCH0, LATCH0, kblock_cycles per k-block,
+    FLUSH (one cycle per PE pipeline stage), [DRAIN (drain_cycles), EVICT,] DONE, and the IDLE cycle after the
+    host drops `start`. A multi-output op runs its k-blocks once per output and drains (and evicts) each
+    output in turn. Pipelined and back to back, an op costs only its MAC cycles; a stream pays PIPELINE_FILL
+    (plus the extra PE stages and drain latency) once. With zero_skip, pass the op's `mac_cycles` from
+    zero_skip_cycles."""
+    outputs = max(op.outputs, 1)
+    if mac_cycles is None:
+        mac_cycles = geometry.kblock_cycles * op.kblocks * outputs
+    if pipelined:
+        return mac_cycles
+    if op.evict:
+        drain = outputs * (geometry.drain_cycles + 1)
+    else:
+        drain = outputs * geometry.drain_cycles if outputs > 1 else 0
+    return 4 + geometry.pipeline_stages + mac_cycles + drain
+
+
+def live_steps(a: np.ndarray, b: np.ndarray, lanes: int = 1, load: bool = False) -> int:
+    """Live-step mask of an A (rows, depth) and B (depth, cols) tile pair: bit s set when one of k-step s's
+    lanes has a nonzero (bf16 exponent != 0) A column and B row, and bit 0 when the pass `load`s its bank."""
+    nonzero = ((a >> 7) & 0xFF != 0).any(axis=0) & ((b >> 7) & 0xFF != 0).any(axis=1)
+    steps = nonzero.reshape(-1, lanes).any(axis=1)
+    return sum(1 << int(s) for s in np.flatnonzero(steps)) | int(load)
+
+
+def zero_skip_cycles(live: list[int], steps: int) -> tuple[int, int]:
+    """(MAC cycles, k-steps skipped) of a zero_skip op whose passes, in order, have live-step masks `live`:
+    each pass presents its live steps, waiting for the next non-empty tile to latch (one cycle after its
+    address, which follows the previous latch or pass change) before it ends."""
+    cur, skipped = live[0], steps - live[0].bit_count()
+    fetch, wait, ready = 1, True, False
+    cycles = 0
+    while True:
+        cycles += 1
+        rest = cur & (cur - 1)
+        if fetch < len(live) and not ready:
+            if wait:
+                wait = False
+            elif live[fetch]:
+                ready = True
+            else:
+                skipped += steps
+                fetch, wait = fetch + 1, True
+        if rest:
+            cur = rest
+        elif ready:
+            cur, skipped = live[fetch], skipped + steps - live[fetch].bit_count()
+            fetch, wait, ready = fetch + 1, True, False
+        elif fetch >= len(live):
+            return cycles, skipped
+        else:
+            cur = 0
+
+
+def lowest_step(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1 if mask else 0
+
+
+def word_to_tile(word: int, shape: tuple[int, ...] = (N, N)) -> np.ndarray:
+    """The tile in the low bits of a slot word (any padding above it is ignored)."""
+    count = int(np.prod(shape))
+    word &= (1 << 16 * count) - 1
+    return np.frombuffer(word.to_bytes(count * 2, "little"), dtype="<u2").reshape(shape).astype(np.uint16)
+
+
+def tile_to_word(tile: np.ndarray) -> int:
+    return int.from_bytes(tile.astype("<u2").tobytes(), "little")
+
+
+def empty_bank(shape: tuple[int, int] = (N, N)) -> AccState:
+    return AccState(np.zeros(shape, dtype=np.int64), np.zeros(shape, dtype=bool), np.zeros(shape, dtype=bool))
+
+
+class MMAUnitModel:
+    def __init__(self, geometry: Geometry = Geometry(), pipelined: bool = False):
+        assert not (pipelined and (geometry.drain_engines or geometry.zero_skip))
+        self.geometry = geometry
+        self.pipelined = pipelined
+        # inputs
+        self.start = 0
+        self.accumulate = 0
+        self.evict = 0
+        self.acc_d = 0
+        self.reuse_b = 0
+        self.outputs = 0
+        self.add_c = 0
+        self.scale_en = 0
+        self.scale = 0
+        self.act = 0
+        self.kblocks = 0
+        self.slot_a = 0
+        self.slot_b = 0
+        self.slot_c = 0
+        self.rd_data_a = 0
+        self.rd_data_b = 0
+        self.skipped = 0  # zero_skip: k-steps skipped (16-bit, wrapping)
+
+        # registers
+        self.state = State.IDLE
+        self.kb_mac = 0
+        self.kb_end = 0
+        self.out_mac = 0
+        self.out_end = 1
+        self.out_drain = 0  # sequential: the output draining / evicting
+        self.k = 0
+        self.mac_buf = 0
+        self.load_op = 0
+        self.acc_sel_r = 0  # FixedPE registers acc_sel; the drain and flags read this bank
+        self.c_tile = np.zeros(geometry.c_shape, dtype=np.uint16)  # epilogue: the C tile the drain took in
+        self.flags = (False, False)  # flags ORed over the outputs drained (pipelined: retired) so far
+        self.cur = Op(0, 0, 0, 0, False, False, 0)  # pipelined: fields captured on accept
+        self.nxt: Op | None = None  # pipelined: op accepted during the last pass
+        self.tail: list[Retired | None] = [None] * geometry.tail_cycles
+        self.a_tile = [np.zeros(geometry.a_shape, dtype=np.uint16) for _ in range(2)]
+        self.b_tile = [np.zeros(geometry.b_shape, dtype=np.uint16) for _ in range(2)]
+        # zero_skip: live-step masks per buffer, the pass fetched next, and whether it has latched
+        self.live = [0, 0]
+        self.pf = 0
+        self.next_ready = False
+        self.fetch_wait = False
+        self.b_file = [np.zeros(geometry.b_shape, dtype=np.uint16) for _ in range(geometry.max_kblocks)]
+        self.banks = [empty_bank(geometry.c_shape) for _ in range(ACC_BANKS)]
+        self.cycle = 0
+
+        # operands presented during this op's MAC cycles, per output
+        self._a_cols: list[list[np.ndarray]] = [[] for _ in range(geometry.max_outputs)]
+        self._b_rows: list[list[np.ndarray]] = [[] for _ in range(geometry.max_outputs)]
+
+    @property
+    def ready(self) -> int:
+        if self.state == State.IDLE:
+            return 1
+        return int(self.pipelined and self.state == State.MAC and self._last_pass() and self.k == 0)
+
+    @property
+    def done(self) -> int:
+        if self.pipelined:
+            return int(self.tail[-1] is not None and self.tail[-1].output + 1 == max(self.tail[-1].op.outputs, 1))
+        return int(self.state == State.DONE)
+
+    @property
+    def rd_addr_a(self) -> int:
+        if self.state == State.MAC and self.nxt is not None:
+            return self.nxt.slot_a
+        return (self._op().slot_a + self._prefetch()[0]) % self.geometry.slots
+
+    @property
+    def rd_addr_b(self) -> int:
+        if self.state == State.MAC and self.nxt is not None:
+            return self.nxt.slot_b
+        if self._reads_c():
+            return (self.slot_c + self.out_drain) % self.geometry.slots
+        if self._reuses_b(self._op()):
+            return self._op().slot_b
+        return (self._op().slot_b + self._b_index(*self._prefetch())) % self.geometry.slots
+
+    @property
+    def rd_en_a(self) -> int:
+        fetch = self._fetch()
+        return int(fetch is not None and fetch[0] == 0)
+
+    @property
+    def rd_en_b(self) -> int:
+        fetch = self._fetch()
+        if fetch is not None and not self._reuses_b(fetch[1]):
+            return 1
+        takes_c = self.state == State.DRAIN and self.k == self.geometry.drain_cycles - 2
+        return int(takes_c and self._reads_c() and bool(self.evict))
+
+    @property
+    def wr_en(self) -> int:
+        if self.pipelined:
+            return int(self.tail[-1] is not None and self.tail[-1].op.evict)
+        return int(self.state == State.EVICT)
+
+    @property
+    def wr_addr(self) -> int:
+        if not self.wr_en:
+            return 0
+        if self.pipelined:
+            return (self.tail[-1].op.slot_c + self.tail[-1].output) % self.geometry.slots
+        return (self.slot_c + self.out_drain) % self.geometry.slots
+
+    @property
+    def wr_data(self) -> int:
+        if not self.wr_en:
+            return 0
+        op = self.tail[-1].op if self.pipelined else self._op()
+        return tile_to_word(self._round(self._drained().value, op, self.c_tile))
+
+    @property
+    def any_dropped(self) -> int:
+        if self.pipelined:
+            return int(self.tail[-1] is not None and self.tail[-1].dropped)
+        return int(self.flags[0] or self._drained().dropped.any())
+
+    @property
+    def any_overflow(self) -> int:
+        if self.pipelined:
+            return int(self.tail[-1] is not None and self.tail[-1].overflow)
+        return int(self.flags[1] or self._drained().overflow.any())
+
+    def _op(self) -> Op:
+        """Fields of the op in flight: the live inputs, or pipelined, the ones captured on accept."""
+        return self.cur if self.pipelined else self._live_op()
+
+    def _live_op(self) -> Op:
+        return Op(
+            self.slot_a,
+            self.slot_b,
+            self.slot_c,
+            self.kblocks,
+            self.accumulate,
+            self.evict,
+            self.acc_d,
+            self.reuse_b,
+            self.outputs,
+            self.add_c,
+            self.scale_en,
+            self.scale,
+            self.act,
+        )
+
+    def _drained(self) -> AccState:
+        if self.pipelined:
+            return self.tail[-1].bank if self.tail[-1] is not None else empty_bank(self.geometry.c_shape)
+        if self.geometry.max_outputs > 1:  # split drain, following the output draining
+            return self.banks[(self._op().acc_d + self.out_drain) % ACC_BANKS]
+        return self.banks[self.acc_sel_r]
+
+    def _reads_c(self) -> bool:
+        """Sequential epilogue with add_c: rd_addr_b serves the draining output's C tile from FLUSH on."""
+        drain_states = (State.FLUSH, State.DRAIN, State.EVICT)
+        return self.geometry.epilogue and not self.pipelined and bool(self.add_c) and self.state in drain_states
+
+    def _fetch(self) -> tuple[int, Op] | None:
+        """(output, op) of the tile `tick` latches this cycle, if any: the output's B tile and its A k-block,
+        which is a fresh A read only for output 0."""
+        if self.state == State.LATCH0:
+            return 0, self._op()
+        if self.state != State.MAC:
+            return None
+        if self.geometry.zero_skip:
+            fetching = self.pf < self.kb_end * self.out_end and not self.next_ready and not self.fetch_wait
+            return (self.pf % self.out_end, self._op()) if fetching else None
+        if self.k == 1 and not self._last_pass():
+            return self._prefetch()[1], self._op()
+        if self.k == 2 and self.nxt is not None:
+            return 0, self.nxt
+        return None
+
+    def _last_pass(self) -> bool:
+        return self.kb_mac + 1 == self.kb_end and self.out_mac + 1 == self.out_end
+
+    def _prefetch(self) -> tuple[int, int]:
+        """(k-block, output) of the next pass: the next output's B against this A k-block, else the next k-block."""
+        if self.state != State.MAC:
+            return 0, 0
+        if self.geometry.zero_skip:
+            return divmod(self.pf, self.out_end)
+        if self.out_mac + 1 < self.out_end:
+            return self.kb_mac, self.out_mac + 1
+        return self.kb_mac + 1, 0
+
+    def _b_index(self, kb: int, output: int) -> int:
+        """B tile of (kb, output) relative to slot_b, which is also its b_file entry."""
+        return output * self.kb_end + kb
+
+    def _round(self, value: np.ndarray, op: Op, c: np.ndarray) -> np.ndarray:
+        """A drained bank as the unit writes it: rounded, or through the epilogue (C applies with add_c)."""
+        if not self.geometry.epilogue:
+            return round_to_bf16(value)
+        c = c if op.add_c and not self.pipelined else 0
+        return epilogue(value, c, op.scale if op.scale_en else ONE, Activation(op.act))
+
+    def _reuses_b(self, op: Op) -> bool:
+        return self.geometry.b_file and bool(op.reuse_b)
+
+    def _latch(self, buf: int, index: int, op: Op, load: bool = False) -> None:
+        """Latch B tile `index` of `op` and its A k-block: A from rd_data_a, B from rd_data_b (recorded in the
+        b_file) or the b_file (whose index saturates at its last entry, as the RTL Array does). With zero_skip,
+        also their live-step mask (`load`: the pass loads its bank)."""
+        if self.geometry.sparse_a:
+            self.a_tile[buf] = expand(
+                word_to_tile(self.rd_data_a, (self.geometry.a_bits // 16,)), self.geometry.a_shape
+            )
+        else:
+            self.a_tile[buf] = word_to_tile(self.rd_data_a, self.geometry.a_shape)
+        if self._reuses_b(op):
+            self.b_tile[buf] = self.b_file[min(index, len(self.b_file) - 1)]
+        else:
+            self.b_tile[buf] = word_to_tile(self.rd_data_b, self.geometry.b_shape)
+            if index < len(self.b_file):
+                self.b_file[index] = self.b_tile[buf]
+        if self.geometry.zero_skip:
+            self.live[buf] = live_steps(self.a_tile[buf], self.b_tile[buf], self.geometry.lanes, load)
+
+    def _retire(self, op: Op, output: int) -> AccState:
+        """Land an output's recorded products in its bank (the RTL has them there by the end of FLUSH)."""
+        bank = (op.acc_d + output) % ACC_BANKS
+        if not self._a_cols[output]:  # zero_skip: every step skipped, the bank accumulates nothing
+            return self.banks[bank]
+        a, b = np.stack(self._a_cols[output], axis=1), np.stack(self._b_rows[output], axis=0)
+        self.banks[bank] = mac(a, b, None if self.load_op else self.banks[bank], self.geometry.lanes)
+        self._a_cols[output], self._b_rows[output] = [], []
+        return self.banks[bank]
+
+    def _begin(self, op: Op, buf: int) -> None:
+        self.kb_mac = 0
+        self.kb_end = self.geometry.max_kblocks if op.kblocks == 0 else op.kblocks
+        self.mac_buf = buf
+        self.load_op = int(not op.accumulate)
+        self.flags = (False, False)
+        if self.geometry.max_outputs > 1:
+            self.out_mac, self.out_end, self.out_drain = 0, max(op.outputs, 1), 0
+        if self.pipelined:
+            self.cur = op
+
+    def _fetch_after(self, index: int) -> None:
+        self.pf, self.next_ready, self.fetch_wait = index + 1, False, True
+
+    def _present(self, out: int) -> None:
+        """Record the operands of k-step `k` for output `out` (with sparse_a, its dense span: the zeros the
+        compressed A leaves out add nothing, so the golden call sees the same sums)."""
+        per_step = self.geometry.depth // self.geometry.kblock_cycles
+        for kk in range(self.k * per_step, (self.k + 1) * per_step):
+            self._a_cols[out].append(self.a_tile[self.mac_buf][:, kk])
+            self._b_rows[out].append(self.b_tile[self.mac_buf][kk, :])
+
+    def _skip_mac(self) -> None:
+        """One zero_skip MAC cycle, as MMAUnit's skip_mac."""
+        steps, passes = self.geometry.kblock_cycles, self.kb_end * self.out_end
+        cur = self.live[self.mac_buf]
+        if cur >> self.k & 1:
+            self._present(self.out_mac)
+        rest = self.live[self.mac_buf] = cur & ~(1 << self.k)
+        latch = self.pf < passes and not self.next_ready and not self.fetch_wait
+        self.fetch_wait = False
+        if latch:
+            kb, out = divmod(self.pf, self.out_end)
+            self._latch(1 - self.mac_buf, self._b_index(kb, out), self._op(), bool(self.load_op) and kb == 0)
+            if self.live[1 - self.mac_buf]:
+                self.next_ready = True
+            else:
+                self._count_skipped(steps)
+                self._fetch_after(self.pf)
+        if rest:
+            self.k = lowest_step(rest)
+        elif self.next_ready:
+            self.mac_buf ^= 1
+            self.kb_mac, self.out_mac = divmod(self.pf, self.out_end)
+            self.k = lowest_step(self.live[self.mac_buf])
+            self._count_skipped(steps - self.live[self.mac_buf].bit_count())
+            self._fetch_after(self.pf)
+        elif self.pf >= passes:
+            for output in range(self.out_end):
+                self._retire(self._op(), output)
+            self.state = State.FLUSH
+            self.k = 0
+
+    def _count_skipped(self, count: int) -> None:
+        self.skipped = (self.skipped + count) & 0xFFFF
+
+    def tick(self) -> None:
+        state = self.state
+        accept = self.pipelined and self.start and self.ready
+        retired = None
+        if state == State.IDLE:
+            if self.start:
+                self.state = State.FETCH0
+                self._begin(self._live_op(), 0)
+        elif state == State.FETCH0:
+            self.state = State.LATCH0
+        elif state == State.LATCH0:
+            self._latch(0, 0, self._op(), bool(self.load_op))
+            self.k = 0
+            self.state = State.MAC
+            if self.geometry.zero_skip:
+                self.k = lowest_step(self.live[0])
+                self._count_skipped(self.geometry.kblock_cycles - self.live[0].bit_count())
+                self._fetch_after(0)
+        elif state == State.MAC and self.geometry.zero_skip:
+            self._skip_mac()
+        elif state == State.MAC:
+            out = self.out_mac
+            self._present(out)
+            if self.k == 1 and not self._last_pass():
+                self._latch(1 - self.mac_buf, self._b_index(*self._prefetch()), self._op())
+            if self.k == 2 and self.nxt is not None:
+                self._latch(1 - self.mac_buf, 0, self.nxt)
+            if self.k == self.geometry.kblock_cycles - 1:
+                if self.kb_mac + 1 == self.kb_end:
+                    bank = self._retire(self._op(), out)
+                    if self.pipelined:
+                        # the tail drains and evicts this output while MAC moves on, ORing its op's flags
+                        flags = (bool(bank.dropped.any()), bool(bank.overflow.any()))
+                        if out > 0:
+                            flags = (flags[0] or self.flags[0], flags[1] or self.flags[1])
+                        self.flags = flags
+                        retired = Retired(self.cur, out, bank, *flags)
+                self.k = 0
+                if self._last_pass() and not self.pipelined:
+                    self.state = State.FLUSH
+                elif self._last_pass():
+                    if self.nxt is not None:
+                        self._begin(self.nxt, 1 - self.mac_buf)
+                    else:
+                        self.state = State.IDLE
+                    self.nxt = None
+                else:
+                    self.kb_mac, self.out_mac = self._prefetch()
+                    self.mac_buf ^= 1
+            else:
+                self.k += 1
+            if accept:
+                self.nxt = self._live_op()
+        elif state == State.FLUSH:
+            self.k += 1
+            if self.k == self.geometry.pipeline_stages:
+                self.state = State.DRAIN if self.evict or self.out_end > 1 else State.DONE
+                self.k = 0
+        elif state == State.DRAIN:
+            if self.k == self.geometry.drain_cycles - 2:  # the epilogue takes its inputs in
+                self.c_tile = word_to_tile(self.rd_data_b, self.geometry.c_shape)
+            self.k += 1
+            if self.k == self.geometry.drain_cycles:
+                self.k = 0
+                if self.geometry.max_outputs > 1:
+                    bank = self._drained()
+                    self.flags = (self.flags[0] or bool(bank.dropped.any()), self.flags[1] or bool(bank.overflow.any()))
+                if self.evict:
+                    self.state = State.EVICT
+                elif self.out_drain + 1 == self.out_end:
+                    self.state = State.DONE
+                else:
+                    self.out_drain += 1
+        elif state == State.EVICT:
+            if self.out_drain + 1 == self.out_end:
+                self.state = State.DONE
+            else:
+                self.out_drain += 1
+                self.state = State.DRAIN
+        elif state == State.DONE:
+            if not self.start:
+                self.state = State.IDLE
+        self.acc_sel_r = (self._op().acc_d + self.out_mac) % ACC_BANKS
+        self.tail = [retired, *self.tail[:-1]]
+        self.cycle += 1
+
+    def run_op(self, op: Op, dsram) -> int:
+        """Execute `op` against a dsram.DSRAM as one transaction, through the host handshake back to IDLE (or
+        pipelined, issued back to back). Returns the op's cycle count (op_cycles)."""
+        assert self.state == State.IDLE
+        outputs = max(op.outputs, 1)
+        a_tiles = dsram.read_tiles("a", op.slot_a, op.kblocks)
+        a = a_tiles.swapaxes(0, 1).reshape(self.geometry.rows, -1)
+        count = outputs * op.kblocks  # B tiles, output-major from slot_b
+        if self._reuses_b(op):
+            b_tiles = np.stack([self.b_file[min(n, len(self.b_file) - 1)] for n in range(count)])
+        else:
+            b_tiles = dsram.read_tiles("b", op.slot_b, count)
+            self.b_file[: min(count, len(self.b_file))] = list(b_tiles[: len(self.b_file)])
+        self.flags = (False, False)
+        for output in range(outputs):
+            bank = (op.acc_d + output) % ACC_BANKS
+            b = b_tiles[output * op.kblocks : (output + 1) * op.kblocks].reshape(-1, self.geometry.cols)
+            self.banks[bank] = mac(a, b, self.banks[bank] if op.accumulate else None, self.geometry.lanes)
+            if op.evict:
+                slot_c = (op.slot_c + output) % self.geometry.slots
+                if self.geometry.epilogue and op.add_c and not self.pipelined:
+                    self.c_tile = dsram.read_tiles("b", slot_c, 1, self.geometry.c_shape)[0]
+                dsram.write_tile(slot_c, self._round(self.banks[bank].value, op, self.c_tile))
+            drained = self.banks[bank]
+            self.flags = (self.flags[0] or bool(drained.dropped.any()), self.flags[1] or bool(drained.overflow.any()))
+        # as seen at the op's done
+        self.acc_d = op.acc_d
+        self.acc_sel_r = bank
+        if self.geometry.max_outputs > 1:
+            self.out_mac = self.out_drain = outputs - 1
+            self.out_end = outputs
+        if self.pipelined:
+            self.cur = op
+            self.tail = [*self.tail[1:], Retired(op, outputs - 1, self.banks[bank], *self.flags)]
+        mac_cycles = None
+        if self.geometry.zero_skip:
+            lanes = self.geometry.lanes
+            live = [
+                live_steps(a_tiles[kb], b_tiles[out * op.kblocks + kb], lanes, not op.accumulate and kb == 0)
+                for kb in range(op.kblocks)
+                for out in range(outputs)
+            ]
+            mac_cycles, skipped = zero_skip_cycles(live, self.geometry.kblock_cycles)
+            self._count_skipped(skipped)
+        cycles = op_cycles(op, self.pipelined, self.geometry, mac_cycles)
+        self.cycle += cycles
+        return cycles
@@ -0,0 +1,85 @@
+from amaranth import *
+from amaranth.build import Platform
+from amaranth.lib import data, wiring
+from amaranth.lib.fifo import SyncFIFO
+from amaranth.lib.wiring import In, Out
+
+from mma_stream import Geometry, MMAUnit
+
+
+def in_flight(geometry: Geometry) -> int:
+    """Ops MMAUnit(pipelined) can hold past the FIFO: the one in MAC, the one accepted, and those in its tail
+    (ops are at least `kblock_cycles` apart)."""
+    return 2 + -(-geometry.tail_cycles // geometry.kblock_cycles)
+
+
+class MMAQueue(wiring.Component):
+    """Command FIFO in front of MMAUnit(pipelined=True), so ops issue back to back without host round-trips.
+
+    The host enqueues an op (the pipelined MMAUnit's op_fields, same shapes) on cmd_valid & cmd_ready. The
+    FIFO head is offered to the unit with start high and popped when the unit is ready, so the unit chains
+    from one op's last k-block into the next and prefetches its first tile there. Each completing op pulses `done` with its
+    any_dropped/any_overflow; `completed` counts them (wrapping) and `occupancy` counts ops enqueued but not
+    yet done. The D-SRAM ports are MMAUnit's."""
+
+    def __init__(self, entries: int = 4, geometry: Geometry = Geometry()):
+        assert entries >= 1
+        self.entries = entries
+        self.geometry = geometry
+        slot, tile = geometry.slot_bits, geometry.tile_bits
+        self.unit = MMAUnit(geometry, pipelined=True)
+        ports = self.unit.signature.members
+        self.op_layout = data.StructLayout({name: ports[name].shape for name in self.unit.op_fields})
+        super().__init__(
+            {
+                "cmd_valid": In(1),
+                "cmd_ready": Out(1),
+                **{name: In(self.op_layout.members[name]) for name in self.unit.op_fields},
+                "done": Out(1),
+                "any_dropped": Out(1),
+                "any_overflow": Out(1),
+                "completed": Out(16),
+                "occupancy": Out(range(entries + in_flight(geometry) + 1)),
+                "rd_addr_a": Out(slot),
+                "rd_addr_b": Out(slot),
+                "rd_en_a": Out(1),
+                "rd_en_b": Out(1),
+                "rd_data_a": In(tile),
+                "rd_data_b": In(tile),
+                "wr_addr": Out(slot),
+                "wr_data": Out(tile),
+                "wr_en": Out(1),
+            }
+        )
+
+    def elaborate(self, platform: Platform | None) -> Module:
+        m = Module()
+        m.submodules.fifo = fifo = SyncFIFO(width=self.op_layout.size, depth=self.entries)
+        m.submodules.unit = unit = self.unit
+
+        cmd = Signal(self.op_layout)
+        for name in self.unit.op_fields:
+            m.d.comb += getattr(cmd, name).eq(getattr(self, name))
+        m.d.comb += fifo.w_data.eq(cmd.as_value())
+        m.d.comb += fifo.w_en.eq(self.cmd_valid)
+        m.d.comb += self.cmd_ready.eq(fifo.w_rdy)
+
+        head = Signal(self.op_layout)
+        m.d.comb += head.as_value().eq(fifo.r_data)
+        for name in self.unit.op_fields:
+            m.d.comb += getattr(unit, name).eq(getattr(head, name))
+        m.d.comb += unit.start.eq(fifo.r_rdy)
+        m.d.comb += fifo.r_en.eq(unit.ready)
+
+        outputs = ("rd_addr_a", "rd_addr_b", "rd_en_a", "rd_en_b", "wr_addr", "wr_data", "wr_en")
+        for name in (*outputs, "done", "any_dropped", "any_overflow"):
+            m.d.comb += getattr(self, name).eq(getattr(unit, name))
+        m.d.comb += unit.rd_data_a.eq(self.rd_data_a)
+        m.d.comb += unit.rd_data_b.eq(self.rd_data_b)
+
+        enqueued = self.cmd_valid & self.cmd_ready
+        m.d.sync += self.occupancy.eq(self.occupancy + enqueued - unit.done)
+        with m.If(unit.done):
+            m.d.sync += self.completed.eq(self.completed + 1)
+
+        return m
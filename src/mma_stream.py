@@ -1,13 +1,128 @@
+from typing import NamedTuple
+
 from amaranth import *
-from amaranth.lib import enum, wiring
+from amaranth.lib import data, enum, wiring
 from amaranth.lib.wiring import In, Out
 
+from accumulator import ACC_BANKS
+from adder import Adder
 from bfloat16 import BFloat16
-from fixed_pe import FixedPE
+from epilogue import EPILOGUE_LATENCY, Activation, Epilogue
+from fixed_pe import LSB_EXP, WIDTH, FixedPE, lane_operands
+from shared_drain import SharedDrain, drain_cycles
+from sparse import GROUP, INDEX_BITS, KEEP, sparse_words
 
 N = 4
 TILE_BITS = N * N * 16  # one 4x4 BF16 sub-block per D-SRAM slot
 MAX_KBLOCKS = 16
+SLOTS = 64  # D-SRAM slots addressed by the 6-bit slot / rd_addr / wr_addr ports
+SLOT_BITS = 6
+KBLOCK_BITS = 4
+OP_FIELDS = (
+    "slot_a",
+    "slot_b",
+    "slot_c",
+    "kblocks",
+    "accumulate",
+    "evict",
+    "acc_d",
+    "reuse_b",
+    "outputs",
+    "add_c",
+    "scale_en",
+    "scale",
+    "act",
+)
+TAIL_CYCLES = 3  # pipelined: last MAC -> product lands -> drain_latch -> evict/done (+ extra PE stages)
+
+
+class Geometry(NamedTuple):
+    """Array and D-SRAM shape. The PE array is rows x cols and one k-block is `depth` MACs deep, so an op
+    multiplies rows x (depth * kblocks) A by (depth * kblocks) x cols B. A slot holds one A (rows x depth),
+    B (depth x cols) or C (rows x cols) tile, row-major from bit 0 and zero-padded to the largest of the
+    three. `pipeline_stages` is each FixedPE's; every stage past the first adds a cycle between the last MAC
+    and the drain. `drain_engines` > 0 replaces the per-PE drains with a SharedDrain of that many engines
+    (sequential MMAUnit only). `lanes` 2 or 4 makes the PEs dot-2 / dot-4, so a k-block takes depth / lanes
+    MAC cycles. `b_file` adds a register file of max_kblocks B tiles for weight-stationary ops (reuse_b).
+    `max_outputs` > 1 lets one op compute up to that many C tiles against the same A (the `outputs` field).
+    `epilogue` puts an Epilogue in front of every PE's round, for the add_c / scale / act op fields.
+    `zero_skip` makes the sequencer skip k-steps (and whole k-blocks) with no nonzero products (sequential
+    MMAUnit only). `sparse_a` makes A slots hold 2:4-compressed tiles (sparse.compress), which a k-block
+    MACs in depth / 2 cycles."""
+
+    rows: int = N
+    cols: int = N
+    depth: int = N
+    slot_bits: int = SLOT_BITS
+    kblock_bits: int = KBLOCK_BITS  # kblocks=0 encodes max_kblocks
+    pipeline_stages: int = 1
+    drain_engines: int = 0
+    lanes: int = 1
+    b_file: bool = False
+    max_outputs: int = 1
+    epilogue: bool = False
+    zero_skip: bool = False
+    sparse_a: bool = False
+
+    @property
+    def kblock_cycles(self) -> int:
+        """MAC cycles per k-block."""
+        return self.depth // self.lanes * KEEP // GROUP if self.sparse_a else self.depth // self.lanes
+
+    @property
+    def drain_latency(self) -> int:
+        """Cycles from a bank's raw value to its rounded (per-PE drain or epilogue) result."""
+        return EPILOGUE_LATENCY if self.epilogue else 1
+
+    @property
+    def drain_cycles(self) -> int:
+        """Sequential: DRAIN cycles before EVICT can write the rounded tile (with the epilogue, a first one
+        reads the C tile)."""
+        if self.epilogue:
+            return 1 + EPILOGUE_LATENCY
+        return drain_cycles(self.rows * self.cols, self.drain_engines)
+
+    @property
+    def tail_cycles(self) -> int:
+        """Pipelined: cycles from an op's last MAC to its done."""
+        return TAIL_CYCLES + self.pipeline_stages - 1 + self.drain_latency - 1
+
+    @property
+    def a_shape(self) -> tuple[int, int]:
+        return (self.rows, self.depth)
+
+    @property
+    def b_shape(self) -> tuple[int, int]:
+        return (self.depth, self.cols)
+
+    @property
+    def c_shape(self) -> tuple[int, int]:
+        return (self.rows, self.cols)
+
+    @property
+    def elems(self) -> int:
+        return max(self.rows * self.depth, self.depth * self.cols, self.rows * self.cols)
+
+    @property
+    def tile_bits(self) -> int:
+        return self.elems * 16
+
+    @property
+    def a_bits(self) -> int:
+        """Bits of an A tile in its slot (the low bits of rd_data_a MMAUnit reads)."""
+        return 16 * (sparse_words(self.rows, self.depth) if self.sparse_a else self.rows * self.depth)
+
+    @property
+    def slots(self) -> int:
+        return 1 << self.slot_bits
+
+    @property
+    def max_kblocks(self) -> int:
+        return 1 << self.kblock_bits
+
+    @property
+    def macs_per_cycle(self) -> int:
+        return self.rows * self.cols * self.lanes
 
 
 class State(enum.Enum, shape=3):
@@ -16,102 +131,407 @@ class State(enum.Enum, shape=3):
     LATCH0 = 2
     MAC = 3
     FLUSH = 4  # let the last pipelined product reach acc before draining
-    DRAIN = 5  # hold acc one cycle so the pipelined drain settles before EVICT reads result
+    DRAIN = 5  # hold acc while the pipelined drain settles before EVICT reads result (drain_cycles), per output
     EVICT = 6
     DONE = 7
 
 
 class MMAUnit(wiring.Component):
-    """K-block streaming MMA, double-buffered tile fetch, K = 4 * kblocks (kblocks=0 means 16)."""
+    """K-block streaming MMA, double-buffered tile fetch, K = depth * kblocks (kblocks=0 means max_kblocks).
+
+    Default (sequential) protocol: the host holds start and the op fields until done, then drops start and
+    the unit returns through IDLE. `ready` is high in IDLE.
+
+    Each tile's address goes out on rd_addr_a / rd_addr_b a cycle before the unit latches it and holds there;
+    rd_en_a / rd_en_b strobe in the latching cycle when the tile is a fresh read, which is what DSRAM counts.
+
+    With `pipelined`, op fields are captured when start & ready, and ready is also high in the first MAC cycle
+    of an op's last k-block: an op accepted there has its first tile prefetched into the idle buffer and
+    starts MAC straight after, so back-to-back ops sustain `kblock_cycles` per k-block. Each op's drain and evict
+    run in a `geometry.tail_cycles` tail beside the next op's MAC (the PEs drain the tail's bank via
+    drain_sel); `done` pulses for one cycle as the tail writes, with that op's flags on any_dropped/any_overflow.
+    An op must not read a slot that an op less than one op ahead of it still has to evict.
+
+    `adder` is the PEs' accumulate adder architecture. With `geometry.drain_engines`, the PEs expose raw
+    accumulators to a SharedDrain that rounds them into a result buffer during DRAIN, and EVICT writes from
+    that buffer. The tail has no room for a multi-cycle drain, so this is sequential only.
+
+    With `geometry.b_file`, every B tile an op fetches is also written to an on-array register file at its
+    k-block index, and an op with reuse_b takes its B tiles from there instead: rd_addr_b holds at slot_b, so
+    a run of reuse_b ops behind the op that loaded the weights reads only A from D-SRAM. A reuse_b op may use
+    at most as many k-blocks as that op loaded.
 
-    def __init__(self):
+    With `geometry.max_outputs` > 1, an op's `outputs` field (0 or 1 meaning one) makes it a multi-output op:
+    output n multiplies the same A by the B tiles at slot_b + n * kblocks into bank acc_d + n and evicts to
+    slot_c + n. Each A k-block is held while the outputs' B k-blocks pass through it, so rd_addr_a (and the
+    A read) changes once per k-block. Sequential, each output drains and evicts in turn after FLUSH (an op
+    without evict still walks DRAIN to collect flags); pipelined, each enters the tail as its last k-block
+    finishes. `done` pulses once per op, with flags ORed over its outputs' banks.
+
+    With `geometry.epilogue`, each PE's drain is an Epilogue and an evicting op writes act(scale * acc + c)
+    instead of the plain round: scale_en applies the bf16 `scale`, `act` picks an Activation, and add_c (a port
+    of the sequential unit only: pipelined, the read ports are busy with the next op's tiles) reads the C tile from
+    slot_c through rd_addr_b in DRAIN's first cycle, in place of a second pass over D-SRAM.
+
+    With `geometry.zero_skip`, latching a tile also latches its live-step mask: the k-steps whose A column
+    and B row both hold a nonzero (bf16 exponent != 0) value, plus the first step of a pass that loads its
+    bank. MAC presents only live steps and moves to the next pass as soon as the current one's are done and
+    the next tile has latched. The fetch runs ahead one pass at a time and fetches the one after in place of a
+    tile with no live steps, so an empty k-block costs no MAC cycles of its own: its tile read delays the next
+    latch by two cycles, hidden behind the current pass's live steps. `skipped` counts the k-steps that were
+    not presented (wrapping); against kblock_cycles * kblocks * outputs per op it gives the skip rate.
+
+    With `geometry.sparse_a`, A tiles are 2:4-compressed: MAC step s presents row i's s-th kept value to the
+    row's PEs, each of which muxes the B row its index picks out of the value's group of four, so a k-block
+    takes depth / 2 cycles. Skipping only products with a zero operand, the result and flags are bit-exact
+    with the dense tile's."""
+
+    def __init__(self, geometry: Geometry = Geometry(), pipelined: bool = False, adder: Adder = Adder()):
+        # the next k-block's tile latches at k==1, the next op's at k==2
+        assert geometry.depth % geometry.lanes == 0
+        assert geometry.kblock_cycles >= (3 if pipelined else 2)
+        assert not (pipelined and geometry.drain_engines)
+        assert 1 <= geometry.max_outputs <= ACC_BANKS
+        assert not (geometry.epilogue and geometry.drain_engines)
+        assert not (pipelined and geometry.zero_skip)
+        assert not geometry.sparse_a or (geometry.depth % GROUP == 0 and geometry.lanes == 1 and not geometry.zero_skip)
+        self.geometry = geometry
+        self.pipelined = pipelined
+        self.adder = adder
+        # the op's input ports; a pipelined unit has no add_c (see the epilogue note above)
+        self.op_fields = tuple(name for name in OP_FIELDS if not (pipelined and name == "add_c"))
+        slot, tile = geometry.slot_bits, geometry.tile_bits
         super().__init__(
             {
                 "start": In(1),
+                "ready": Out(1),
                 "accumulate": In(1),
                 "evict": In(1),
                 "acc_d": In(2),  # acc0..acc3; held stable from start to done
-                "kblocks": In(4),
-                "slot_a": In(6),
-                "slot_b": In(6),
-                "slot_c": In(6),
+                "reuse_b": In(1),  # B tiles from the b_file (weight-stationary) instead of D-SRAM
+                "kblocks": In(geometry.kblock_bits),
+                "outputs": In(range(geometry.max_outputs + 1)),  # C tiles from this op's A; 0 means 1
+                **({} if pipelined else {"add_c": In(1)}),  # epilogue: add the bf16 C tile at slot_c
+                "scale_en": In(1),  # epilogue: multiply by `scale`
+                "scale": In(16),  # bf16
+                "act": In(Activation),
+                "slot_a": In(slot),
+                "slot_b": In(slot),
+                "slot_c": In(slot),
                 "done": Out(1),
-                "rd_addr_a": Out(6),
-                "rd_addr_b": Out(6),
-                "rd_data_a": In(TILE_BITS),
-                "rd_data_b": In(TILE_BITS),
-                "wr_addr": Out(6),
-                "wr_data": Out(TILE_BITS),
+                "rd_addr_a": Out(slot),
+                "rd_addr_b": Out(slot),
+                "rd_en_a": Out(1),  # rd_data_a is taken in this cycle as a fresh tile
+                "rd_en_b": Out(1),  # rd_data_b is taken in this cycle as a fresh tile (or C tile)
+                "rd_data_a": In(tile),
+                "rd_data_b": In(tile),
+                "wr_addr": Out(slot),
+                "wr_data": Out(tile),
                 "wr_en": Out(1),
                 "any_dropped": Out(1),  # sticky for the selected acc_d chain: a product was out-of-window
                 "any_overflow": Out(1),  # sticky for the selected acc_d chain: an accumulator wrapped
+                "skipped": Out(16),  # zero_skip: k-steps skipped, wrapping
             }
         )
 
     def elaborate(self, _):
         m = Module()
+        rows, cols, depth = self.geometry.rows, self.geometry.cols, self.geometry.depth
+        lanes, steps = self.geometry.lanes, self.geometry.kblock_cycles
+        max_kblocks, max_outputs = self.geometry.max_kblocks, self.geometry.max_outputs
+        multi = max_outputs > 1
 
-        pe = Array(Array(FixedPE() for _ in range(N)) for _ in range(N))
-        for i in range(N):
-            for j in range(N):
+        # fields of the op in MAC: the live inputs (held by the host) or, pipelined, captured on accept
+        if self.pipelined:
+            op = {name: Signal.like(getattr(self, name), name=f"op_{name}") for name in self.op_fields}
+            nxt = {name: Signal.like(getattr(self, name), name=f"nxt_{name}") for name in self.op_fields}
+            nxt_valid = Signal()
+        else:
+            op = {name: getattr(self, name) for name in self.op_fields}
+
+        shared = self.geometry.drain_engines > 0
+        fused = self.geometry.epilogue
+        skip = self.geometry.zero_skip
+        pe = Array(
+            Array(
+                FixedPE(
+                    split_drain=self.pipelined or multi,
+                    adder=self.adder,
+                    pipeline_stages=self.geometry.pipeline_stages,
+                    drain=not (shared or fused),
+                    lanes=lanes,
+                )
+                for _ in range(cols)
+            )
+            for _ in range(rows)
+        )
+        state = Signal(State)
+        # +1 width so kb_mac / kb_end can hold max_kblocks when kblocks==0
+        kb_mac = Signal(range(max_kblocks + 1))
+        kb_end = Signal(range(max_kblocks + 1))
+        # the output whose B k-block is in MAC (out_end outputs), and sequentially, the one draining
+        if multi:
+            out_mac = Signal(range(max_outputs))
+            out_end = Signal(range(max_outputs + 1))
+            out_drain = Signal(range(max_outputs))
+        else:
+            out_mac, out_end, out_drain = C(0, 1), C(1, 1), C(0, 1)
+
+        for i in range(rows):
+            for j in range(cols):
                 m.submodules[f"pe_{i}_{j}"] = pe[i][j]
-                m.d.comb += pe[i][j].acc_sel.eq(self.acc_d)
+                m.d.comb += pe[i][j].acc_sel.eq((op["acc_d"] + out_mac)[:2])
 
-        a_tile = [[Signal(BFloat16, name=f"a_tile_{b}_{n}") for n in range(N * N)] for b in range(2)]
-        b_tile = [[Signal(BFloat16, name=f"b_tile_{b}_{n}") for n in range(N * N)] for b in range(2)]
+        sparse = self.geometry.sparse_a
+        a_depth = depth * KEEP // GROUP if sparse else depth  # A values per row
+        a_tile = [[Signal(BFloat16, name=f"a_tile_{b}_{n}") for n in range(rows * a_depth)] for b in range(2)]
+        if sparse:  # each kept A value's position in its group of B rows
+            a_index = [[Signal(INDEX_BITS, name=f"a_index_{b}_{n}") for n in range(rows * a_depth)] for b in range(2)]
+        b_tile = [[Signal(BFloat16, name=f"b_tile_{b}_{n}") for n in range(depth * cols)] for b in range(2)]
 
-        state = Signal(State)
-        # +1 width so kb_mac / kb_end can hold MAX_KBLOCKS (16) when kblocks==0
-        kb_mac = Signal(range(MAX_KBLOCKS + 1))
-        kb_end = Signal(range(MAX_KBLOCKS + 1))
-        k = Signal(range(N))
+        # k-step (lanes k each) in MAC; FLUSH and DRAIN cycles after it
+        k = Signal(range(max(steps, self.geometry.pipeline_stages, self.geometry.drain_cycles)))
         mac_buf = Signal()
-        first_mac = Signal()
-        prefetch_kb = Signal(range(MAX_KBLOCKS + 1))
+        load_op = Signal()  # the op loads its banks rather than accumulating into them
+        prefetch_kb = Signal(range(max_kblocks + 1))
+        prefetch_out = Signal(range(max_outputs))
+        last_kblock = Signal()
+        last_out = Signal()
+        last_pass = Signal()
+        m.d.comb += last_kblock.eq(kb_mac + 1 == kb_end)
+        m.d.comb += last_out.eq(out_mac + 1 == out_end)
+        m.d.comb += last_pass.eq(last_kblock & last_out)
+        if skip:
+            # the live-step mask of each buffer's tile (MAC clears a step's bit as it presents it), and the fetch
+            # pointer: the pass whose tile is fetched next (pf_done past the op's last), next_ready once it has
+            # latched, fetch_wait in the cycle its address first appears
+            live_steps = [Signal(steps, name=f"live_steps_{b}") for b in range(2)]
+            pf_kb = Signal(range(max_kblocks + 1))
+            pf_out = Signal(range(max_outputs)) if multi else C(0, 1)
+            pf_done, next_ready, fetch_wait = Signal(), Signal(), Signal()
+            skip_add = Signal(range(steps + 1))
 
         # TODO (cc4 spec gap): D-SRAM port shape (256-bit per slot per cycle, two read ports) -- pin in ISA.md.
         with m.Switch(state):
             with m.Case(State.MAC):
-                m.d.comb += prefetch_kb.eq(kb_mac + 1)
+                # the next pass: the next output's B against this A k-block, or the next k-block's first
+                if skip:
+                    m.d.comb += prefetch_kb.eq(pf_kb)
+                    m.d.comb += prefetch_out.eq(pf_out)
+                else:
+                    m.d.comb += prefetch_kb.eq(Mux(last_out, kb_mac + 1, kb_mac))
+                    if multi:
+                        m.d.comb += prefetch_out.eq(Mux(last_out, 0, out_mac + 1))
             with m.Default():
                 m.d.comb += prefetch_kb.eq(0)
-        m.d.comb += self.rd_addr_a.eq(self.slot_a + prefetch_kb)
-        m.d.comb += self.rd_addr_b.eq(self.slot_b + prefetch_kb)
+        # the B tile (output-major) the rd_data_b / b_file read serves, and whether that op reuses the file
+        b_kb = Signal(range(max_outputs * max_kblocks + 1))
+        b_reuse = Signal()
+        m.d.comb += b_kb.eq(prefetch_out * kb_end + prefetch_kb)
+        m.d.comb += self.rd_addr_a.eq(op["slot_a"] + prefetch_kb)
+        m.d.comb += self.rd_addr_b.eq(op["slot_b"] + b_kb)
+        if self.geometry.b_file:
+            m.d.comb += b_reuse.eq(op["reuse_b"])
+            with m.If(op["reuse_b"]):
+                m.d.comb += self.rd_addr_b.eq(op["slot_b"])
+        if self.pipelined:
+            with m.If((state == State.MAC) & nxt_valid):
+                m.d.comb += self.rd_addr_a.eq(nxt["slot_a"])
+                m.d.comb += self.rd_addr_b.eq(nxt["slot_b"])
+                m.d.comb += b_kb.eq(0)
+                if self.geometry.b_file:
+                    m.d.comb += b_reuse.eq(nxt["reuse_b"])
+        if fused and not self.pipelined:
+            # the C tile of the output draining, from FLUSH on, read in DRAIN's first cycle
+            with m.If(op["add_c"] & ((state == State.FLUSH) | (state == State.DRAIN) | (state == State.EVICT))):
+                m.d.comb += self.rd_addr_b.eq(op["slot_c"] + out_drain)
+
+        b_bits = depth * cols * 16
+        b_data = Signal(b_bits)
+        latching = Signal()
+        if self.geometry.b_file:
+            b_file = Array(Signal(b_bits, name=f"b_file{kb}") for kb in range(max_kblocks))
+            m.d.comb += b_data.eq(Mux(b_reuse, b_file[b_kb], self.rd_data_b[:b_bits]))
+            with m.If(latching & ~b_reuse & (b_kb < max_kblocks)):
+                m.d.sync += b_file[b_kb].eq(self.rd_data_b[:b_bits])
+        else:
+            m.d.comb += b_data.eq(self.rd_data_b[:b_bits])
+        # a pass re-latches the A k-block its outputs share from the held read; reuse_b takes B from the b_file
+        m.d.comb += self.rd_en_a.eq(latching & (prefetch_out == 0))
+        m.d.comb += self.rd_en_b.eq(latching & ~b_reuse)
+        if fused and not self.pipelined:
+            with m.If(op["add_c"] & self.evict & (state == State.DRAIN) & (k == self.geometry.drain_cycles - 2)):
+                m.d.comb += self.rd_en_b.eq(1)  # the epilogue takes its C tile in
+
+        if skip:
+            # the incoming tile's live steps: some lane's A column and B row both have a nonzero exponent
+            def nonzero(word: Value, n: int) -> Value:
+                return word[n * 16 + 7 : n * 16 + 15].any()
+
+            a_nz = [Cat(nonzero(self.rd_data_a, i * depth + kk) for i in range(rows)).any() for kk in range(depth)]
+            b_nz = [Cat(nonzero(b_data, kk * cols + j) for j in range(cols)).any() for kk in range(depth)]
+            fetched = Signal(steps)
+            for s in range(steps):
+                m.d.comb += fetched[s].eq(Cat(a_nz[kk] & b_nz[kk] for kk in range(s * lanes, (s + 1) * lanes)).any())
+            with m.If(load_op & (prefetch_kb == 0)):
+                m.d.comb += fetched[0].eq(1)  # the bank loads on its first MAC, live or not
+
+        def first_step(mask: Value) -> Value:
+            index = C(0, range(steps))
+            for s in reversed(range(steps)):
+                index = Mux(mask[s], s, index)
+            return index
+
+        def popcount(mask: Value) -> Value:
+            return sum(mask[s] for s in range(steps))
 
         with m.Switch(k):
-            for k_val in range(N):
+            for k_val in range(steps):
                 with m.Case(k_val):
-                    for i in range(N):
-                        for j in range(N):
-                            a_sel = Mux(
-                                mac_buf, a_tile[1][i * N + k_val].as_value(), a_tile[0][i * N + k_val].as_value()
-                            )
-                            b_sel = Mux(
-                                mac_buf, b_tile[1][k_val * N + j].as_value(), b_tile[0][k_val * N + j].as_value()
-                            )
-                            m.d.comb += pe[i][j].a.as_value().eq(a_sel)
-                            m.d.comb += pe[i][j].b.as_value().eq(b_sel)
+                    for i in range(rows):
+                        for j in range(cols):
+                            for lane, (a, b) in enumerate(lane_operands(pe[i][j])):
+                                kk = k_val * lanes + lane
+                                a_idx, b_idx = i * a_depth + kk, kk * cols + j
+                                a_sel = Mux(mac_buf, a_tile[1][a_idx].as_value(), a_tile[0][a_idx].as_value())
+                                if sparse:
+                                    group = [(kk // KEEP * GROUP + r) * cols + j for r in range(GROUP)]
+                                    index = Mux(mac_buf, a_index[1][a_idx], a_index[0][a_idx])
+                                    b_sel = Array(
+                                        Mux(mac_buf, b_tile[1][n].as_value(), b_tile[0][n].as_value()) for n in group
+                                    )[index]
+                                else:
+                                    b_sel = Mux(mac_buf, b_tile[1][b_idx].as_value(), b_tile[0][b_idx].as_value())
+                                m.d.comb += a.as_value().eq(a_sel)
+                                m.d.comb += b.as_value().eq(b_sel)
 
         def set_all(load, enable):
-            for i in range(N):
-                for j in range(N):
+            for i in range(rows):
+                for j in range(cols):
                     m.d.comb += pe[i][j].load.eq(load)
                     m.d.comb += pe[i][j].enable.eq(enable)
 
         def latch_buf(buf_idx: int):
-            for n in range(N * N):
+            for n in range(rows * a_depth):
                 m.d.sync += a_tile[buf_idx][n].as_value().eq(self.rd_data_a[n * 16 : (n + 1) * 16])
-                m.d.sync += b_tile[buf_idx][n].as_value().eq(self.rd_data_b[n * 16 : (n + 1) * 16])
+                if sparse:
+                    at = rows * a_depth * 16 + n * INDEX_BITS
+                    m.d.sync += a_index[buf_idx][n].eq(self.rd_data_a[at : at + INDEX_BITS])
+            for n in range(depth * cols):
+                m.d.sync += b_tile[buf_idx][n].as_value().eq(b_data[n * 16 : (n + 1) * 16])
+            if skip:
+                m.d.sync += live_steps[buf_idx].eq(fetched)
+            m.d.comb += latching.eq(1)
+
+        def fetch_after(kb: Value, out: Value):
+            """Point the fetch at the pass after (kb, out), or past the op's last pass."""
+            m.d.sync += pf_done.eq((kb + 1 == kb_end) & (out + 1 == out_end))
+            m.d.sync += next_ready.eq(0)
+            m.d.sync += fetch_wait.eq(1)
+            with m.If(out + 1 == out_end):
+                m.d.sync += pf_kb.eq(kb + 1)
+                if multi:
+                    m.d.sync += pf_out.eq(0)
+            if multi:
+                with m.Else():
+                    m.d.sync += pf_kb.eq(kb)
+                    m.d.sync += pf_out.eq(out + 1)
+
+        def skip_mac():
+            """MAC with zero_skip: present the current buffer's live steps in order while the fetch runs ahead."""
+            cur = Mux(mac_buf, live_steps[1], live_steps[0])
+            presenting = cur.bit_select(k, 1)
+            load = load_op & (kb_mac == 0) & (k == 0)
+            set_all(load=load & presenting, enable=~load & presenting)
+            rest = Signal(steps)
+            m.d.comb += rest.eq(cur & ~(C(1, steps) << k))
+            with m.If(mac_buf == 0):
+                m.d.sync += live_steps[0].eq(rest)
+            with m.Else():
+                m.d.sync += live_steps[1].eq(rest)
+
+            # the tile latches one cycle after its address appears; an empty one is dropped for the next pass's
+            latch_now = ~pf_done & ~next_ready & ~fetch_wait
+            m.d.sync += fetch_wait.eq(0)
+            with m.If(latch_now):
+                with m.If(mac_buf == 0):
+                    latch_buf(1)
+                with m.Else():
+                    latch_buf(0)
+                with m.If(fetched != 0):
+                    m.d.sync += next_ready.eq(1)
+                with m.Else():
+                    m.d.comb += skip_add.eq(steps)
+                    fetch_after(pf_kb, pf_out)
+
+            next_live = Mux(next_ready, Mux(mac_buf, live_steps[0], live_steps[1]), fetched)
+            with m.If(rest != 0):
+                m.d.sync += k.eq(first_step(rest))
+            with m.Elif(next_ready | (latch_now & (fetched != 0))):
+                m.d.sync += mac_buf.eq(~mac_buf)
+                m.d.sync += kb_mac.eq(pf_kb)
+                if multi:
+                    m.d.sync += out_mac.eq(pf_out)
+                m.d.sync += k.eq(first_step(next_live))
+                m.d.comb += skip_add.eq(steps - popcount(next_live))
+                fetch_after(pf_kb, pf_out)
+            with m.Elif(pf_done | (latch_now & (pf_kb + 1 == kb_end) & (pf_out + 1 == out_end))):
+                m.d.sync += state.eq(State.FLUSH)
+                m.d.sync += k.eq(0)
+
+        if shared:
+            m.submodules.drain = drain = SharedDrain(rows * cols, self.geometry.drain_engines, WIDTH, LSB_EXP)
+            m.d.comb += drain.run.eq(state == State.DRAIN)
+            for i in range(rows):
+                for j in range(cols):
+                    m.d.comb += drain.values[i * cols + j].eq(pe[i][j].value)
+            results = [drain.results[n] for n in range(rows * cols)]
+        elif fused:
+            epilogues = [Epilogue() for _ in range(rows * cols)]
+            for i in range(rows):
+                for j in range(cols):
+                    n = i * cols + j
+                    m.submodules[f"epilogue_{i}_{j}"] = epilogues[n]
+                    m.d.comb += epilogues[n].value.eq(pe[i][j].value)
+                    m.d.comb += epilogues[n].c.as_value().eq(self.rd_data_b[n * 16 : (n + 1) * 16])
+            results = [e.result for e in epilogues]
+        else:
+            results = [pe[i][j].result for i in range(rows) for j in range(cols)]
+
+        def set_epilogue(add_c, scale_en, scale, act):
+            for e in epilogues:
+                m.d.comb += [e.add_c.eq(add_c), e.scale_en.eq(scale_en), e.scale.as_value().eq(scale), e.act.eq(act)]
+
+        def write_results():
+            for n, result in enumerate(results):
+                m.d.comb += self.wr_data[n * 16 : (n + 1) * 16].eq(result.as_value())
+
+        def begin(fields, buf):
+            """Start MAC bookkeeping for the op described by `fields` (live inputs or the captured next op)."""
+            m.d.sync += kb_mac.eq(0)
+            m.d.sync += kb_end.eq(Mux(fields["kblocks"] == 0, max_kblocks, fields["kblocks"]))
+            m.d.sync += mac_buf.eq(buf)
+            m.d.sync += load_op.eq(~fields["accumulate"])
+            if multi:
+                m.d.sync += out_mac.eq(0)
+                m.d.sync += out_end.eq(Mux(fields["outputs"] == 0, 1, fields["outputs"]))
+                m.d.sync += out_drain.eq(0)
+            if self.pipelined:
+                for name in self.op_fields:
+                    m.d.sync += op[name].eq(fields[name])
+
+        live = {name: getattr(self, name) for name in self.op_fields}
+        m.d.comb += self.ready.eq(state == State.IDLE)
+        if self.pipelined:
+            with m.If((state == State.MAC) & last_pass & (k == 0)):
+                m.d.comb += self.ready.eq(1)
 
         with m.Switch(state):
             with m.Case(State.IDLE):
                 set_all(load=0, enable=0)
                 with m.If(self.start):
                     m.d.sync += state.eq(State.FETCH0)
-                    m.d.sync += kb_mac.eq(0)
-                    m.d.sync += kb_end.eq(Mux(self.kblocks == 0, MAX_KBLOCKS, self.kblocks))
-                    m.d.sync += mac_buf.eq(0)
-                    m.d.sync += first_mac.eq(~self.accumulate)
+                    begin(live, 0)
 
             with m.Case(State.FETCH0):
                 set_all(load=0, enable=0)
@@ -120,48 +540,94 @@ class MMAUnit(wiring.Component):
             with m.Case(State.LATCH0):
                 set_all(load=0, enable=0)
                 latch_buf(0)
-                m.d.sync += k.eq(0)
                 m.d.sync += state.eq(State.MAC)
+                if skip:
+                    m.d.sync += k.eq(first_step(fetched))
+                    m.d.comb += skip_add.eq(steps - popcount(fetched))
+                    fetch_after(C(0, 1), C(0, 1))
+                else:
+                    m.d.sync += k.eq(0)
 
             with m.Case(State.MAC):
-                set_all(load=first_mac, enable=~first_mac)
-                m.d.sync += first_mac.eq(0)
-
-                # Prefetch of kb_mac+1 lands one cycle after rd_addr appears,
-                # which is k==1 (rd_addr is combinational from prefetch_kb).
-                with m.If((k == 1) & (kb_mac + 1 < kb_end)):
-                    with m.If(mac_buf == 0):
-                        latch_buf(1)
-                    with m.Else():
-                        latch_buf(0)
+                if skip:
+                    skip_mac()
+                else:
+                    load = load_op & (kb_mac == 0) & (k == 0)  # each output's first MAC
+                    set_all(load=load, enable=~load)
+
+                    # Prefetch of the next pass lands one cycle after rd_addr appears,
+                    # which is k==1 (rd_addr is combinational from prefetch_kb).
+                    with m.If((k == 1) & ~last_pass):
+                        with m.If(mac_buf == 0):
+                            latch_buf(1)
+                        with m.Else():
+                            latch_buf(0)
 
-                with m.If(k == N - 1):
-                    with m.If(kb_mac + 1 == kb_end):
-                        m.d.sync += state.eq(State.FLUSH)
+                    if self.pipelined:
+                        with m.If(self.ready & self.start):
+                            m.d.sync += nxt_valid.eq(1)
+                            for name in self.op_fields:
+                                m.d.sync += nxt[name].eq(live[name])
+                        # the next op's first tile: address from k==1, latched at k==2 (tolerates 1-cycle reads)
+                        with m.If((k == 2) & nxt_valid):
+                            with m.If(mac_buf == 0):
+                                latch_buf(1)
+                            with m.Else():
+                                latch_buf(0)
+
+                    with m.If(k == steps - 1):
+                        with m.If(last_pass):
+                            if self.pipelined:
+                                m.d.sync += k.eq(0)
+                                m.d.sync += nxt_valid.eq(0)
+                                with m.If(nxt_valid):
+                                    begin(nxt, ~mac_buf)
+                                with m.Else():
+                                    m.d.sync += state.eq(State.IDLE)
+                            else:
+                                m.d.sync += state.eq(State.FLUSH)
+                                m.d.sync += k.eq(0)
+                        with m.Else():
+                            if multi:
+                                m.d.sync += out_mac.eq(Mux(last_out, 0, out_mac + 1))
+                            m.d.sync += kb_mac.eq(prefetch_kb)
+                            m.d.sync += mac_buf.eq(~mac_buf)
+                            m.d.sync += k.eq(0)
                     with m.Else():
-                        m.d.sync += kb_mac.eq(kb_mac + 1)
-                        m.d.sync += mac_buf.eq(~mac_buf)
-                        m.d.sync += k.eq(0)
-                with m.Else():
-                    m.d.sync += k.eq(k + 1)
+                        m.d.sync += k.eq(k + 1)
 
             with m.Case(State.FLUSH):
                 set_all(load=0, enable=0)
-                m.d.sync += state.eq(Mux(self.evict, State.DRAIN, State.DONE))
+                m.d.sync += k.eq(k + 1)
+                with m.If(k == self.geometry.pipeline_stages - 1):
+                    m.d.sync += state.eq(Mux(self.evict | (out_end > 1), State.DRAIN, State.DONE))
+                    m.d.sync += k.eq(0)
 
             with m.Case(State.DRAIN):
                 set_all(load=0, enable=0)
-                m.d.sync += state.eq(State.EVICT)
+                m.d.sync += k.eq(k + 1)
+                with m.If(k == self.geometry.drain_cycles - 1):
+                    m.d.sync += k.eq(0)
+                    with m.If(self.evict):
+                        m.d.sync += state.eq(State.EVICT)
+                    with m.Elif(out_drain + 1 == out_end):
+                        m.d.sync += state.eq(State.DONE)
+                    if multi:
+                        with m.Else():
+                            m.d.sync += out_drain.eq(out_drain + 1)
 
             with m.Case(State.EVICT):
-                # TODO: epilogue (add_en + slot_c read; scale_en; act_sel) -- currently round-and-write only
+                # write_results rounds through the Epilogue when the geometry has one
                 set_all(load=0, enable=0)
-                m.d.comb += self.wr_addr.eq(self.slot_c)
+                m.d.comb += self.wr_addr.eq(self.slot_c + out_drain)
                 m.d.comb += self.wr_en.eq(1)
-                for i in range(N):
-                    for j in range(N):
-                        m.d.comb += self.wr_data[(i * N + j) * 16 : (i * N + j + 1) * 16].eq(pe[i][j].result.as_value())
-                m.d.sync += state.eq(State.DONE)
+                write_results()
+                with m.If(out_drain + 1 == out_end):
+                    m.d.sync += state.eq(State.DONE)
+                if multi:
+                    with m.Else():
+                        m.d.sync += out_drain.eq(out_drain + 1)
+                        m.d.sync += state.eq(State.DRAIN)
 
             with m.Case(State.DONE):
                 set_all(load=0, enable=0)
@@ -169,7 +635,70 @@ class MMAUnit(wiring.Component):
                 with m.If(~self.start):
                     m.d.sync += state.eq(State.IDLE)
 
-        m.d.comb += self.any_dropped.eq(Cat(pe[i][j].any_dropped for i in range(N) for j in range(N)).any())
-        m.d.comb += self.any_overflow.eq(Cat(pe[i][j].any_overflow for i in range(N) for j in range(N)).any())
+        if skip:
+            m.d.sync += self.skipped.eq(self.skipped + skip_add)
+
+        any_dropped = Cat(pe[i][j].any_dropped for i in range(rows) for j in range(cols)).any()
+        any_overflow = Cat(pe[i][j].any_overflow for i in range(rows) for j in range(cols)).any()
+        if not self.pipelined:
+            if fused:
+                set_epilogue(op["add_c"], op["scale_en"], op["scale"], op["act"])
+            if not multi:
+                m.d.comb += self.any_dropped.eq(any_dropped)
+                m.d.comb += self.any_overflow.eq(any_overflow)
+                return m
+            # the banks drain in turn: collect each one's flags as its DRAIN ends
+            for i in range(rows):
+                for j in range(cols):
+                    m.d.comb += pe[i][j].drain_sel.eq((op["acc_d"] + out_drain)[:2])
+            dropped_r, overflow_r = Signal(), Signal()
+            with m.If((state == State.IDLE) & self.start):
+                m.d.sync += dropped_r.eq(0)
+                m.d.sync += overflow_r.eq(0)
+            with m.If((state == State.DRAIN) & (k == self.geometry.drain_cycles - 1)):
+                m.d.sync += dropped_r.eq(dropped_r | any_dropped)
+                m.d.sync += overflow_r.eq(overflow_r | any_overflow)
+            m.d.comb += self.any_dropped.eq(dropped_r | any_dropped)
+            m.d.comb += self.any_overflow.eq(overflow_r | any_overflow)
+            return m
+
+        # tail[0]: the output whose last product lands this cycle (with extra PE stages, pipeline_stages - 1
+        # entries later); drain_at (tail[-2], or further back for a longer drain latency): its bank enters the
+        # drain (flags sampled here, before a following op can reload the bank, and ORed over the op's
+        # outputs); tail[-1]: evict, and done on the last output
+        layout = {"valid": 1, "evict": 1, "slot_c": self.geometry.slot_bits, "acc_d": 2, "first": 1, "last": 1}
+        entry = {
+            "valid": 1,
+            "evict": op["evict"],
+            "slot_c": op["slot_c"] + out_mac,
+            "acc_d": op["acc_d"] + out_mac,
+            "first": out_mac == 0,
+            "last": last_out,
+        }
+        if fused:
+            layout |= {"scale_en": 1, "scale": 16, "act": Activation}
+            entry |= {name: op[name] for name in ("scale_en", "scale", "act")}
+        tail = [Signal(data.StructLayout(layout), name=f"tail{n}") for n in range(self.geometry.tail_cycles)]
+        with m.If((state == State.MAC) & last_kblock & (k == steps - 1)):
+            for name, value in entry.items():
+                m.d.sync += getattr(tail[0], name).eq(value)
+        with m.Else():
+            m.d.sync += tail[0].valid.eq(0)
+        for n in range(1, len(tail)):
+            m.d.sync += tail[n].eq(tail[n - 1])
+        drain_at = tail[-1 - self.geometry.drain_latency]
+        for i in range(rows):
+            for j in range(cols):
+                m.d.comb += pe[i][j].drain_sel.eq(drain_at.acc_d)
+        if fused:
+            set_epilogue(0, drain_at.scale_en, drain_at.scale, drain_at.act)
+        with m.If(drain_at.valid):
+            m.d.sync += self.any_dropped.eq(any_dropped | (self.any_dropped & ~drain_at.first))
+            m.d.sync += self.any_overflow.eq(any_overflow | (self.any_overflow & ~drain_at.first))
 
+        m.d.comb += self.done.eq(tail[-1].valid & tail[-1].last)
+        m.d.comb += self.wr_en.eq(tail[-1].valid & tail[-1].evict)
+        with m.If(self.wr_en):
+            m.d.comb += self.wr_addr.eq(tail[-1].slot_c)
+            write_results()
         return m
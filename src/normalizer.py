@@ -3,21 +3,30 @@ from amaranth.build import Platform
 from amaranth.lib import wiring
 from amaranth.lib.wiring import In, Out
 
+from parallel_prefix import LeadingZeroCounter
+
 
 class Normalizer(wiring.Component):
-    def __init__(self, width: int = 26):
+    def __init__(self, width: int = 26, detect: bool = False):
+        """value_out = value_in << shift_amount. With `detect`, shift_amount is an output instead: a
+        LeadingZeroCounter finds it, so value_out has its leading one at the top (0 stays 0)."""
         self.width = width
         self.shift_bits = (width - 1).bit_length()
+        self.detect = detect
 
         super().__init__(
             {
                 "value_in": In(width),
-                "shift_amount": In(self.shift_bits),
+                "shift_amount": (Out if detect else In)(self.shift_bits),
                 "value_out": Out(width),
             }
         )
 
     def elaborate(self, platform: Platform | None) -> Module:
         m = Module()
+        if self.detect:
+            m.submodules.lzc = lzc = LeadingZeroCounter(self.width)
+            m.d.comb += lzc.value.eq(self.value_in)
+            m.d.comb += self.shift_amount.eq(lzc.count)
         m.d.comb += self.value_out.eq(self.value_in << self.shift_amount)
         return m
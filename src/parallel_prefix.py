@@ -1,10 +1,15 @@
+from abc import ABC, abstractmethod
+
 from amaranth import *
 from amaranth.build import Platform
 from amaranth.lib import wiring
 from amaranth.lib.wiring import In, Out
 
 
-class KoggeStone(wiring.Component):
+class PrefixNetwork(wiring.Component, ABC):
+    """Carry network over per-bit generate/propagate. Subclasses pick the topology by listing, per level,
+    the (i, j) pairs where node i absorbs the group ending at node j; every other node passes through."""
+
     def __init__(self, width: int = 26):
         self.width = width
 
@@ -17,39 +22,68 @@ class KoggeStone(wiring.Component):
             }
         )
 
+    @classmethod
+    @abstractmethod
+    def levels(cls, width: int) -> list[list[tuple[int, int]]]: ...
+
     def elaborate(self, platform: Platform | None) -> Module:
         m = Module()
 
-        levels = (self.width - 1).bit_length()
+        levels = self.levels(self.width)
 
-        g = [[Signal(name=f"g_{lvl}_{i}") for i in range(self.width)] for lvl in range(levels + 1)]
-        p = [[Signal(name=f"p_{lvl}_{i}") for i in range(self.width)] for lvl in range(levels + 1)]
-
-        for i in range(self.width):
-            m.d.comb += g[0][i].eq(self.generate[i])
-            m.d.comb += p[0][i].eq(self.propagate[i])
-
-        for lvl in range(levels):
-            span = 1 << lvl
-            for i in range(self.width):
-                if i < span:
-                    m.d.comb += g[lvl + 1][i].eq(g[lvl][i])
-                    m.d.comb += p[lvl + 1][i].eq(p[lvl][i])
-                else:
-                    m.d.comb += g[lvl + 1][i].eq(g[lvl][i] | (p[lvl][i] & g[lvl][i - span]))
-                    m.d.comb += p[lvl + 1][i].eq(p[lvl][i] & p[lvl][i - span])
+        # pass-through nodes keep their previous signal; only combining nodes get a new one
+        g, p = list(self.generate), list(self.propagate)
+        for lvl, pairs in enumerate(levels):
+            g_next, p_next = g[:], p[:]
+            for i, j in pairs:
+                g_next[i], p_next[i] = Signal(name=f"g_{lvl + 1}_{i}"), Signal(name=f"p_{lvl + 1}_{i}")
+                m.d.comb += g_next[i].eq(g[i] | (p[i] & g[j]))
+                m.d.comb += p_next[i].eq(p[i] & p[j])
+            g, p = g_next, p_next
 
         m.d.comb += self.carries[0].eq(self.carry_in)
 
         for i in range(self.width):
-            m.d.comb += self.carries[i + 1].eq(g[levels][i] | (p[levels][i] & self.carry_in))
+            m.d.comb += self.carries[i + 1].eq(g[i] | (p[i] & self.carry_in))
 
         return m
 
 
-class KoggeStoneAdder(wiring.Component):
-    def __init__(self, width: int = 8):
+class KoggeStone(PrefixNetwork):
+    """log2(width) levels, every node combines at every level: minimum depth and fan-out, most wiring."""
+
+    @classmethod
+    def levels(cls, width: int) -> list[list[tuple[int, int]]]:
+        spans = [1 << lvl for lvl in range((width - 1).bit_length())]
+        return [[(i, i - span) for i in range(span, width)] for span in spans]
+
+
+class Sklansky(PrefixNetwork):
+    """log2(width) levels like Kogge-Stone with far fewer nodes; the group's top node fans out to up to half the
+    bits at the last level."""
+
+    @classmethod
+    def levels(cls, width: int) -> list[list[tuple[int, int]]]:
+        spans = [1 << lvl for lvl in range((width - 1).bit_length())]
+        return [[(i, (i // span) * span - 1) for i in range(width) if i & span] for span in spans]
+
+
+class BrentKung(PrefixNetwork):
+    """An up-sweep of power-of-two groups, then a down-sweep filling in the rest: about 2 log2(width) levels,
+    fewest nodes and fan-out 2."""
+
+    @classmethod
+    def levels(cls, width: int) -> list[list[tuple[int, int]]]:
+        spans = [1 << lvl for lvl in range((width - 1).bit_length())]
+        up = [[(i, i - span) for i in range(2 * span - 1, width, 2 * span)] for span in spans]
+        down = [[(i, i - span) for i in range(3 * span - 1, width, 2 * span)] for span in reversed(spans[:-1])]
+        return [level for level in up + down if level]
+
+
+class PrefixAdder(wiring.Component):
+    def __init__(self, width: int = 8, network: type[PrefixNetwork] = KoggeStone):
         self.width = width
+        self.network = network
 
         super().__init__(
             {
@@ -64,7 +98,7 @@ class KoggeStoneAdder(wiring.Component):
     def elaborate(self, platform: Platform | None) -> Module:
         m = Module()
 
-        m.submodules.prefix = prefix = KoggeStone(width=self.width)
+        m.submodules.prefix = prefix = self.network(width=self.width)
 
         generate = Signal(self.width)
         propagate = Signal(self.width)
@@ -85,6 +119,21 @@ class KoggeStoneAdder(wiring.Component):
         return m
 
 
+class KoggeStoneAdder(PrefixAdder):
+    def __init__(self, width: int = 8):
+        super().__init__(width, KoggeStone)
+
+
+class SklanskyAdder(PrefixAdder):
+    def __init__(self, width: int = 8):
+        super().__init__(width, Sklansky)
+
+
+class BrentKungAdder(PrefixAdder):
+    def __init__(self, width: int = 8):
+        super().__init__(width, BrentKung)
+
+
 class KoggeStoneSubtractor(wiring.Component):
     def __init__(self, width: int = 8):
         self.width = width
@@ -111,3 +160,46 @@ class KoggeStoneSubtractor(wiring.Component):
         m.d.comb += self.borrow.eq(~adder.carry_out)
 
         return m
+
+
+class LeadingZeroCounter(wiring.Component):
+    """Leading zeros of `value` in log depth. A Kogge-Stone prefix-OR from the MSB down marks each bit with
+    whether a one sits above it; the leading one is the set bit with no mark, and OR trees encode its position.
+    When value is 0, `zero` is set, count is width and leading_one is 0."""
+
+    def __init__(self, width: int = 48):
+        self.width = width
+
+        super().__init__(
+            {
+                "value": In(width),
+                "count": Out(range(width + 1)),
+                "leading_one": Out(range(width)),  # bit index of the leading one
+                "zero": Out(1),
+            }
+        )
+
+    def elaborate(self, platform: Platform | None) -> Module:
+        m = Module()
+
+        # MSB-first: position i is bit width - 1 - i; after the last level seen[i] is the OR of positions 0..i.
+        # Each level is KoggeStone's (i, i - span) combine, written as one shift so it stays a single signal.
+        value = self.value[::-1]
+        seen = value
+        for lvl, _ in enumerate(KoggeStone.levels(self.width)):
+            seen_next = Signal(self.width, name=f"seen_{lvl + 1}")
+            m.d.comb += seen_next.eq(seen | (seen << (1 << lvl))[: self.width])
+            seen = seen_next
+
+        first = Signal(self.width)  # one-hot (MSB-first) leading one
+        m.d.comb += first.eq(value & ~(seen << 1)[: self.width])
+
+        m.d.comb += self.zero.eq(~seen[-1])
+        for bit in range(len(self.count)):
+            mask = sum(1 << i for i in range(self.width) if i >> bit & 1)
+            m.d.comb += self.count[bit].eq((first & mask).any() | (self.zero & (self.width >> bit & 1)))
+        for bit in range(len(self.leading_one)):
+            mask = sum(1 << i for i in range(self.width) if (self.width - 1 - i) >> bit & 1)
+            m.d.comb += self.leading_one[bit].eq((first & mask).any())
+
+        return m
@@ -0,0 +1,73 @@
+from amaranth import *
+from amaranth.build import Platform
+from amaranth.lib import wiring
+from amaranth.lib.wiring import In, Out
+
+from accumulator import DrainEngine
+from bfloat16 import BFloat16
+
+
+def drain_cycles(count: int, engines: int) -> int:
+    """Cycles from a settled accumulator array to its rounded results: one with a drain per PE (engines=0),
+    else one per pass of the shared engines plus the engine register."""
+    if engines == 0:
+        return 1
+    return -(-count // engines) + 1
+
+
+class SharedDrain(wiring.Component):
+    """`engines` DrainEngines time-shared across `count` raw accumulator values, in place of a drain per PE.
+
+    While `run` is high, pass p feeds values p * engines .. p * engines + engines - 1 (row-major, so
+    engines == cols rounds one PE row per cycle) and the engines' results land in the `results` buffer a
+    cycle later. Every result is in after drain_cycles(count, engines) cycles of `run`; the values must hold
+    until then. The buffer holds until the next run; dropping `run` restarts from pass 0."""
+
+    def __init__(self, count: int, engines: int, width: int = 48, lsb_exp: int = 0):
+        assert 1 <= engines <= count
+        self.count, self.engines = count, engines
+        self.width, self.lsb_exp = width, lsb_exp
+        self.passes = -(-count // engines)
+        super().__init__(
+            {
+                "values": In(signed(width)).array(count),
+                "run": In(1),
+                "results": Out(BFloat16).array(count),
+            }
+        )
+
+    def elaborate(self, platform: Platform | None) -> Module:
+        m = Module()
+        engines, passes = self.engines, self.passes
+
+        drain = [DrainEngine(self.width, self.lsb_exp) for _ in range(engines)]
+        for e in range(engines):
+            m.submodules[f"drain_{e}"] = drain[e]
+
+        step = Signal(range(passes + 1))  # pass presented to the engines this cycle
+        with m.If(~self.run):
+            m.d.sync += step.eq(0)
+        with m.Elif(step < passes):
+            m.d.sync += step.eq(step + 1)
+
+        with m.Switch(step):
+            for p in range(passes):
+                with m.Case(p):
+                    for e in range(min(engines, self.count - p * engines)):
+                        m.d.comb += drain[e].value.eq(self.values[p * engines + e])
+
+        # the pass in the engines' drain_latch, written into the buffer as it comes out of round
+        latched = Signal(range(passes + 1))
+        latched_valid = Signal()
+        m.d.sync += latched.eq(step)
+        m.d.sync += latched_valid.eq(self.run & (step < passes))
+
+        buffer = [Signal(BFloat16, name=f"result{n}") for n in range(self.count)]
+        for p in range(passes):
+            with m.If(latched_valid & (latched == p)):
+                for e in range(min(engines, self.count - p * engines)):
+                    m.d.sync += buffer[p * engines + e].eq(drain[e].result)
+        for n in range(self.count):
+            m.d.comb += self.results[n].eq(buffer[n])
+
+        return m
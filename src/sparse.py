@@ -0,0 +1,67 @@
+"""2:4 structured-sparse A tiles. Along K, every group of GROUP values holds at most KEEP nonzeros (bf16
+exponent != 0), so a (rows, depth) tile compresses to rows * depth / 2 bf16 values, row-major with each
+group's kept values in k order, followed by their INDEX_BITS-bit positions in the group, packed
+little-endian from the word after the values. MMAUnit(Geometry(sparse_a=True)) reads A slots in this
+layout."""
+
+import numpy as np
+
+GROUP = 4
+KEEP = 2
+INDEX_BITS = 2
+
+
+def sparse_words(rows: int, depth: int) -> int:
+    """16-bit words of a compressed (rows, depth) A tile."""
+    kept = rows * depth * KEEP // GROUP
+    return kept + -(-kept * INDEX_BITS // 16)
+
+
+def nonzero(bits: np.ndarray) -> np.ndarray:
+    return (np.asarray(bits) & 0x7F80) != 0
+
+
+def compress(tiles: np.ndarray) -> np.ndarray:
+    """(..., rows, depth) bf16 bits -> (..., sparse_words) compressed tiles. A group with fewer than KEEP
+    nonzeros pads with its first zeros; one with more raises ValueError."""
+    tiles = np.asarray(tiles, dtype=np.uint16)
+    *lead, rows, depth = tiles.shape
+    assert depth % GROUP == 0
+    groups = tiles.reshape(*lead, rows, depth // GROUP, GROUP)
+    live = nonzero(groups)
+    if (live.sum(axis=-1) > KEEP).any():
+        raise ValueError(f"A is not {KEEP}:{GROUP} sparse")
+    position = np.arange(GROUP)
+    index = np.sort(np.argsort(np.where(live, position, position + GROUP), axis=-1)[..., :KEEP], axis=-1)
+    values = np.take_along_axis(groups, index, axis=-1).reshape(*lead, -1)
+    per_word = 16 // INDEX_BITS
+    index = index.reshape(*lead, -1)
+    index = np.concatenate([index, np.zeros((*lead, -index.shape[-1] % per_word), dtype=index.dtype)], axis=-1)
+    index = index.reshape(*lead, -1, per_word) << (INDEX_BITS * np.arange(per_word))
+    return np.concatenate([values, index.sum(axis=-1)], axis=-1).astype(np.uint16)
+
+
+def expand(words: np.ndarray, shape: tuple[int, int]) -> np.ndarray:
+    """(..., sparse_words) compressed tiles -> (..., rows, depth) dense bf16 bits."""
+    words = np.asarray(words, dtype=np.uint16)
+    rows, depth = shape
+    kept = rows * depth * KEEP // GROUP
+    *lead, _ = words.shape
+    per_word = 16 // INDEX_BITS
+    index_words = words[..., kept : sparse_words(rows, depth)].astype(np.int64)
+    index = (index_words[..., None] >> (INDEX_BITS * np.arange(per_word))) & ((1 << INDEX_BITS) - 1)
+    index = index.reshape(*lead, -1)[..., :kept].reshape(*lead, rows, depth // GROUP, KEEP)
+    groups = np.zeros((*lead, rows, depth // GROUP, GROUP), dtype=np.uint16)
+    np.put_along_axis(groups, index, words[..., :kept].reshape(*lead, rows, depth // GROUP, KEEP), axis=-1)
+    return groups.reshape(*lead, rows, depth)
+
+
+def prune(x: np.ndarray) -> np.ndarray:
+    """Magnitude-prune an (M, K) float matrix to 2:4 along K: each group of GROUP keeps its KEEP largest."""
+    m, k = x.shape
+    padded = np.zeros((m, -(-k // GROUP) * GROUP))
+    padded[:, :k] = x
+    groups = padded.reshape(m, -1, GROUP)
+    drop = np.argsort(np.abs(groups), axis=-1)[..., : GROUP - KEEP]
+    np.put_along_axis(groups, drop, 0.0, axis=-1)
+    return groups.reshape(m, -1)[:, :k]
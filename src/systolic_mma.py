@@ -0,0 +1,110 @@
+from amaranth import *
+from amaranth.build import Platform
+from amaranth.lib import data, enum, wiring
+from amaranth.lib.wiring import In, Out
+
+from bfloat16 import BFloat16
+from fixed_pe import FixedPE
+from mma import N
+
+
+class State(enum.Enum, shape=2):
+    IDLE = 0
+    RUN = 1  # inject skewed operands, then wait out the skew and the PE's product/accumulate/drain registers
+    DONE = 2
+
+
+class SystolicMMA(wiring.Component):
+    """Output-stationary systolic drop-in for MMA (same ports and start/done handshake).
+
+    PE (i, j) accumulates D[i, j]. A enters row i at the west edge and moves east one PE per cycle through a
+    register. B enters column j at the north edge and moves south the same way. Row i and column j are
+    injected i and j cycles late, so A[i, k] and B[k, j] meet at PE (i, j) in cycle k + i + j. Each PE reads
+    only its neighbours' registers, and the load/enable tags travel east with A, so no signal fans out
+    across the array. The cost is latency: done comes rows + cols - 1 cycles later than MMA's (the injection
+    register and the skewed drain). d_matrix holds once every PE has drained."""
+
+    def __init__(self, rows: int = N, cols: int = N, depth: int = N):
+        self.rows, self.cols, self.depth = rows, cols, depth
+        super().__init__(
+            {
+                "a_matrix": In(BFloat16).array(rows * depth),
+                "b_matrix": In(BFloat16).array(depth * cols),
+                "start": In(1),
+                "done": Out(1),
+                "d_matrix": Out(BFloat16).array(rows * cols),
+                "any_dropped": Out(1),
+                "any_overflow": Out(1),
+            }
+        )
+
+    def elaborate(self, platform: Platform | None) -> Module:
+        m = Module()
+        rows, cols, depth = self.rows, self.cols, self.depth
+        # the last PE sees its last pair in cycle depth + rows + cols - 2; product, accumulate and drain_latch
+        # registers put its result on d_matrix three cycles later
+        last = depth + rows + cols
+
+        pe = [[FixedPE() for _ in range(cols)] for _ in range(rows)]
+        for i in range(rows):
+            for j in range(cols):
+                m.submodules[f"pe_{i}_{j}"] = pe[i][j]
+
+        west = data.StructLayout({"a": BFloat16, "valid": 1, "first": 1})
+        a_pipe = [[Signal(west, name=f"a_pipe_{i}_{j}") for j in range(cols)] for i in range(rows)]
+        b_pipe = [[Signal(BFloat16, name=f"b_pipe_{i}_{j}") for j in range(cols)] for i in range(rows)]
+
+        state = Signal(State)
+        t = Signal(range(last + 1))
+        running = state == State.RUN
+
+        # skewed injection: row i / column j take k = t - i / t - j, each through its own small mux
+        for i in range(rows):
+            m.d.sync += a_pipe[i][0].eq(0)
+            for k in range(depth):
+                with m.If(running & (t == i + k)):
+                    m.d.sync += a_pipe[i][0].a.eq(self.a_matrix[i * depth + k])
+                    m.d.sync += a_pipe[i][0].valid.eq(1)
+                    m.d.sync += a_pipe[i][0].first.eq(k == 0)
+        for j in range(cols):
+            m.d.sync += b_pipe[0][j].eq(0)
+            for k in range(depth):
+                with m.If(running & (t == j + k)):
+                    m.d.sync += b_pipe[0][j].eq(self.b_matrix[k * cols + j])
+
+        for i in range(rows):
+            for j in range(cols):
+                if j + 1 < cols:
+                    m.d.sync += a_pipe[i][j + 1].eq(a_pipe[i][j])
+                if i + 1 < rows:
+                    m.d.sync += b_pipe[i + 1][j].eq(b_pipe[i][j])
+                m.d.comb += pe[i][j].a.eq(a_pipe[i][j].a)
+                m.d.comb += pe[i][j].b.eq(b_pipe[i][j])
+                m.d.comb += pe[i][j].load.eq(a_pipe[i][j].valid & a_pipe[i][j].first)
+                m.d.comb += pe[i][j].enable.eq(a_pipe[i][j].valid & ~a_pipe[i][j].first)
+
+        with m.Switch(state):
+            with m.Case(State.IDLE):
+                with m.If(self.start):
+                    m.d.sync += state.eq(State.RUN)
+                    m.d.sync += t.eq(0)
+
+            with m.Case(State.RUN):
+                m.d.sync += t.eq(t + 1)
+                with m.If(t == last):
+                    m.d.sync += state.eq(State.DONE)
+
+            with m.Case(State.DONE):
+                m.d.comb += self.done.eq(1)
+                with m.If(~self.start):
+                    m.d.sync += state.eq(State.IDLE)
+
+        for i in range(rows):
+            for j in range(cols):
+                m.d.comb += self.d_matrix[i * cols + j].eq(pe[i][j].result)
+
+        pes = [pe[i][j] for i in range(rows) for j in range(cols)]
+        m.d.comb += self.any_dropped.eq(Cat(p.any_dropped for p in pes).any())
+        m.d.comb += self.any_overflow.eq(Cat(p.any_overflow for p in pes).any())
+
+        return m
@@ -0,0 +1,54 @@
+"""Content-addressed on-disk cache for slow tool runs (Yosys synthesis, nextpnr, CXXRTL builds). An entry is a
+directory of output files under <root>/<kind>/<key>, where the key hashes everything the outputs depend on:
+the design text without source locations, the tool's version string and its flags. Entries are published
+by an atomic rename, so a crashed or concurrent run never leaves a half-written one behind."""
+
+import functools
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+CACHE_ROOT = Path(os.environ.get("HARDWARE_CACHE_DIR", Path.home() / ".cache" / "hardware"))
+
+
+def design_text(il: str) -> str:
+    """RTLIL minus `src` attributes, which carry the caller's file/line and would make identical designs miss."""
+    return "\n".join(line for line in il.splitlines() if not line.lstrip().startswith("attribute \\src"))
+
+
+@functools.cache
+def tool_version(*command: str) -> str:
+    return subprocess.run(command, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def key(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:24]
+
+
+def lookup(kind: str, entry_key: str, root: Path = CACHE_ROOT) -> Path | None:
+    entry = root / kind / entry_key
+    return entry if entry.is_dir() else None
+
+
+def store(kind: str, entry_key: str, files: dict[str, Path | str], root: Path = CACHE_ROOT) -> Path:
+    """Publish `files` (name -> source path, or str contents) as the entry for `entry_key`."""
+    entry = root / kind / entry_key
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=entry.parent, prefix=".partial-"))
+    for name, source in files.items():
+        if isinstance(source, Path):
+            shutil.copyfile(source, tmp / name)
+        else:
+            (tmp / name).write_text(source)
+    try:
+        tmp.rename(entry)
+    except OSError:  # another run published the same key first; its outputs are equivalent
+        shutil.rmtree(tmp)
+    return entry
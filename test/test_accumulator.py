@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+from amaranth import Module, Value
 from amaranth.hdl import Period
 from amaranth.sim import Simulator
 
@@ -136,3 +139,41 @@ def test_overflow_sticks_per_bank():
     ops = [("load", 200, 0), ("load", 400, 1), ("add", 200, 1)]
     assert run_banked(Accumulator(width=10, lsb_exp=0), ops, 1)["any_overflow"] == 1
     assert run_banked(Accumulator(width=10, lsb_exp=0), ops, 0)["any_overflow"] == 0
+
+
+@pytest.mark.parametrize("split_drain", [False, True])
+def test_carry_save_matches_carry_propagate_with_lag(split_drain):
+    # width 10 with addends up to 300 wraps often, so the sticky flags get exercised across loads and banks;
+    # carry-save flags trail by one cycle and the drained value by two
+    rng = np.random.default_rng(15)
+    m = Module()
+    m.submodules.ref = ref = Accumulator(width=10, lsb_exp=0, split_drain=split_drain)
+    m.submodules.csa = csa = Accumulator(width=10, lsb_exp=0, split_drain=split_drain, carry_save=True)
+    ports = ["acc_sel", "load", "enable", "addend", "addend_dropped"] + ["drain_sel"] * split_drain
+    lag = {"value": 2, "result": 2, "result_valid": 2, "any_dropped": 1, "any_overflow": 1}
+    history = []
+
+    async def bench(ctx):
+        for t in range(400):
+            kind = rng.choice(["load", "add", "add", "add", "idle"])
+            stimulus = {
+                "acc_sel": rng.integers(2) if rng.random() < 0.2 else 0,
+                "load": kind == "load",
+                "enable": kind == "add",
+                "addend": rng.integers(-300, 301),
+                "addend_dropped": rng.random() < 0.05,
+                "drain_sel": rng.integers(2),
+            }
+            for name in ports:
+                ctx.set(getattr(ref, name), int(stimulus[name]))
+                ctx.set(getattr(csa, name), int(stimulus[name]))
+            history.append({name: ctx.get(Value.cast(getattr(ref, name))) for name in lag})
+            for name, cycles in lag.items():
+                if t >= cycles:
+                    assert ctx.get(Value.cast(getattr(csa, name))) == history[t - cycles][name], name
+            await ctx.tick()
+
+    sim = Simulator(m)
+    sim.add_clock(Period(us=1))
+    sim.add_testbench(bench)
+    sim.run()
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from adder import KINDS, Adder
+from batch_sim import mismatches, simulate_fixed_pe, simulate_mma, simulate_mma_unit
+from bfloat16 import bits_from_float
+from shared_drain import drain_cycles
+
+
+def random_operands(rng: np.random.Generator, shape: tuple[int, ...]) -> np.ndarray:
+    """Mostly in-window normals, with a sprinkling of zeros and out-of-window magnitudes."""
+    x = rng.standard_normal(shape) * 2.0 ** rng.integers(-6, 4, shape)
+    x[rng.random(shape) < 0.05] = 0.0
+    x[rng.random(shape) < 0.02] *= 2.0**12
+    return bits_from_float(x)
+
+
+def test_fixed_pe_batch_matches_golden(request):
+    rng = np.random.default_rng(51)
+    a, b = random_operands(rng, (300, 8)), random_operands(rng, (300, 8))
+    result = simulate_fixed_pe(a, b, vcd=request.config.getoption("--vcd") and "FixedPE_batch.vcd")
+    assert result.cycles == 300 * 8 + 3
+    assert result.dropped.any()
+    assert mismatches(result, a, b) == []
+
+
+def test_fixed_pe_batch_single_pair_vectors():
+    rng = np.random.default_rng(52)
+    a, b = random_operands(rng, (50, 1)), random_operands(rng, (50, 1))
+    assert mismatches(simulate_fixed_pe(a, b), a, b) == []
+
+
+@pytest.mark.parametrize("carry_save", [False, True])
+@pytest.mark.parametrize("kind", KINDS)
+def test_fixed_pe_adder_variants_match_golden(kind, carry_save):
+    rng = np.random.default_rng(56)
+    a, b = random_operands(rng, (100, 8)), random_operands(rng, (100, 8))
+    # products near the top of the window, so a few vectors wrap the 48-bit accumulator
+    big = rng.random(100) < 0.3
+    a[big] = bits_from_float(rng.choice([-1.0, 1.0], (big.sum(), 8)) * 120.0)
+    b[big] = bits_from_float(np.full((big.sum(), 8), 120.0))
+    result = simulate_fixed_pe(a, b, carry_save=carry_save, adder=Adder(kind, 5))
+    assert result.overflow.any() and not result.overflow.all()
+    assert mismatches(result, a, b) == []
+
+
+@pytest.mark.parametrize("carry_save", [False, True])
+@pytest.mark.parametrize("lanes", [2, 4])
+def test_dot_pe_matches_golden(lanes, carry_save):
+    rng = np.random.default_rng(71)
+    a, b = random_operands(rng, (60, 8)), random_operands(rng, (60, 8))
+    # products just under the window top: a same-signed pair already leaves the 48-bit range as a group sum
+    big = rng.random(60) < 0.3
+    a[big] = bits_from_float(rng.choice([-1.0, 1.0], (big.sum(), 8)) * 250.0)
+    b[big] = bits_from_float(np.full((big.sum(), 8), 120.0))
+    result = simulate_fixed_pe(a, b, carry_save=carry_save, lanes=lanes)
+    assert result.cycles == 60 * 8 // lanes + 3 + 2 * carry_save  # the carry-save drain resolves over two cycles
+    assert result.overflow.any() and not result.overflow.all()
+    assert mismatches(result, a, b, lanes) == []
+    a, b = random_operands(rng, (20, 4, 4)), random_operands(rng, (20, 4, 4))
+    baseline, result = simulate_mma(a, b), simulate_mma(a, b, lanes=lanes)
+    assert result.cycles == baseline.cycles - 20 * (4 - 4 // lanes)
+    assert mismatches(result, a, b, lanes) == []
+
+
+def test_mma_batch_matches_golden():
+    rng = np.random.default_rng(53)
+    a, b = random_operands(rng, (60, 4, 4)), random_operands(rng, (60, 4, 4))
+    assert mismatches(simulate_mma(a, b), a, b) == []
+
+
+@pytest.mark.parametrize("stages", [2, 3])
+def test_deeper_pe_pipeline_matches_golden(stages):
+    rng = np.random.default_rng(57)
+    a, b = random_operands(rng, (100, 8)), random_operands(rng, (100, 8))
+    result = simulate_fixed_pe(a, b, pipeline_stages=stages)
+    assert result.cycles == 100 * 8 + 2 + stages
+    assert mismatches(result, a, b) == []
+    a, b = random_operands(rng, (20, 4, 4)), random_operands(rng, (20, 4, 4))
+    baseline, result = simulate_mma(a, b), simulate_mma(a, b, pipeline_stages=stages)
+    assert result.cycles == baseline.cycles + 20 * (stages - 1)  # one more FLUSH cycle per extra stage
+    assert mismatches(result, a, b) == []
+
+
+@pytest.mark.parametrize("engines", [1, 4])
+def test_shared_drain_matches_golden(engines):
+    rng = np.random.default_rng(61)
+    a, b = random_operands(rng, (20, 4, 4)), random_operands(rng, (20, 4, 4))
+    baseline, result = simulate_mma(a, b), simulate_mma(a, b, drain_engines=engines)
+    assert result.cycles == baseline.cycles + 20 * (drain_cycles(16, engines) - 1)
+    assert mismatches(result, a, b) == []
+
+
+def test_mma_unit_batch_mixed_kblocks():
+    rng = np.random.default_rng(54)
+    ks = [4, 8, 16, 64, 4, 12]
+    a = [random_operands(rng, (4, k)) for k in ks]
+    b = [random_operands(rng, (k, 4)) for k in ks]
+    result, op_cycles = simulate_mma_unit(a, b)
+    assert mismatches(result, a, b) == []
+    assert op_cycles == [7 + k for k in ks]
+    # a flipped result bit and a flipped flag are each caught, in their own shape group
+    result.bits[3, 1, 2] ^= 1
+    result.overflow[5] ^= True
+    assert mismatches(result, a, b) == [3, 5]
+
+
+@pytest.mark.slow
+def test_large_randomized_regression():
+    rng = np.random.default_rng(55)
+    a, b = random_operands(rng, (5000, 16)), random_operands(rng, (5000, 16))
+    assert mismatches(simulate_fixed_pe(a, b), a, b) == []
+    a, b = random_operands(rng, (1000, 4, 4)), random_operands(rng, (1000, 4, 4))
+    assert mismatches(simulate_mma(a, b), a, b) == []
+    a, b = random_operands(rng, (300, 4, 32)), random_operands(rng, (300, 32, 4))
+    assert mismatches(simulate_mma_unit(a, b)[0], a, b) == []
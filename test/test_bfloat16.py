@@ -1,4 +1,8 @@
-from bfloat16 import BF16
+import struct
+
+import numpy as np
+
+from bfloat16 import BF16, bits_from_float, bits_from_float_rtne, bits_to_float, pack_bits, unpack_bits
 
 
 def test_float_to_bf16_conversion():
@@ -63,3 +67,45 @@ def test_bf16_roundtrip():
 
         rel_error = abs(recovered - original) / max(abs(original), 1e-6) if original != 0 else abs(recovered)
         assert rel_error < 0.01, f"Roundtrip failed for {original}: got {recovered} (error: {rel_error:.6f})"
+
+
+def test_array_codec_matches_scalar():
+    rng = np.random.default_rng(0)
+    x = np.concatenate(
+        [
+            rng.standard_normal(2000) * 10.0 ** rng.integers(-30, 30, 2000),
+            [0.0, -0.0, 1.0, -1.0, np.inf, -np.inf, 1e-45, 3.0e38],
+        ]
+    ).astype(np.float32)
+    bits = bits_from_float(x)
+    assert bits.dtype == np.uint16
+    assert bits.tolist() == [BF16.from_float(float(v)).to_bits() for v in x]
+    assert bits_to_float(bits).tolist() == [BF16.from_bits(int(b)).to_float() for b in bits]
+
+    sign, exp, mant = unpack_bits(bits)
+    assert list(zip(sign.tolist(), exp.tolist(), mant.tolist())) == [BF16.from_bits(int(b)).unpack() for b in bits]
+    assert pack_bits(sign, exp, mant).tolist() == bits.tolist()
+
+
+def rtne_reference(x: float) -> int:
+    bits = struct.unpack("<I", struct.pack("<f", x))[0]
+    low, high = bits & 0xFFFF, bits >> 16
+    if (bits >> 23) & 0xFF == 0xFF:
+        return high | (0x40 if bits & 0x7FFFFF else 0)
+    if low > 0x8000 or (low == 0x8000 and (high & 1)):
+        high += 1
+    return high
+
+
+def test_array_rtne_matches_reference():
+    rng = np.random.default_rng(1)
+    random_bits = rng.integers(0, 2**32, 5000, dtype=np.uint32)
+    ties = (rng.integers(0, 2**16, 64, dtype=np.uint32) << 16) | 0x8000  # exact halfway cases, both parities
+    x = np.concatenate([random_bits, ties, [0x7F7FFFFF, 0x7F800001, 0xFF800000]]).astype(np.uint32).view(np.float32)
+    assert bits_from_float_rtne(x).tolist() == [rtne_reference(float(v)) for v in x]
+
+
+def test_array_codec_keeps_shape():
+    x = np.arange(24, dtype=np.float64).reshape(2, 3, 4) - 11.5
+    assert bits_to_float(bits_from_float(x), np.float64).shape == (2, 3, 4)
+    assert np.array_equal(bits_to_float(bits_from_float_rtne(x), np.float64), x)
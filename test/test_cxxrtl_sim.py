@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import cxxrtl_sim
+import golden
+from bfloat16 import bits_from_float
+from fixed_pe import FixedPE
+from gemm import plan, run_cxxrtl, run_model
+
+pytestmark = pytest.mark.skipif(not cxxrtl_sim.available(), reason="needs Yosys write_cxxrtl and a C++ compiler")
+
+
+def test_fixed_pe_matches_golden(tmp_path):
+    rng = np.random.default_rng(61)
+    a = bits_from_float(rng.standard_normal((20, 6)))
+    b = bits_from_float(rng.standard_normal((20, 6)))
+    want = golden.matmul(a[:, None, :], b[:, :, None])[0].reshape(-1)
+
+    sim = cxxrtl_sim.CxxrtlSim(FixedPE(), cache_root=tmp_path)
+    got = []
+    for v in range(len(a)):
+        for k in range(a.shape[1]):
+            sim.a, sim.b = a[v, k], b[v, k]
+            sim.load, sim.enable = k == 0, k != 0
+            sim.tick()
+        sim.load, sim.enable = 0, 0
+        for _ in range(3):
+            sim.tick()
+        got.append(sim.result)
+    assert np.array_equal(got, want)
+    assert sim.cycle == len(a) * (a.shape[1] + 3)
+
+    # a second build of the same design is a cache hit
+    assert len(list(tmp_path.glob("cxxrtl/*/design.so"))) == 1
+    assert cxxrtl_sim.build(FixedPE(), tmp_path) == next(tmp_path.glob("cxxrtl/*/design.so"))
+
+
+@pytest.mark.slow
+def test_mma_unit_gemm_matches_model():
+    rng = np.random.default_rng(62)
+    A = rng.standard_normal((8, 40)) * 0.3
+    B = rng.standard_normal((40, 12)) * 0.3
+    schedule = plan(A, B, kchunk=4)
+    got_trace: list[tuple] = []
+    want_trace: list[tuple] = []
+    got, want = run_cxxrtl(schedule, trace=got_trace), run_model(schedule, trace=want_trace)
+    assert got_trace == want_trace
+    assert np.array_equal(got.d_bits, want.d_bits)
+    assert got.cycles == want.cycles
+
+
+def test_compile_failure_raises_with_the_compiler_output(tmp_path, monkeypatch):
+    monkeypatch.setattr(cxxrtl_sim, "CXXFLAGS", [*cxxrtl_sim.CXXFLAGS, "-include", "missing.h"])
+    with pytest.raises(cxxrtl_sim.CxxrtlBuildError, match="missing.h") as error:
+        cxxrtl_sim.build(FixedPE(), tmp_path)
+    assert error.value.returncode != 0 and "missing.h" in error.value.stderr
+    assert not list(tmp_path.glob("cxxrtl/*/design.so"))
+
+
+def test_missing_private_yosys_api_is_unavailable(monkeypatch):
+    monkeypatch.setattr(cxxrtl_sim, "TOOLCHAIN_IMPORT_ERROR", ImportError("no amaranth._toolchain.yosys"))
+    assert not cxxrtl_sim.available()
+    with pytest.raises(ImportError, match="private Amaranth API"):
+        cxxrtl_sim.yosys()
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from bfloat16 import bits_from_float
+from dsram import DSRAM
+from gemm import plan, run_model, to_tiles
+from mma_stream import Geometry, N
+
+
+def gemm_operands(seed: int):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((8, 24)) * 0.3, rng.standard_normal((24, 8)) * 0.3
+
+
+def test_load_a_and_b_split_into_kblock_tiles():
+    rng = np.random.default_rng(71)
+    a, b = rng.standard_normal((N, 3 * N)), rng.standard_normal((3 * N, N))
+    dsram = DSRAM()
+    dsram.load_a(62, a)  # wraps past the last slot, like rd_addr
+    dsram.load_b(10, b)
+    assert np.array_equal(dsram.data[[62, 63, 0]].reshape(-1, N, N), to_tiles(bits_from_float(a))[0])
+    assert np.array_equal(dsram.data[10:13].reshape(-1, N, N), to_tiles(bits_from_float(b))[:, 0])
+    assert dsram.traffic().staged == 6
+
+
+def test_transaction_traffic_counts_consumed_tiles():
+    schedule = plan(*gemm_operands(73), kchunk=2)
+    result = run_model(schedule)
+    ops = [step.op for step in schedule.steps]
+    kblocks = sum(op.kblocks for op in ops)
+    assert result.traffic.reads == {"a": kblocks, "b": kblocks}
+    assert result.traffic.writes == sum(op.evict for op in ops)
+    read_bw, write_bw = result.dsram_bytes_per_cycle
+    assert read_bw == 2 * kblocks * N * N * 2 / result.cycles and write_bw > 0
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_mma_unit_tolerates_one_cycle_read_latency(pipelined):
+    schedule = plan(*gemm_operands(79), kchunk=3)
+    want = run_model(schedule)
+    for latency, ok in ((1, True), (2, False)):
+        got = run_model(schedule, trace=[], dsram=DSRAM(read_latency=latency), pipelined=pipelined)
+        assert np.array_equal(got.d_bits, want.d_bits) == ok
+
+
+def test_stepped_traffic_and_bank_conflicts():
+    schedule = plan(*gemm_operands(83), kchunk=2)
+    stepped = run_model(schedule, trace=[]).traffic
+    consumed = run_model(schedule).traffic
+    # the ports count the tiles the unit strobes in, which are the ones the transaction consumes
+    assert stepped.reads == consumed.reads
+    assert stepped.writes == consumed.writes
+    assert stepped.conflicts == 0  # one true dual-port bank: the two read ports never collide
+
+    # single-ported banks interleaved by slot parity: A chunks start at 0 and B chunks at kchunk*(1+bank), so
+    # even kchunk puts A and B k-block reads in the same bank
+    assert run_model(schedule, trace=[], dsram=DSRAM(banks=2, ports_per_bank=1)).traffic.conflicts > 0
+    odd = plan(*gemm_operands(83), kchunk=3, banks=1)
+    assert run_model(odd, trace=[], dsram=DSRAM(banks=2, ports_per_bank=1)).traffic.conflicts == 0
+
+
+@pytest.mark.parametrize(
+    ("geometry", "options", "pipelined"),
+    [
+        (Geometry(max_outputs=4), {"multi_output": True}, False),
+        (Geometry(max_outputs=4), {"multi_output": True}, True),
+        (Geometry(b_file=True), {"weight_stationary": True}, True),
+        (Geometry(epilogue=True), {"c": np.ones((8, 8))}, False),
+        (Geometry(zero_skip=True), {}, False),
+    ],
+)
+def test_stepped_reads_match_consumed_tiles(geometry, options, pipelined):
+    A, B = gemm_operands(97)
+    A[:, 8:16] = 0  # whole k-blocks with no live steps under zero_skip
+    schedule = plan(A, B, geometry=geometry, **options)
+    stepped = run_model(schedule, trace=[], pipelined=pipelined).traffic
+    assert stepped.reads == run_model(schedule, pipelined=pipelined).traffic.reads
@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+import pytest
+from amaranth.hdl import Period
+from amaranth.sim import Simulator
+
+import golden
+from bfloat16 import bits_from_float, bits_to_float
+from epilogue import EPILOGUE_LATENCY, ONE, Activation, Epilogue
+from fixed_pe import LSB_EXP
+
+
+@pytest.mark.parametrize("act", list(Activation))
+def test_streams_one_value_per_cycle_bit_exact(act):
+    rng = np.random.default_rng(113 + act.value)
+    count = 48
+    values = rng.integers(-(1 << 36), 1 << 36, count)
+    values[:4] = [0, 1 << 47 - 1, -(1 << 47), 3 << -LSB_EXP]  # zero, both extremes, 3.0
+    c = bits_from_float(rng.standard_normal(count) * 2)
+    c[4] = 0x7F00  # 2**127: saturates the grid
+    scale = bits_from_float(np.exp2(rng.integers(-8, 8, count)) * rng.choice([1.0, -1.5, 0.3], count))
+    add_c, scale_en = rng.integers(0, 2, count), rng.integers(0, 2, count)
+    dut = Epilogue()
+    got = []
+
+    async def bench(ctx):
+        for t in range(count + EPILOGUE_LATENCY):
+            if t < count:
+                ctx.set(dut.value, int(values[t]))
+                ctx.set(dut.c.as_value(), int(c[t]))
+                ctx.set(dut.add_c, int(add_c[t]))
+                ctx.set(dut.scale.as_value(), int(scale[t]))
+                ctx.set(dut.scale_en, int(scale_en[t]))
+                ctx.set(dut.act, act)
+            if t >= EPILOGUE_LATENCY:
+                got.append(ctx.get(dut.result.as_value()))
+            await ctx.tick()
+
+    sim = Simulator(dut)
+    sim.add_clock(Period(us=1))
+    sim.add_testbench(bench)
+    sim.run()
+    want = golden.epilogue(values, np.where(add_c == 1, c, 0), np.where(scale_en == 1, scale, ONE), act)
+    assert got == want.tolist()
+
+
+def test_golden_epilogue_tracks_the_float_functions():
+    x = np.linspace(-6, 6, 97)
+    value = np.round(x * 2.0**-LSB_EXP).astype(np.int64)
+    plain = bits_to_float(golden.epilogue(value))
+    assert np.allclose(plain, x, rtol=2**-8)
+    bias, half = bits_from_float(0.25), bits_from_float(0.5)
+    assert np.allclose(bits_to_float(golden.epilogue(value, bias, half)), x / 2 + 0.25, rtol=2**-7, atol=2**-10)
+    assert np.array_equal(bits_to_float(golden.epilogue(value, act=Activation.RELU)), np.maximum(plain, 0))
+    assert np.array_equal(bits_to_float(golden.epilogue(value, act=Activation.CLAMP)), np.clip(plain, 0, 6))
+    gelu = np.array([0.5 * v * (1 + math.erf(v / math.sqrt(2))) for v in x])
+    silu = x / (1 + np.exp(-x))
+    assert np.allclose(bits_to_float(golden.epilogue(value, act=Activation.GELU)), gelu, atol=0.08)
+    assert np.allclose(bits_to_float(golden.epilogue(value, act=Activation.SILU)), silu, atol=0.08)
@@ -1,10 +1,12 @@
 import random
 import struct
 
+import numpy as np
 from amaranth.hdl import Period
 from amaranth.sim import Simulator
 
-from bfloat16 import BF16
+from batch_sim import simulate_fixed_pe
+from bfloat16 import BF16, bits_from_float, bits_to_float
 from fixed_pe import FixedPE
 
 
@@ -153,15 +155,20 @@ def test_alternating_signs_cancel_exactly():
 
 def test_in_window_matches_drain_once_reference():
     rng = random.Random(0)
-    for _ in range(20):
-        pairs = [
+    vectors = [
+        [
             (
                 rng.choice([-1.0, 1.0]) * (1.0 + rng.random()) * (2.0 ** rng.randint(-2, 2)),
                 rng.choice([-1.0, 1.0]) * (1.0 + rng.random()) * (2.0 ** rng.randint(-2, 2)),
             )
             for _ in range(16)
         ]
-        assert run_fixed_pe(pairs) == drain_once_reference(pairs)
+        for _ in range(20)
+    ]
+    pairs = np.array(vectors)
+    result = simulate_fixed_pe(bits_from_float(pairs[..., 0]), bits_from_float(pairs[..., 1]))
+    for got, vector in zip(bits_to_float(result.bits), vectors):
+        assert got == drain_once_reference(vector)
 
 
 def test_product_above_window_is_dropped():
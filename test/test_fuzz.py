@@ -0,0 +1,36 @@
+import numpy as np
+
+import fuzz
+from bfloat16 import unpack_bits
+
+
+def test_seeds_cover_every_distribution_and_agree_with_golden():
+    for target in fuzz.TARGETS:
+        assert fuzz.run(target, range(len(fuzz.DISTRIBUTIONS)), workers=2) == []
+
+
+def test_window_corners_straddle_both_edges():
+    shifts = set()
+    for seed in range(0, 40, len(fuzz.DISTRIBUTIONS)):
+        case = fuzz.generate("FixedPE", seed)
+        a_exp, b_exp = unpack_bits(case.a)[1].astype(int), unpack_bits(case.b)[1].astype(int)
+        shifts |= set((a_exp + b_exp - fuzz.GRID_ALIGN).reshape(-1).tolist())
+    assert {-1, 0, fuzz.MAX_SHIFT, fuzz.MAX_SHIFT + 1} <= shifts
+
+
+def flips_subnormal_vectors(case):
+    """A reference with a planted bug: it gets every vector whose `a` holds a subnormal wrong."""
+    bits, dropped, overflow = fuzz.reference(case)
+    _, exp, mant = unpack_bits(case.a)
+    return np.where(((exp == 0) & (mant != 0)).any(axis=1), bits ^ 1, bits), dropped, overflow
+
+
+def test_failures_shrink_to_a_minimal_reproducer():
+    seed = next(s for s in range(1, 100, len(fuzz.DISTRIBUTIONS)) if fuzz.generate("FixedPE", s).a.size > 40)
+    failure = fuzz.fuzz_one("FixedPE", seed, reference=flips_subnormal_vectors)
+    assert failure is not None and failure.seed == seed
+    assert failure.case.a.shape == failure.case.b.shape == (1, 1)
+    _, exp, mant = unpack_bits(failure.case.a)
+    assert exp[0, 0] == 0 and mant[0, 0] != 0
+    assert failure.case.b[0, 0] == 0
+    assert failure.errors == fuzz.check(failure.case, flips_subnormal_vectors) != []
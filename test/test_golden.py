@@ -0,0 +1,121 @@
+import numpy as np
+from amaranth.hdl import Period
+from amaranth.sim import Simulator
+
+from accumulator import Accumulator
+from bfloat16 import bits_from_float, bits_to_float
+from fixed_pe import FixedPE
+from golden import AccState, mac, matmul, round_to_bf16, wrap
+
+
+def run_fixed_pe(a_bits: np.ndarray, b_bits: np.ndarray) -> tuple[int, bool, bool]:
+    """Stream the pairs through a FixedPE (load on the first); return (result bits, dropped, overflow)."""
+    dut = FixedPE()
+    out = {}
+
+    async def bench(ctx):
+        for i, (a, b) in enumerate(zip(a_bits.tolist(), b_bits.tolist())):
+            ctx.set(dut.a.as_value(), a)
+            ctx.set(dut.b.as_value(), b)
+            ctx.set(dut.load, i == 0)
+            ctx.set(dut.enable, i != 0)
+            await ctx.tick()
+        ctx.set(dut.load, 0)
+        ctx.set(dut.enable, 0)
+        await ctx.tick()  # flush the pipelined addend into acc
+        out["dropped"] = bool(ctx.get(dut.any_dropped))
+        out["overflow"] = bool(ctx.get(dut.any_overflow))
+        await ctx.tick()  # drain settles
+        out["bits"] = ctx.get(dut.result.as_value())
+
+    sim = Simulator(dut)
+    sim.add_clock(Period(us=1))
+    sim.add_testbench(bench)
+    sim.run()
+    return out["bits"], out["dropped"], out["overflow"]
+
+
+def corner_operands(rng: np.random.Generator, n: int) -> np.ndarray:
+    """bf16 bits spanning the window edges, subnormals, zeros and both signs."""
+    sign = rng.integers(0, 2, n) << 15
+    exponent = rng.choice([0, 0, 90, 100, 110, 118, 120, 124, 127, 130, 134, 135, 136, 140], n)
+    mantissa = rng.integers(0, 128, n)
+    return (sign | (exponent << 7) | mantissa).astype(np.uint16)
+
+
+def test_matches_fixed_pe_rtl():
+    rng = np.random.default_rng(0x601D)
+    for _ in range(12):
+        a, b = corner_operands(rng, 8), corner_operands(rng, 8)
+        bits, dropped, overflow = matmul(a[None, :], b[:, None])
+        assert run_fixed_pe(a, b) == (int(bits[0, 0]), bool(dropped[0, 0]), bool(overflow[0, 0]))
+
+
+def test_overflow_matches_fixed_pe_rtl():
+    a, b = bits_from_float(np.full(4, 128.0)), bits_from_float(np.full(4, 64.0))
+    bits, dropped, overflow = matmul(a[None, :], b[:, None])
+    assert run_fixed_pe(a, b) == (int(bits[0, 0]), False, True)
+    assert bool(overflow[0, 0]) and not bool(dropped[0, 0])
+
+
+def test_drain_matches_accumulator_rtl():
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.integers(-(2**47), 2**47, 24), [0, 1, -1, 257, -(2**47), 2**47 - 1]])
+    dut = Accumulator(width=48, lsb_exp=-32)
+    got = []
+
+    async def bench(ctx):
+        for v in values.tolist():
+            ctx.set(dut.addend, v)
+            ctx.set(dut.load, 1)
+            await ctx.tick()
+            ctx.set(dut.load, 0)
+            await ctx.tick()
+            got.append(ctx.get(dut.result.as_value()))
+
+    sim = Simulator(dut)
+    sim.add_clock(Period(us=1))
+    sim.add_testbench(bench)
+    sim.run()
+    assert got == round_to_bf16(values).tolist()
+
+
+def rtne_from_float64(x: np.ndarray) -> np.ndarray:
+    """Single RTNE of exact float64 values to bf16 bits (normal range)."""
+    bits = x.view(np.uint64)
+    drop = 52 - 7
+    rounded = (
+        (bits + (np.uint64(1) << np.uint64(drop - 1)) - 1 + ((bits >> np.uint64(drop)) & 1)) >> np.uint64(drop)
+    ) << np.uint64(drop)
+    return bits_from_float(rounded.view(np.float64))
+
+
+def test_in_window_batch_matches_exact_reference():
+    rng = np.random.default_rng(2)
+    A = rng.standard_normal((5000, 4, 16)) * 0.3
+    B = rng.standard_normal((5000, 16, 4)) * 0.3
+    a_bits, b_bits = bits_from_float(A), bits_from_float(B)
+    bits, dropped, overflow = matmul(a_bits, b_bits)
+    exact = bits_to_float(a_bits, np.float64) @ bits_to_float(b_bits, np.float64)
+    in_window = ~dropped & ~overflow
+    assert in_window.mean() > 0.99
+    assert np.array_equal(bits[in_window], rtne_from_float64(exact)[in_window])
+
+
+def test_chained_state_equals_single_pass():
+    rng = np.random.default_rng(3)
+    a = bits_from_float(rng.standard_normal((64, 4, 32)))
+    b = bits_from_float(rng.standard_normal((64, 32, 4)))
+    whole = mac(a, b)
+    chained = mac(a[..., 16:], b[..., 16:, :], mac(a[..., :16], b[..., :16, :]))
+    for got, want in zip(chained, whole):
+        assert np.array_equal(got, want)
+
+
+def test_wrap_and_sticky_overflow():
+    assert wrap(2**47) == -(2**47)
+    assert wrap(-(2**47) - 1) == 2**47 - 1
+    hot = AccState(np.array([[2**47 - 1]]), np.array([[False]]), np.array([[False]]))
+    one = bits_from_float(np.ones((1, 1)))
+    state = mac(one, one, hot)
+    assert state.overflow[0, 0] and state.value[0, 0] < 0
@@ -5,7 +5,9 @@ import numpy as np
 from amaranth.hdl import Period
 from amaranth.sim import Simulator
 
-from bfloat16 import BF16
+from batch_sim import simulate_mma
+from bfloat16 import BF16, bits_from_float, bits_to_float
+from golden import matmul
 from mma import MMA
 
 N = 4
@@ -35,8 +37,8 @@ def bf16_rtne(x: float) -> float:
 
 def bf16_matmul(A, B):
     """D = A*B with bf16 operands, exact accumulation, single RTNE at drain (FixedPE's contract)."""
-    A = np.array([[BF16.from_float(float(x)).to_float() for x in row] for row in A], dtype=np.float32)
-    B = np.array([[BF16.from_float(float(x)).to_float() for x in row] for row in B], dtype=np.float32)
+    A = bits_to_float(bits_from_float(A))
+    B = bits_to_float(bits_from_float(B))
 
     result = np.zeros((N, N), dtype=np.float32)
     for i, j in itertools.product(range(N), range(N)):
@@ -115,15 +117,29 @@ def test_powers_of_two(request):
     assert_bit_exact(run_mma(request, A, B), bf16_matmul(A, B))
 
 
-def test_window_edge_stress(request):
-    """Randomized matmuls with product magnitudes packed near FixedPE's window edges."""
+def test_window_edge_stress():
+    """Randomized matmuls with product magnitudes packed near FixedPE's window edges, one batch on one DUT."""
     rng = np.random.default_rng(0xED6E)
     near_top_exp, near_bottom_exp = 4, -9
+    As, Bs = [], []
     for trial in range(8):
         scale_exp = near_top_exp if trial % 2 == 0 else near_bottom_exp
         scale = 2.0**scale_exp
         signs_a = rng.choice([-1.0, 1.0], size=(N, N))
         signs_b = rng.choice([-1.0, 1.0], size=(N, N))
-        A = (signs_a * (1.0 + rng.random((N, N))) * scale).astype(np.float32)
-        B = (signs_b * (1.0 + rng.random((N, N))) * scale).astype(np.float32)
-        assert_bit_exact(run_mma(request, A, B), bf16_matmul(A, B))
+        As.append((signs_a * (1.0 + rng.random((N, N))) * scale).astype(np.float32))
+        Bs.append((signs_b * (1.0 + rng.random((N, N))) * scale).astype(np.float32))
+    result = simulate_mma(bits_from_float(np.stack(As)), bits_from_float(np.stack(Bs)))
+    for got, A, B in zip(result.bits, As, Bs):
+        assert_bit_exact(bits_to_float(got), bf16_matmul(A, B))
+
+
+def test_non_square_array():
+    # 2x3 PEs, 5 MACs deep: D (2x3) = A (2x5) @ B (5x3)
+    rng = np.random.default_rng(0x2305)
+    a = bits_from_float(rng.standard_normal((3, 2, 5)) * 0.3)
+    b = bits_from_float(rng.standard_normal((3, 5, 3)) * 0.3)
+    result = simulate_mma(a, b)
+    want, dropped, overflow = matmul(a, b)
+    assert np.array_equal(result.bits, want)
+    assert np.array_equal(result.dropped, dropped.any(axis=(1, 2)))
@@ -0,0 +1,213 @@
+import numpy as np
+import pytest
+
+from bfloat16 import bits_from_float
+from gemm import Schedule, Step, cross_check, plan, run_model, run_sim, to_tiles
+from golden import matmul
+from mma_model import PIPELINE_FILL, MMAUnitModel, Op, op_cycles, zero_skip_cycles
+from mma_stream import Geometry, State
+from sparse import prune
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_cross_check_chained_gemm(pipelined):
+    rng = np.random.default_rng(41)
+    A = rng.standard_normal((4, 24)) * 0.3
+    B = rng.standard_normal((24, 12)) * 0.3
+    assert cross_check(plan(A, B, banks=3, kchunk=4), pipelined) > 0
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_cross_check_non_square_geometry(pipelined):
+    # 2x8 PEs, 3-deep k-blocks, 128 slots and at most 8 k-blocks per op; K = 20 pads to 7 k-blocks
+    geometry = Geometry(rows=2, cols=8, depth=3, slot_bits=7, kblock_bits=3)
+    rng = np.random.default_rng(53)
+    A = rng.standard_normal((5, 20)) * 0.3
+    B = rng.standard_normal((20, 11)) * 0.3
+    schedule = plan(A, B, banks=2, kchunk=3, geometry=geometry)
+    assert cross_check(schedule, pipelined) > 0
+    want = matmul(bits_from_float(A), bits_from_float(B))[0]
+    assert np.array_equal(run_model(schedule, pipelined=pipelined).d_bits, want)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_cross_check_flags_and_max_kblocks(pipelined):
+    # kblocks=16 encodes as 0; the hot op overflows its bank, the cool one in another bank must not see it
+    rng = np.random.default_rng(43)
+    cool = to_tiles(bits_from_float(rng.standard_normal((4, 64)) * 0.1))[0]
+    hot = to_tiles(bits_from_float(np.full((4, 4), 128.0)))[0, 0]
+    hot_b = to_tiles(bits_from_float(np.full((4, 4), 64.0)))[0, 0]
+    loads = {slot: cool[slot] for slot in range(16)} | {16 + slot: cool[slot].T for slot in range(16)}
+    steps = [
+        Step(loads, Op(0, 16, 40, 16, False, False, 0), None),
+        Step({32: hot, 33: hot_b}, Op(32, 33, 41, 1, False, True, 1), (0, 0)),
+        Step({}, Op(0, 16, 42, 16, True, True, 0), (0, 1)),
+    ]
+    assert cross_check(Schedule(steps, (4, 64, 8)), pipelined) > 0
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+@pytest.mark.parametrize("stages", [2, 3])
+def test_cross_check_deeper_pe_pipeline(pipelined, stages):
+    # the hot op wraps its bank, so the flags must still line up with done after the longer flush / tail
+    rng = np.random.default_rng(59)
+    cool = to_tiles(bits_from_float(rng.standard_normal((4, 12)) * 0.3))[0]
+    hot = to_tiles(bits_from_float(np.full((4, 4), 128.0)))[0, 0]
+    hot_b = to_tiles(bits_from_float(np.full((4, 4), 64.0)))[0, 0]
+    loads = {slot: cool[slot] for slot in range(3)} | {16 + slot: cool[slot].T for slot in range(3)}
+    steps = [
+        Step(loads | {32: hot, 33: hot_b}, Op(0, 16, 40, 3, False, True, 0), (0, 0)),
+        Step({}, Op(32, 33, 41, 1, False, True, 1), (0, 1)),
+        Step({}, Op(0, 16, 42, 2, False, True, 1), (0, 2)),
+    ]
+    schedule = Schedule(steps, (4, 12, 12), Geometry(pipeline_stages=stages))
+    assert cross_check(schedule, pipelined) > 0
+    fast, stepped = run_model(schedule, pipelined=pipelined), run_model(schedule, trace=[], pipelined=pipelined)
+    assert fast.any_overflow and np.array_equal(fast.d_bits, stepped.d_bits)
+    fill = PIPELINE_FILL + stages - 1 if pipelined else 0
+    want = sum(op_cycles(step.op, pipelined, schedule.geometry) for step in schedule.steps) + fill
+    assert fast.cycles == stepped.cycles == want
+
+
+@pytest.mark.parametrize("engines", [3, 4])
+def test_cross_check_shared_drain(engines):
+    rng = np.random.default_rng(67)
+    A = rng.standard_normal((4, 24)) * 0.3
+    B = rng.standard_normal((24, 12)) * 0.3
+    schedule = plan(A, B, banks=2, kchunk=3, geometry=Geometry(drain_engines=engines))
+    assert cross_check(schedule) > 0
+    fast, stepped = run_model(schedule), run_model(schedule, trace=[])
+    assert np.array_equal(fast.d_bits, stepped.d_bits)
+    assert (
+        fast.cycles == stepped.cycles == sum(op_cycles(step.op, geometry=schedule.geometry) for step in schedule.steps)
+    )
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_cross_check_multi_output_flags(pipelined):
+    # the middle output overflows its bank: done's flags OR over the outputs, with and without evict
+    rng = np.random.default_rng(101)
+    cool = to_tiles(bits_from_float(rng.standard_normal((4, 8)) * 0.1))[0]
+    hot_a = to_tiles(bits_from_float(np.full((4, 4), 128.0)))[0, 0]
+    hot_b = to_tiles(bits_from_float(np.full((4, 4), 64.0)))[0, 0]
+    b = [cool[0].T, cool[1].T, hot_b, hot_b, cool[1].T, cool[0].T]  # 3 outputs x 2 k-blocks from slot 16
+    loads = {0: hot_a, 1: cool[1]} | {16 + n: tile for n, tile in enumerate(b)}
+    steps = [
+        Step(loads, Op(0, 16, 40, 2, False, False, 1, outputs=3), None),
+        Step({}, Op(0, 16, 40, 2, True, True, 1, outputs=3), (0, 0)),
+        Step({}, Op(1, 17, 44, 1, False, True, 0, outputs=2), (1, 0)),
+    ]
+    schedule = Schedule(steps, (8, 8, 12), Geometry(max_outputs=4))
+    assert cross_check(schedule, pipelined) > 0
+    fast, stepped = run_model(schedule, pipelined=pipelined), run_model(schedule, trace=[], pipelined=pipelined)
+    assert fast.any_overflow and np.array_equal(fast.d_bits, stepped.d_bits)
+    fill = PIPELINE_FILL if pipelined else 0
+    want = sum(op_cycles(step.op, pipelined, schedule.geometry) for step in schedule.steps) + fill
+    assert fast.cycles == stepped.cycles == want
+
+
+@pytest.mark.parametrize(("pipelined", "geometry"), [(False, Geometry(lanes=2)), (True, Geometry(depth=8, lanes=2))])
+def test_cross_check_dot_pe(pipelined, geometry):
+    rng = np.random.default_rng(73)
+    A = rng.standard_normal((4, 48)) * 0.3
+    B = rng.standard_normal((48, 8)) * 0.3
+    schedule = plan(A, B, kchunk=3, geometry=geometry)
+    assert cross_check(schedule, pipelined) > 0
+    fast = run_model(schedule, pipelined=pipelined)
+    fill = PIPELINE_FILL if pipelined else 0
+    assert fast.cycles == sum(op_cycles(step.op, pipelined, geometry) for step in schedule.steps) + fill
+
+
+@pytest.mark.parametrize(
+    ("geometry", "multi_output"),
+    [
+        (Geometry(zero_skip=True), False),
+        (Geometry(zero_skip=True, max_outputs=4), True),
+        (Geometry(zero_skip=True, depth=8, lanes=2, b_file=True, pipeline_stages=2), False),
+    ],
+)
+def test_cross_check_zero_skip(geometry, multi_output):
+    # ReLU-sparse A with a dead band of k-blocks and zero B rows
+    rng = np.random.default_rng(107)
+    A = np.maximum(rng.standard_normal((6, 40)), 0) * 0.3
+    A[:, 8:20] = 0
+    B = rng.standard_normal((40, 10)) * 0.3
+    B[rng.random(40) < 0.3] = 0
+    schedule = plan(A, B, banks=3, kchunk=3, geometry=geometry, multi_output=multi_output)
+    assert cross_check(schedule) > 0
+    fast, stepped = run_model(schedule), run_model(schedule, trace=[])
+    want = matmul(bits_from_float(A), bits_from_float(B))[0]
+    assert np.array_equal(fast.d_bits, want) and np.array_equal(stepped.d_bits, want)
+    dense = run_model(
+        plan(A, B, banks=3, kchunk=3, geometry=geometry._replace(zero_skip=False), multi_output=multi_output)
+    )
+    assert fast.cycles == stepped.cycles < dense.cycles
+
+
+def test_zero_skip_elides_empty_kblocks():
+    # one live A column, in the third of four k-blocks: the load's forced first step, stalls while the empty
+    # second tile is replaced by the third, its one step, and the empty fourth
+    geometry = Geometry(zero_skip=True)
+    a = np.zeros((4, 16), dtype=np.uint16)
+    a[:, 9] = bits_from_float(np.array([1.0, -2.0, 0.5, 3.0]))
+    b = bits_from_float(np.random.default_rng(109).standard_normal((16, 4)))
+    loads = {kb: a[:, kb * 4 : (kb + 1) * 4] for kb in range(4)} | {
+        16 + kb: b[kb * 4 : (kb + 1) * 4] for kb in range(4)
+    }
+    op = Op(0, 16, 40, 4, False, True, 0)
+    assert zero_skip_cycles([0b0001, 0, 0b0010, 0], geometry.kblock_cycles) == (6, 14)
+    trace: list[tuple] = []
+    schedule = Schedule([Step(loads, op, (0, 0))], (4, 16, 4), geometry)
+    result = run_sim(schedule, trace=trace)
+    assert trace[-1][-2] == 14  # skipped
+    assert result.cycles == op_cycles(op, geometry=geometry, mac_cycles=6) == op_cycles(op) - 10
+    assert np.array_equal(result.d_bits, matmul(a, b)[0])
+    assert cross_check(schedule) == len(trace)
+
+
+@pytest.mark.parametrize(("pipelined", "depth"), [(False, 4), (True, 8)])
+def test_cross_check_sparse_a(pipelined, depth):
+    # 2:4-pruned A against the same A dense: bits, flags (the first tile-row's hot values overflow) and half
+    # the MAC cycles
+    rng = np.random.default_rng(127)
+    A = prune(rng.standard_normal((8, 32)) * 0.3)
+    A[:4, :8] = np.tile([128.0, 0.0, 0.0, 128.0], 2)
+    B = rng.standard_normal((32, 8)) * 0.3
+    B[:8] = 64.0
+    geometry = Geometry(depth=depth, sparse_a=True)
+    schedule = plan(A, B, banks=2, kchunk=2, geometry=geometry)
+    assert cross_check(schedule, pipelined) > 0
+    sparse, dense = (
+        run_model(schedule, pipelined=pipelined),
+        run_model(plan(A, B, banks=2, kchunk=2, geometry=geometry._replace(sparse_a=False)), pipelined=pipelined),
+    )
+    assert np.array_equal(sparse.d_bits, dense.d_bits)
+    assert sparse.any_overflow and dense.any_overflow
+    mac_cycles = sum(step.op.kblocks for step in schedule.steps) * depth
+    assert dense.cycles - sparse.cycles == mac_cycles // 2
+    assert sparse.traffic.read_bytes < dense.traffic.read_bytes
+
+
+def test_cycle_stepped_and_transaction_modes_agree():
+    rng = np.random.default_rng(47)
+    A = rng.standard_normal((8, 40)) * 0.2
+    B = rng.standard_normal((40, 8)) * 0.2
+    schedule = plan(A, B, kchunk=3)
+    fast, stepped = run_model(schedule), run_model(schedule, trace=[])
+    assert np.array_equal(fast.d_bits, stepped.d_bits)
+    assert fast.cycles == stepped.cycles == sum(op_cycles(step.op) for step in schedule.steps)
+    fast, stepped = run_model(schedule, pipelined=True), run_model(schedule, trace=[], pipelined=True)
+    assert np.array_equal(fast.d_bits, stepped.d_bits)
+    assert fast.cycles == stepped.cycles == sum(op_cycles(step.op, True) for step in schedule.steps) + PIPELINE_FILL
+
+
+def test_prefetch_addresses():
+    model = MMAUnitModel()
+    model.slot_a, model.slot_b, model.kblocks, model.start = 8, 16, 3, 1
+    seen = []
+    while not model.done:
+        seen.append((model.state, model.rd_addr_a, model.rd_addr_b))
+        model.rd_data_a = model.rd_data_b = 0
+        model.tick()
+    mac_addrs = [(a, b) for state, a, b in seen if state == State.MAC]
+    assert mac_addrs == [(9, 17)] * 4 + [(10, 18)] * 4 + [(11, 19)] * 4
@@ -5,7 +5,10 @@ import numpy as np
 from amaranth.hdl import Period
 from amaranth.sim import Simulator
 
-from bfloat16 import BF16
+from batch_sim import simulate_mma_unit
+from bfloat16 import bits_from_float, bits_to_float
+from dsram import DSRAM
+from gemm import SimPorts
 from mma_stream import MMAUnit, N
 
 MAX_CYCLES = 500
@@ -23,50 +26,24 @@ def bf16_rtne(x: float) -> float:
 
 def bf16_matmul(A, B):
     K = A.shape[1]
-    Aq = np.array([[BF16.from_float(float(x)).to_float() for x in row] for row in A], dtype=np.float64)
-    Bq = np.array([[BF16.from_float(float(x)).to_float() for x in row] for row in B], dtype=np.float64)
+    Aq = bits_to_float(bits_from_float(A), np.float64)
+    Bq = bits_to_float(bits_from_float(B), np.float64)
     out = np.zeros((N, N), dtype=np.float64)
     for i, j in itertools.product(range(N), range(N)):
         out[i, j] = bf16_rtne(sum(float(Aq[i, k]) * float(Bq[k, j]) for k in range(K)))
     return out
 
 
-def pack_tile(tile: np.ndarray) -> int:
-    word = 0
-    for n, (i, j) in enumerate(itertools.product(range(N), range(N))):
-        word |= BF16.from_float(float(tile[i, j])).to_bits() << (n * 16)
-    return word
-
-
-def unpack_tile(word: int) -> np.ndarray:
-    out = np.zeros((N, N), dtype=np.float64)
-    for n, (i, j) in enumerate(itertools.product(range(N), range(N))):
-        out[i, j] = BF16.from_bits((word >> (n * 16)) & 0xFFFF).to_float()
-    return out
-
-
-def split_into_kblocks(M: np.ndarray, axis: str, kblocks: int):
-    """A: split columns into kblocks 4x4 tiles. B: split rows into kblocks 4x4 tiles."""
-    tiles = []
-    for kb in range(kblocks):
-        if axis == "a":
-            tiles.append(M[:, kb * N : (kb + 1) * N])
-        else:
-            tiles.append(M[kb * N : (kb + 1) * N, :])
-    return tiles
-
-
 def run_stream(A, B, kblocks: int, request, kblocks_encoded: int | None = None) -> np.ndarray:
     dut = MMAUnit()
-    a_tiles = split_into_kblocks(A, "a", kblocks)
-    b_tiles = split_into_kblocks(B, "b", kblocks)
-    slot_a, slot_b, slot_c = 8, 16, 32
-    a_mem = {slot_a + kb: pack_tile(a_tiles[kb]) for kb in range(kblocks)}
-    b_mem = {slot_b + kb: pack_tile(b_tiles[kb]) for kb in range(kblocks)}
-    captured: dict[str, np.ndarray] = {}
+    slot_a, slot_b, slot_c = 0, 16, 32  # one shared D-SRAM: A and B may each span 16 k-blocks
+    dsram = DSRAM()
+    dsram.load_a(slot_a, A)
+    dsram.load_b(slot_b, B)
     encoded = kblocks_encoded if kblocks_encoded is not None else kblocks % 16
 
     async def bench(ctx):
+        ports = SimPorts(ctx, dut)
         ctx.set(dut.slot_a, slot_a)
         ctx.set(dut.slot_b, slot_b)
         ctx.set(dut.slot_c, slot_c)
@@ -76,17 +53,13 @@ def run_stream(A, B, kblocks: int, request, kblocks_encoded: int | None = None)
         ctx.set(dut.start, 1)
 
         for _ in range(MAX_CYCLES):
-            ctx.set(dut.rd_data_a, a_mem.get(ctx.get(dut.rd_addr_a), 0))
-            ctx.set(dut.rd_data_b, b_mem.get(ctx.get(dut.rd_addr_b), 0))
-            if ctx.get(dut.wr_en):
-                captured["d"] = unpack_tile(ctx.get(dut.wr_data))
-                captured["wr_addr"] = ctx.get(dut.wr_addr)
+            dsram.serve(ports)
             if ctx.get(dut.done):
                 break
             await ctx.tick()
 
         ctx.set(dut.start, 0)
-        assert "d" in captured, "MMAUnit never asserted wr_en"
+        assert dsram.writes == 1, "MMAUnit never asserted wr_en"
 
     sim = Simulator(dut)
     sim.add_clock(Period(us=1))
@@ -96,28 +69,27 @@ def run_stream(A, B, kblocks: int, request, kblocks_encoded: int | None = None)
             sim.run()
     else:
         sim.run()
-    assert captured["wr_addr"] == slot_c
-    return captured["d"]
+    return dsram.tile_float(slot_c)
 
 
 def run_chain(ops, request):
     """Run [(A, B, kblocks, accumulate, evict, acc_d), ...] on one DUT.
     Returns (evictions, flags): evicted tiles in op order, and (any_dropped, any_overflow) at each op's done."""
     dut = MMAUnit()
-    slot_a, slot_b, slot_c = 8, 16, 32
+    slot_a, slot_b, slot_c = 0, 16, 32  # one shared D-SRAM: A and B may each span 16 k-blocks
+    dsram = DSRAM()
     evictions: list[np.ndarray] = []
     flags: list[tuple[bool, bool]] = []
 
     async def bench(ctx):
+        ports = SimPorts(ctx, dut)
         ctx.set(dut.slot_a, slot_a)
         ctx.set(dut.slot_b, slot_b)
         ctx.set(dut.slot_c, slot_c)
 
         for A, B, kblocks, accumulate, evict, acc_d in ops:
-            a_tiles = split_into_kblocks(A, "a", kblocks)
-            b_tiles = split_into_kblocks(B, "b", kblocks)
-            a_mem = {slot_a + kb: pack_tile(a_tiles[kb]) for kb in range(kblocks)}
-            b_mem = {slot_b + kb: pack_tile(b_tiles[kb]) for kb in range(kblocks)}
+            dsram.load_a(slot_a, A)
+            dsram.load_b(slot_b, B)
 
             ctx.set(dut.kblocks, kblocks % 16)
             ctx.set(dut.accumulate, 1 if accumulate else 0)
@@ -125,19 +97,16 @@ def run_chain(ops, request):
             ctx.set(dut.acc_d, acc_d)
             ctx.set(dut.start, 1)
 
-            evicted = None
+            writes = dsram.writes
             for _ in range(MAX_CYCLES):
-                ctx.set(dut.rd_data_a, a_mem.get(ctx.get(dut.rd_addr_a), 0))
-                ctx.set(dut.rd_data_b, b_mem.get(ctx.get(dut.rd_addr_b), 0))
-                if ctx.get(dut.wr_en):
-                    evicted = unpack_tile(ctx.get(dut.wr_data))
+                dsram.serve(ports)
                 if ctx.get(dut.done):
                     break
                 await ctx.tick()
             assert ctx.get(dut.done), "op never completed"
             flags.append((bool(ctx.get(dut.any_dropped)), bool(ctx.get(dut.any_overflow))))
-            if evicted is not None:
-                evictions.append(evicted)
+            if dsram.writes > writes:
+                evictions.append(dsram.tile_float(slot_c))
             ctx.set(dut.start, 0)
             await ctx.tick()
 
@@ -198,49 +167,17 @@ def test_kblocks_zero_means_sixteen(request):
     assert_bit_exact(run_stream(A, B, 16, request, kblocks_encoded=0), bf16_matmul(A, B))
 
 
-def cycles_to_done(kblocks: int) -> int:
-    dut = MMAUnit()
-    K = N * kblocks
-    rng = np.random.default_rng(0)
-    A = rng.standard_normal((N, K)).astype(np.float32) * 0.1
-    B = rng.standard_normal((K, N)).astype(np.float32) * 0.1
-    a_tiles = split_into_kblocks(A, "a", kblocks)
-    b_tiles = split_into_kblocks(B, "b", kblocks)
-    slot_a, slot_b, slot_c = 8, 16, 32
-    a_mem = {slot_a + kb: pack_tile(a_tiles[kb]) for kb in range(kblocks)}
-    b_mem = {slot_b + kb: pack_tile(b_tiles[kb]) for kb in range(kblocks)}
-    measured: dict[str, int] = {}
-
-    async def bench(ctx):
-        ctx.set(dut.slot_a, slot_a)
-        ctx.set(dut.slot_b, slot_b)
-        ctx.set(dut.slot_c, slot_c)
-        ctx.set(dut.kblocks, kblocks % 16)
-        ctx.set(dut.evict, 1)
-        ctx.set(dut.accumulate, 0)
-        ctx.set(dut.start, 1)
-
-        for cyc in range(MAX_CYCLES):
-            ctx.set(dut.rd_data_a, a_mem.get(ctx.get(dut.rd_addr_a), 0))
-            ctx.set(dut.rd_data_b, b_mem.get(ctx.get(dut.rd_addr_b), 0))
-            if ctx.get(dut.done):
-                measured["cyc"] = cyc
-                break
-            await ctx.tick()
-        assert "cyc" in measured, "never reached done"
-
-    sim = Simulator(dut)
-    sim.add_clock(Period(us=1))
-    sim.add_testbench(bench)
-    sim.run()
-    return measured["cyc"]
-
-
 def test_cycle_budget_per_kblock():
+    # one DUT runs every kblocks value back-to-back; each op's cycles differ only by 4 per extra k-block
     cycles_per_kblock = 4
-    base = cycles_to_done(1)
-    for kblocks in (2, 4, 16):
-        assert cycles_to_done(kblocks) - base == cycles_per_kblock * (kblocks - 1)
+    kblocks = [1, 2, 4, 16]
+    rng = np.random.default_rng(0)
+    a = [bits_from_float(rng.standard_normal((N, N * kb)) * 0.1) for kb in kblocks]
+    b = [bits_from_float(rng.standard_normal((N * kb, N)) * 0.1) for kb in kblocks]
+    _, op_cycles = simulate_mma_unit(a, b)
+    base = op_cycles[0]
+    for kb, cycles in zip(kblocks[1:], op_cycles[1:]):
+        assert cycles - base == cycles_per_kblock * (kb - 1)
 
 
 def test_accumulate_chain_matches_single_mma(request):
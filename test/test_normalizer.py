@@ -1,3 +1,4 @@
+import random
 import sys
 
 from amaranth.sim import Simulator
@@ -153,3 +154,29 @@ def test_normalizer_edge_cases(request):
             sim.run()
     else:
         sim.run()
+
+
+def test_normalizer_detects_its_own_shift(request):
+    dut = normalizer.Normalizer(width=26, detect=True)
+
+    async def bench(ctx):
+        random.seed(26)
+        for _ in range(100):
+            value = random.getrandbits(26) >> random.randrange(26)
+            ctx.set(dut.value_in, value)
+            if value == 0:
+                assert ctx.get(dut.value_out) == 0
+                continue
+            shift = 26 - value.bit_length()
+            assert ctx.get(dut.shift_amount) == shift
+            assert ctx.get(dut.value_out) == value << shift
+
+    sim = Simulator(dut)
+    sim.add_testbench(bench)
+
+    if request.config.getoption("--vcd"):
+        vcd_name = f"Normalizer_{sys._getframe().f_code.co_name}.vcd"
+        with sim.write_vcd(vcd_name):
+            sim.run()
+    else:
+        sim.run()
@@ -1,5 +1,6 @@
 import random
 
+import pytest
 from amaranth.sim import Simulator
 
 import parallel_prefix
@@ -112,3 +113,65 @@ def test_kogge_stone_all_generate():
     sim = Simulator(dut)
     sim.add_testbench(bench)
     sim.run()
+
+
+@pytest.mark.parametrize("network", [parallel_prefix.KoggeStone, parallel_prefix.Sklansky, parallel_prefix.BrentKung])
+@pytest.mark.parametrize("width", [1, 7, 26, 48])
+def test_prefix_networks_match_ripple(network, width):
+    dut = network(width=width)
+
+    async def bench(ctx):
+        rng = random.Random(width)
+        for _ in range(50):
+            g_list = [rng.randint(0, 1) for _ in range(width)]
+            p_list = [rng.randint(0, 1) for _ in range(width)]
+            cin = rng.randint(0, 1)
+            ctx.set(dut.generate, sum(bit << i for i, bit in enumerate(g_list)))
+            ctx.set(dut.propagate, sum(bit << i for i, bit in enumerate(p_list)))
+            ctx.set(dut.carry_in, cin)
+            expected = ripple_carry_reference(g_list, p_list, cin, width)
+            assert [ctx.get(dut.carries[i]) for i in range(width + 1)] == expected
+
+    sim = Simulator(dut)
+    sim.add_testbench(bench)
+    sim.run()
+
+
+@pytest.mark.parametrize(
+    "adder", [parallel_prefix.KoggeStoneAdder, parallel_prefix.SklanskyAdder, parallel_prefix.BrentKungAdder]
+)
+def test_prefix_adders_add(adder):
+    dut = adder(width=13)
+
+    async def bench(ctx):
+        rng = random.Random(13)
+        for _ in range(100):
+            a, b, cin = rng.getrandbits(13), rng.getrandbits(13), rng.randint(0, 1)
+            ctx.set(dut.a, a)
+            ctx.set(dut.b, b)
+            ctx.set(dut.carry_in, cin)
+            total = a + b + cin
+            assert ctx.get(dut.sum) == total & 0x1FFF
+            assert ctx.get(dut.carry_out) == total >> 13
+
+    sim = Simulator(dut)
+    sim.add_testbench(bench)
+    sim.run()
+
+
+@pytest.mark.parametrize("width", [1, 7, 26, 48])
+def test_leading_zero_counter(width):
+    dut = parallel_prefix.LeadingZeroCounter(width)
+
+    async def bench(ctx):
+        rng = random.Random(width)
+        values = [0, 1, (1 << width) - 1] + [rng.getrandbits(width) >> rng.randrange(width) for _ in range(100)]
+        for value in values:
+            ctx.set(dut.value, value)
+            assert ctx.get(dut.count) == width - value.bit_length()
+            assert ctx.get(dut.leading_one) == max(value.bit_length() - 1, 0)
+            assert ctx.get(dut.zero) == (value == 0)
+
+    sim = Simulator(dut)
+    sim.add_testbench(bench)
+    sim.run()
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from amaranth.hdl import Period
+from amaranth.sim import Simulator
+
+from golden import round_to_bf16
+from shared_drain import SharedDrain, drain_cycles
+
+
+@pytest.mark.parametrize("engines", [1, 3, 4])
+def test_rounds_every_value_and_holds(engines):
+    rng = np.random.default_rng(97)
+    first = rng.integers(-(1 << 40), 1 << 40, 16)
+    second = rng.integers(-(1 << 20), 1 << 20, 16)
+    dut = SharedDrain(16, engines, width=48, lsb_exp=-32)
+    cycles = drain_cycles(16, engines)
+    got = []
+
+    async def bench(ctx):
+        for values, run_for in ((first, cycles), (second, cycles + 2)):  # holding run past the drain is harmless
+            for n, value in enumerate(values.tolist()):
+                ctx.set(dut.values[n], value)
+            ctx.set(dut.run, 1)
+            await ctx.tick().repeat(run_for)
+            ctx.set(dut.run, 0)
+            for n in range(16):
+                ctx.set(dut.values[n], 0)  # the buffer holds once run drops
+            await ctx.tick()
+            got.append([ctx.get(dut.results[n].as_value()) for n in range(16)])
+
+    sim = Simulator(dut)
+    sim.add_clock(Period(us=1))
+    sim.add_testbench(bench)
+    sim.run()
+    assert got[0] == round_to_bf16(first).tolist()
+    assert got[1] == round_to_bf16(second).tolist()
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from bfloat16 import bits_from_float
+from sparse import compress, expand, prune, sparse_words
+
+
+def test_compress_round_trips_and_pads_short_groups():
+    rng = np.random.default_rng(113)
+    a = prune(rng.standard_normal((8, 16)))
+    a[0, :4] = 0  # no nonzeros: pads with positions 0 and 1
+    a[1, 4:8] = [0, 0, 0, 2.0]  # one: pads with the first zero, kept in k order
+    tiles = bits_from_float(a).reshape(2, 4, 4, 4).swapaxes(1, 2)
+    words = compress(tiles)
+    assert words.shape == (2, 4, sparse_words(4, 4)) == (2, 4, 9)
+    assert np.array_equal(expand(words, (4, 4)), tiles)
+    assert words[0, 1, 2:4].tolist() == [0, bits_from_float(2.0)]
+    assert words[0, 1, 8] >> 4 & 0xF == 0b1100  # its indices, after row 0's: positions 0 and 3
+    assert words[0, 0, 8] & 0xF == 0b0100  # the empty group: positions 0 and 1
+
+
+def test_prune_keeps_the_two_largest_and_compress_rejects_dense():
+    x = np.array([[0.5, -3.0, 1.0, 2.0, 7.0, 0.0, 0.0, 0.0, 1.0, 1.5]])
+    assert prune(x).tolist() == [[0.0, -3.0, 0.0, 2.0, 7.0, 0.0, 0.0, 0.0, 1.0, 1.5]]
+    with pytest.raises(ValueError):
+        compress(bits_from_float(np.ones((4, 4))))
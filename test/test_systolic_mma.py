@@ -0,0 +1,31 @@
+import numpy as np
+
+from batch_sim import simulate_mma
+from bfloat16 import bits_from_float
+from golden import matmul
+
+
+def test_matches_broadcast_mma():
+    rng = np.random.default_rng(0x5157)
+    a = bits_from_float(rng.standard_normal((6, 4, 4)) * 0.4)
+    b = bits_from_float(rng.standard_normal((6, 4, 4)) * 0.4)
+    systolic, broadcast = simulate_mma(a, b, systolic=True), simulate_mma(a, b)
+    assert np.array_equal(systolic.bits, broadcast.bits)
+    assert np.array_equal(systolic.bits, matmul(a, b)[0])
+    # same handshake, rows + cols - 1 more cycles of skew per matmul
+    assert systolic.cycles - broadcast.cycles == 6 * (4 + 4 - 1)
+
+
+def test_non_square_and_flags():
+    # 3x5 PEs, 2 deep; the second matmul's products overflow one PE's accumulator window
+    rng = np.random.default_rng(0x5158)
+    a = bits_from_float(rng.standard_normal((2, 3, 2)) * 0.4)
+    b = bits_from_float(rng.standard_normal((2, 2, 5)) * 0.4)
+    a[1, 2] = bits_from_float(np.array([2.0**60, 2.0**60]))
+    b[1, :, 4] = bits_from_float(np.array([2.0**60, 2.0**60]))
+    result = simulate_mma(a, b, systolic=True)
+    want, dropped, overflow = matmul(a, b)
+    assert np.array_equal(result.bits, want)
+    assert result.dropped.tolist() == dropped.any(axis=(1, 2)).tolist()
+    assert result.overflow.tolist() == overflow.any(axis=(1, 2)).tolist()
+    assert result.dropped[1] or result.overflow[1]
@@ -0,0 +1,72 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+from amaranth.back import rtlil
+
+import tool_cache
+from fixed_pe import FixedMAC
+from rounder import Rounder
+
+ANALYSIS = Path(__file__).resolve().parent.parent / "analysis"
+
+
+def test_key_ignores_source_locations_but_not_design():
+    def convert():
+        return rtlil.convert(FixedMAC(), name="top")
+
+    first, second = convert(), convert()
+    assert tool_cache.key(tool_cache.design_text(first)) == tool_cache.key(tool_cache.design_text(second))
+    edited = first.replace("wire width 48", "wire width 47", 1)
+    assert edited != first
+    assert tool_cache.key(tool_cache.design_text(edited)) != tool_cache.key(tool_cache.design_text(first))
+    assert tool_cache.key("a", "b") != tool_cache.key("ab")
+
+
+def test_store_then_lookup(tmp_path):
+    source = tmp_path / "netlist.json"
+    source.write_text("{}")
+    assert tool_cache.lookup("synth", "k", tmp_path / "cache") is None
+    entry = tool_cache.store("synth", "k", {"netlist.json": source, "yosys.log": "stat"}, tmp_path / "cache")
+    assert tool_cache.lookup("synth", "k", tmp_path / "cache") == entry
+    assert (entry / "netlist.json").read_text() == "{}" and (entry / "yosys.log").read_text() == "stat"
+
+    # a second publish of the same key keeps the first entry and leaves no partial directory behind
+    assert tool_cache.store("synth", "k", {"yosys.log": "other"}, tmp_path / "cache") == entry
+    assert (entry / "yosys.log").read_text() == "stat"
+    assert [p.name for p in (tmp_path / "cache" / "synth").iterdir()] == ["k"]
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(shutil.which("yosys") is None, reason="needs Yosys")
+def test_synth_caches_log_and_netlist(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(ANALYSIS))
+    import synth
+
+    block = synth.Block("Rounder", lambda: Rounder(7), True)
+    output, cached = synth.synthesize(block, cache_root=tmp_path)
+    assert not cached and synth.lut_depth(output) is not None
+    assert synth.synthesize(block, cache_root=tmp_path) == (output, True)
+    (entry,) = (tmp_path / "synth").iterdir()
+    assert json.loads((entry / "netlist.json").read_text())["modules"]
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not (shutil.which("yosys") and shutil.which("nextpnr-ecp5")), reason="needs Yosys and nextpnr")
+def test_pnr_caches_netlist_and_report(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(ANALYSIS))
+    import pnr
+
+    block = pnr.Block("Rounder", lambda: pnr.make_pnr_top(lambda: Rounder(7)))
+    netlist, report = tmp_path / "Rounder.json", tmp_path / "Rounder.report.json"
+    assert not pnr.synth_json(block, netlist, cache_root=tmp_path / "cache")
+    log, cached = pnr.pnr(netlist, report, cache_root=tmp_path / "cache")
+    assert not cached and pnr.parse_fmax(log) is not None
+    utilization = pnr.parse_utilization(report)
+
+    netlist.unlink()
+    report.unlink()
+    assert pnr.synth_json(block, netlist, cache_root=tmp_path / "cache")
+    assert pnr.pnr(netlist, report, cache_root=tmp_path / "cache") == (log, True)
+    assert pnr.parse_utilization(report) == utilization